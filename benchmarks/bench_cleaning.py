@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent HTML cleaning in threads vs the cleaning process pool
+
+Cleans the same batch of large pages at once, as a crawl or a burst of URL
+requests would, and reports the wall time and how long a concurrent ping-like
+task waited for the event loop meanwhile.
+
+Run with: python -m benchmarks.bench_cleaning --pages 16 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from typing import Dict
+
+from src.processors.cleaning_pool import CleaningPool
+
+from .corpus import make_page
+
+
+async def loop_lag(stop: asyncio.Event) -> float:
+    """Worst delay of a 1 ms sleep on the loop until ``stop`` is set"""
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        worst = max(worst, time.perf_counter() - start - 0.001)
+    return worst
+
+
+async def run(pool: CleaningPool, pages: int, paragraphs: int) -> Dict[str, float]:
+    html = make_page(paragraphs)
+    # Start the worker processes outside the timed run
+    await pool.aclean(html, None, collect_links=True)
+
+    stop = asyncio.Event()
+    lag = asyncio.create_task(loop_lag(stop))
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(pool.aclean(html, None, collect_links=True) for _ in range(pages))
+    )
+    elapsed = time.perf_counter() - start
+    stop.set()
+    return {"seconds": elapsed, "max_loop_lag": await lag, "kb": len(html) / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare thread and process cleaning")
+    parser.add_argument("--pages", type=int, default=16, help="pages cleaned at once")
+    parser.add_argument("--paragraphs", type=int, default=3000, help="size of each page")
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count() or 1, help="pool processes"
+    )
+    args = parser.parse_args()
+
+    print(f"{'mode':<14} {'page KB':>8} {'wall (ms)':>10} {'max loop lag (ms)':>18}")
+    for name, pool in (
+        ("threads", CleaningPool(workers=0)),
+        (f"pool x{args.workers}", CleaningPool(workers=args.workers, min_chars=0)),
+    ):
+        try:
+            result = asyncio.run(run(pool, args.pages, args.paragraphs))
+        finally:
+            pool.close()
+        print(
+            f"{name:<14} {result['kb']:>8.0f} {result['seconds'] * 1000:>10.1f} "
+            f"{result['max_loop_lag'] * 1000:>18.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
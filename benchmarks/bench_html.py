@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark HTML cleaning: streaming extractor vs the previous BeautifulSoup path
+
+Run with: python -m benchmarks.bench_html
+"""
+
+import re
+import time
+
+from src.processors.html_extractor import extract_html_text
+
+from .corpus import make_page
+
+
+def legacy_clean_html_content(html_content: str, max_length: int = 10000) -> str:
+    """The BeautifulSoup implementation ContentProcessor used before"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html_content, "html.parser")
+    for element in soup(["script", "style", "meta", "link", "noscript"]):
+        element.decompose()
+    for tag in soup.find_all(attrs={"href": re.compile(r"\.(css|js)$", re.I)}):
+        tag.decompose()
+    for tag in soup.find_all(attrs={"src": re.compile(r"\.(css|js)$", re.I)}):
+        tag.decompose()
+    text = soup.get_text()
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return "\n".join(chunk for chunk in chunks if chunk)[:max_length]
+
+
+def best_time(func, *args, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    implementations = [
+        ("streaming (lxml)", lambda html, n: extract_html_text(html, n, True)),
+        ("streaming (html.parser)", lambda html, n: extract_html_text(html, n, False)),
+        # Whole page without a budget, to compare raw parsing throughput
+        ("streaming (lxml, no cap)", lambda html, n: extract_html_text(html, None)),
+    ]
+    try:
+        import bs4  # noqa: F401
+
+        implementations.insert(0, ("beautifulsoup (previous)", legacy_clean_html_content))
+    except ImportError:
+        print("beautifulsoup4 not installed, skipping the previous implementation")
+
+    print(f"{'page':>10} {'implementation':<26} {'time (ms)':>10} {'MB/s':>8}")
+    for paragraphs in (50, 500, 5000):
+        html = make_page(paragraphs)
+        size_mb = len(html.encode("utf-8")) / 1e6
+        for name, func in implementations:
+            seconds = best_time(func, html, 10000)
+            print(
+                f"{len(html) // 1024:>8}KB {name:<26} {seconds * 1000:>10.2f} "
+                f"{size_mb / seconds:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Per-stage microbenchmarks for the extraction pipeline
+
+Each stage is timed on its own over the generated corpus, reporting the best
+time, throughput and peak allocations. Results can be saved as a baseline and
+later runs compared against it:
+
+    python -m benchmarks.bench_pipeline --save benchmarks/baseline.json
+    python -m benchmarks.bench_pipeline --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Optional, Tuple
+
+from src.processors.address_patterns import find_addresses
+from src.processors.candidates import select_candidate_text
+from src.processors.chunker import split_into_chunks
+from src.processors.content_processor import ContentProcessor
+from src.processors.input_handler import InputHandler
+from src.providers.base_provider import BaseProvider
+
+from .corpus import document_names, make_corpus, make_responses
+
+# Slowdown over the baseline that counts as a regression
+DEFAULT_THRESHOLD = 0.10
+
+# Differences below this are timer noise, whatever the percentage
+MIN_DELTA_MS = 0.05
+
+
+def measure(func: Callable[[], object], size: int, repeat: int) -> Dict[str, float]:
+    """Time ``func`` and record its peak allocations in a separate traced run"""
+    func()  # warm up caches and lazy imports
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "best_ms": best * 1000,
+        "mean_ms": sum(timings) / len(timings) * 1000,
+        "mb_per_s": size / 1e6 / best if best else 0.0,
+        "peak_kb": peak / 1024,
+        "bytes": size,
+    }
+
+
+def build_cases(tmpdir: str) -> Dict[str, Tuple[Callable[[], object], int]]:
+    """Map ``stage/document`` names to a zero-argument callable and its input size"""
+    corpus = make_corpus()
+    sizes = {name: len(doc["content"].encode("utf-8")) for name, doc in corpus.items()}
+    processor = ContentProcessor()
+    handler = InputHandler()
+    cases: Dict[str, Tuple[Callable[[], object], int]] = {}
+
+    for name in document_names(corpus, "html"):
+        html = corpus[name]["content"]
+        cases[f"clean_html_content/{name}"] = (
+            lambda html=html: processor.clean_html_content(html),
+            sizes[name],
+        )
+        cases[f"basic_text_extraction/{name}"] = (
+            lambda html=html: processor.basic_text_extraction(html),
+            sizes[name],
+        )
+
+    for name, doc in corpus.items():
+        path = os.path.join(tmpdir, name + doc["suffix"])
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(doc["content"])
+        cases[f"process_input/{name}"] = (
+            lambda path=path: handler.process_input(path),
+            sizes[name],
+        )
+        # The whole document, as when it is kept for chunked extraction
+        cases[f"process_input_full/{name}"] = (
+            lambda path=path, n=len(doc["content"]): handler.process_input(path, n),
+            sizes[name],
+        )
+
+    for name in [*document_names(corpus, "text"), *document_names(corpus, "json")]:
+        text = corpus[name]["content"]
+        cases[f"split_into_chunks/{name}"] = (
+            lambda text=text: split_into_chunks(text, 8000, 300),
+            sizes[name],
+        )
+        cases[f"find_addresses/{name}"] = (lambda text=text: find_addresses(text), sizes[name])
+        cases[f"select_candidate_text/{name}"] = (
+            lambda text=text: select_candidate_text(text),
+            sizes[name],
+        )
+
+    for name, response in make_responses().items():
+        cases[f"parse_addresses/{name}"] = (
+            lambda response=response: BaseProvider.parse_addresses(response),
+            len(response.encode("utf-8")),
+        )
+    return cases
+
+
+def run(repeat: int, only: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for name, (func, size) in build_cases(tmpdir).items():
+            if only and only not in name:
+                continue
+            results[name] = measure(func, size, repeat)
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+) -> List[str]:
+    """Return the names of cases that got slower than the baseline by more than ``threshold``"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if (
+            previous
+            and result["best_ms"] > previous["best_ms"] * (1 + threshold)
+            and result["best_ms"] - previous["best_ms"] > MIN_DELTA_MS
+        ):
+            regressions.append(name)
+    return regressions
+
+
+def print_results(
+    results: Dict[str, Dict[str, float]],
+    baseline: Optional[Dict[str, Dict[str, float]]] = None,
+):
+    header = f"{'stage/document':<44} {'best ms':>9} {'MB/s':>8} {'peak KB':>9}"
+    if baseline:
+        header += f" {'vs base':>8}"
+    print(header)
+    for name, result in results.items():
+        line = (
+            f"{name:<44} {result['best_ms']:>9.3f} {result['mb_per_s']:>8.1f} "
+            f"{result['peak_kb']:>9.1f}"
+        )
+        if baseline and name in baseline:
+            change = result["best_ms"] / baseline[name]["best_ms"] - 1
+            line += f" {change:>+8.1%}"
+        print(line)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per case")
+    parser.add_argument("--only", help="run only cases whose name contains this")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare against a saved JSON baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="slowdown counted as a regression (default 0.10 = 10%%)",
+    )
+    args = parser.parse_args(argv)
+
+    # Per-call info logs would dominate the timings of the fast stages
+    logging.disable(logging.INFO)
+    results = run(args.repeat, args.only)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    print_results(results, baseline)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "machine": platform.machine(),
+                    "repeat": args.repeat,
+                    "results": results,
+                },
+                f,
+                indent=2,
+            )
+        print(f"Saved results to {args.save}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than "
+                  f"{args.threshold:.0%}:")
+            for name in regressions:
+                print(f"  {name}")
+            return 1
+        print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
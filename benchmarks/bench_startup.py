@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Cold start benchmark: time from launching the server to its first pong
+
+MCP clients spawn the server on demand, so this is latency every user sees.
+Ollama is pointed at a socket that accepts connections but never answers,
+the worst case for a server that probes providers before serving.
+
+Run with: python -m benchmarks.bench_startup --runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from .load_test import STARTUP_TIMEOUT, ServerClient
+
+
+class BlackholeServer:
+    """Listening TCP socket that never accepts, so requests to it hang"""
+
+    def __init__(self):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(64)
+
+    @property
+    def url(self) -> str:
+        host, port = self.sock.getsockname()
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.sock.close()
+
+
+def startup_env(backend_url: str) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.update(
+        {
+            "OLLAMA_BASE_URL": backend_url,
+            "OPENAI_API_KEY": "stub-key",
+            "OPENAI_BASE_URL": f"{backend_url}/v1",
+            "RESULT_CACHE_PATH": "",
+        }
+    )
+    return env
+
+
+async def time_to_first_pong(env: Dict[str, str]) -> float:
+    """Seconds from spawning the server to receiving its first pong"""
+    start = time.perf_counter()
+    client = await ServerClient.start(env)
+    try:
+        response = await asyncio.wait_for(client.call({"method": "ping"}), STARTUP_TIMEOUT)
+        elapsed = time.perf_counter() - start
+        if response.get("result") != "pong":
+            raise RuntimeError(f"Unexpected ping response: {response}")
+        return elapsed
+    finally:
+        await client.close()
+
+
+async def baseline_interpreter() -> float:
+    """Seconds to start and exit a bare interpreter, for reference"""
+    start = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(sys.executable, "-c", "pass")
+    await process.wait()
+    return time.perf_counter() - start
+
+
+async def amain(runs: int) -> Dict[str, Any]:
+    startups: List[float] = []
+    interpreters: List[float] = []
+    with BlackholeServer() as blackhole:
+        env = startup_env(blackhole.url)
+        for _ in range(runs):
+            interpreters.append(await baseline_interpreter())
+            startups.append(await time_to_first_pong(env))
+
+    return {
+        "runs": runs,
+        "first_pong_ms": {
+            "min": min(startups) * 1000,
+            "median": statistics.median(startups) * 1000,
+            "max": max(startups) * 1000,
+        },
+        "interpreter_ms": statistics.median(interpreters) * 1000,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure server cold start")
+    parser.add_argument("--runs", type=int, default=5, help="server launches to time")
+    parser.add_argument(
+        "--max-ms", type=float, help="exit non-zero if the median exceeds this"
+    )
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(amain(args.runs))
+    pong = summary["first_pong_ms"]
+    print(
+        f"first pong ms:  min {pong['min']:.1f}  median {pong['median']:.1f}  "
+        f"max {pong['max']:.1f}  ({summary['runs']} runs)"
+    )
+    print(f"bare interpreter ms: {summary['interpreter_ms']:.1f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.max_ms is not None and pong["median"] > args.max_ms:
+        print(f"Median startup exceeds {args.max_ms:.0f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Deterministic benchmark corpus: HTML pages, plain text, JSON and model responses
+"""
+
+import json
+import random
+from typing import Dict, List
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+ADDRESSES = [
+    "123 Main Street, Springfield, IL 62701",
+    "10 Downing Street, London SW1A 2AA",
+    "12 rue de la Paix, 75002 Paris",
+    "Hauptstraße 456, 10115 Berlin",
+    "Calle Mayor 5, 28013 Madrid",
+    "456 Sunset Blvd, Los Angeles, CA 90028",
+]
+
+
+def make_page(paragraphs: int, seed: int = 0) -> str:
+    """Build a page with navigation, scripts, styles and address paragraphs"""
+    rng = random.Random(seed)
+    body = []
+    for i in range(paragraphs):
+        text = " ".join(rng.choice(WORDS) for _ in range(40))
+        if i % 10 == 0:
+            text += f" Visit {rng.randint(1, 999)} Main Street, Springfield, IL 62701."
+        body.append(f'<div class="row"><p class="c{i}">{text}</p></div>')
+        if i % 25 == 0:
+            body.append("<script>var data = " + "[1,2,3]," * 200 + "0;</script>")
+            body.append("<style>.c{i} { color: red; margin: 0 auto; }</style>")
+    return (
+        "<html><head><title>Store locator</title>"
+        '<link rel="stylesheet" href="site.css"><script src="app.js"></script></head>'
+        "<body><nav><a href='/'>Home</a> | <a href='/contact'>Contact</a></nav>"
+        + "".join(body)
+        + "</body></html>"
+    )
+
+
+def make_text(sentences: int, address_every: int = 0, seed: int = 0) -> str:
+    """Build prose, with an address every ``address_every`` sentences (0 for none)"""
+    rng = random.Random(seed)
+    parts = []
+    for i in range(sentences):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(15)).capitalize()
+        if address_every and i % address_every == 0:
+            sentence += f", see {rng.choice(ADDRESSES)}"
+        parts.append(sentence + ".")
+    return " ".join(parts)
+
+
+def make_json(records: int, seed: int = 0) -> str:
+    """Build a JSON export of contact records"""
+    rng = random.Random(seed)
+    rows = [
+        {
+            "id": i,
+            "name": " ".join(rng.choice(WORDS) for _ in range(2)).title(),
+            "notes": " ".join(rng.choice(WORDS) for _ in range(20)),
+            "address": rng.choice(ADDRESSES) if i % 3 == 0 else None,
+        }
+        for i in range(records)
+    ]
+    return json.dumps(rows, indent=2, ensure_ascii=False)
+
+
+def make_response(addresses: int, seed: int = 0) -> str:
+    """Build a model response listing one address per line"""
+    rng = random.Random(seed)
+    return "\n".join(
+        f"{rng.choice(['', '- ', '1. '])}{rng.choice(ADDRESSES)}"
+        for _ in range(addresses)
+    )
+
+
+def make_corpus(seed: int = 0) -> Dict[str, Dict[str, str]]:
+    """Return the benchmark documents, keyed by name, with their kind and file suffix"""
+    return {
+        "html_small": {"kind": "html", "suffix": ".html", "content": make_page(50, seed)},
+        "html_large": {"kind": "html", "suffix": ".html", "content": make_page(5000, seed)},
+        "text_dense": {
+            "kind": "text",
+            "suffix": ".txt",
+            "content": make_text(2000, address_every=3, seed=seed),
+        },
+        "text_free": {"kind": "text", "suffix": ".txt", "content": make_text(2000, seed=seed)},
+        "json": {"kind": "json", "suffix": ".json", "content": make_json(2000, seed)},
+    }
+
+
+def make_responses(seed: int = 0) -> Dict[str, str]:
+    """Return model responses of different sizes for the parsing stage"""
+    return {
+        "response_short": make_response(5, seed),
+        "response_long": make_response(500, seed),
+    }
+
+
+def document_names(corpus: Dict[str, Dict[str, str]], kind: str) -> List[str]:
+    return [name for name, doc in corpus.items() if doc["kind"] == kind]
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test against one long-running MCP server over stdio
+
+Starts the bundled stub backend, launches the server with Ollama and OpenAI
+pointed at it, and replays a JSONL request file at a controlled concurrency
+and arrival rate. Reports latency percentiles, throughput and error rate.
+With ``--workers`` the server runs that many worker processes behind a TCP
+port instead, to compare throughput by core count.
+
+Run with: python -m benchmarks.load_test --requests 500 --concurrency 16 --rate 50
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from .stub_backend import StubBackend
+
+DEFAULT_WORKLOAD = os.path.join(os.path.dirname(__file__), "workload.jsonl")
+
+# Generous limit for the server to start and answer its first ping
+STARTUP_TIMEOUT = 30.0
+
+
+@dataclass
+class LoadResult:
+    """Outcome of a load test run"""
+
+    latencies: List[float] = field(default_factory=list)
+    errors: Dict[str, int] = field(default_factory=dict)
+    sent: int = 0
+    duration: float = 0.0
+
+    @property
+    def completed(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def record_error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self) -> Dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "sent": self.sent,
+            "completed": self.completed,
+            "errors": self.error_count,
+            "error_rate": self.error_count / self.sent if self.sent else 0.0,
+            "error_kinds": dict(self.errors),
+            "duration_s": self.duration,
+            "throughput_rps": self.completed / self.duration if self.duration else 0.0,
+            "latency_ms": {
+                "p50": percentile(latencies, 50) * 1000,
+                "p95": percentile(latencies, 95) * 1000,
+                "p99": percentile(latencies, 99) * 1000,
+                "max": (latencies[-1] if latencies else 0.0) * 1000,
+            },
+        }
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * q // 100))
+    return sorted_values[int(rank) - 1]
+
+
+def load_workload(path: str) -> List[Dict[str, Any]]:
+    """Read one JSON request per line, skipping blank lines and # comments"""
+    requests = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                requests.append(json.loads(line))
+    if not requests:
+        raise ValueError(f"No requests in {path}")
+    return requests
+
+
+class ServerClient:
+    """Talks to an MCP server subprocess, matching responses to requests by id"""
+
+    def __init__(
+        self,
+        process: asyncio.subprocess.Process,
+        reader: Optional[asyncio.StreamReader] = None,
+        writer: Optional[asyncio.StreamWriter] = None,
+    ):
+        self.process = process
+        # Over stdio unless connected to the server's socket
+        self.reader = reader or process.stdout
+        self.writer = writer or process.stdin
+        self.ids = itertools.count(1)
+        self.pending: Dict[int, asyncio.Future] = {}
+        self._reader = asyncio.create_task(self._read_responses())
+
+    @classmethod
+    async def start(cls, env: Dict[str, str]) -> "ServerClient":
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "src.main",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=env,
+            limit=2**24,
+        )
+        return cls(process)
+
+    @classmethod
+    async def start_workers(cls, env: Dict[str, str], workers: int) -> "ServerClient":
+        """Start a server with ``workers`` worker processes on a free TCP port"""
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            port = probe.getsockname()[1]
+        process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "src.main",
+            "--transport",
+            "tcp",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            env=env,
+        )
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port, limit=2**24)
+                return cls(process, reader, writer)
+            except OSError:
+                if process.returncode is not None or time.monotonic() > deadline:
+                    process.kill()
+                    raise ConnectionError("server did not start listening")
+                await asyncio.sleep(0.05)
+
+    async def call(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[request_id] = future
+        line = json.dumps({**request, "id": request_id}) + "\n"
+        self.writer.write(line.encode("utf-8"))
+        await self.writer.drain()
+        return await future
+
+    async def _read_responses(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                # Log lines share stdout with the responses
+                continue
+            if not isinstance(message, dict) or "method" in message:
+                continue  # notifications
+            future = self.pending.pop(message.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("server exited"))
+
+    async def close(self):
+        if self.writer is not self.process.stdin:
+            self.writer.close()
+            self.process.terminate()
+        elif self.process.stdin and not self.process.stdin.is_closing():
+            self.process.stdin.close()
+        try:
+            await asyncio.wait_for(self.process.wait(), 10)
+        except asyncio.TimeoutError:
+            self.process.kill()
+            await self.process.wait()
+        await self._reader
+
+
+async def run_load(
+    client: ServerClient,
+    workload: List[Dict[str, Any]],
+    total: int,
+    concurrency: int,
+    rate: float = 0.0,
+    poisson: bool = False,
+    timeout: float = 60.0,
+    seed: int = 0,
+) -> LoadResult:
+    """Send ``total`` requests from ``workload`` in round-robin order
+
+    At most ``concurrency`` requests are in flight. With a ``rate`` (requests
+    per second) arrivals are paced, evenly or as a Poisson process; without
+    one each finished request is immediately replaced.
+    """
+    result = LoadResult()
+    slots = asyncio.Semaphore(concurrency)
+    rng = random.Random(seed)
+
+    async def one(request: Dict[str, Any]):
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(client.call(request), timeout)
+        except asyncio.TimeoutError:
+            result.record_error("timeout")
+        except ConnectionError:
+            result.record_error("disconnected")
+        else:
+            if "error" in response:
+                result.record_error(f"code {response.get('code')}")
+            else:
+                result.latencies.append(time.perf_counter() - start)
+        finally:
+            slots.release()
+
+    tasks = []
+    started = time.perf_counter()
+    next_arrival = started
+    for request in itertools.islice(itertools.cycle(workload), total):
+        if rate > 0:
+            next_arrival += rng.expovariate(rate) if poisson else 1 / rate
+            await asyncio.sleep(max(0.0, next_arrival - time.perf_counter()))
+        await slots.acquire()
+        result.sent += 1
+        tasks.append(asyncio.create_task(one(request)))
+
+    await asyncio.gather(*tasks)
+    result.duration = time.perf_counter() - started
+    return result
+
+
+def server_env(backend_url: str, cache: bool, extra: Optional[Dict[str, str]] = None):
+    """Environment pointing the server at the stub backend"""
+    env = dict(os.environ)
+    env.update(
+        {
+            "OLLAMA_BASE_URL": backend_url,
+            "OPENAI_API_KEY": "stub-key",
+            "OPENAI_BASE_URL": f"{backend_url}/v1",
+            # Identical replayed inputs would otherwise mostly measure the cache
+            "RESULT_CACHE_MAX_ENTRIES": "1024" if cache else "0",
+            "NEAR_DUPLICATE_MAX_ENTRIES": "10000" if cache else "0",
+            "RESULT_CACHE_PATH": "",
+            # Nor may worker processes share a temporary one
+            "RESULT_CACHE_MAX_DISK_ENTRIES": "100000" if cache else "0",
+        }
+    )
+    env.update(extra or {})
+    return env
+
+
+def print_summary(summary: Dict[str, Any]):
+    latency = summary["latency_ms"]
+    print(f"sent:        {summary['sent']}")
+    print(f"completed:   {summary['completed']}")
+    print(f"errors:      {summary['errors']} ({summary['error_rate']:.1%})")
+    for kind, count in summary["error_kinds"].items():
+        print(f"  {kind}: {count}")
+    print(f"duration:    {summary['duration_s']:.2f} s")
+    print(f"throughput:  {summary['throughput_rps']:.1f} req/s")
+    print(
+        f"latency ms:  p50 {latency['p50']:.1f}  p95 {latency['p95']:.1f}  "
+        f"p99 {latency['p99']:.1f}  max {latency['max']:.1f}"
+    )
+
+
+async def amain(args) -> Dict[str, Any]:
+    workload = load_workload(args.workload)
+    with StubBackend(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    ) as backend:
+        env = server_env(backend.url, args.cache)
+        if args.workers:
+            client = await ServerClient.start_workers(env, args.workers)
+        else:
+            client = await ServerClient.start(env)
+        try:
+            await asyncio.wait_for(client.call({"method": "ping"}), STARTUP_TIMEOUT)
+            result = await run_load(
+                client,
+                workload,
+                args.requests,
+                args.concurrency,
+                args.rate,
+                args.poisson,
+                args.timeout,
+                args.seed,
+            )
+        finally:
+            await client.close()
+
+    summary = result.summary()
+    summary["backend_requests"] = backend.requests
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test a running MCP server")
+    parser.add_argument("--workload", default=DEFAULT_WORKLOAD, help="JSONL request file")
+    parser.add_argument("--requests", type=int, default=200, help="total requests to send")
+    parser.add_argument("--concurrency", type=int, default=8, help="max requests in flight")
+    parser.add_argument("--rate", type=float, default=0.0, help="arrivals per second (0 = closed loop)")
+    parser.add_argument("--poisson", action="store_true", help="Poisson instead of even arrivals")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request timeout in seconds")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub backend latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="stub latency jitter (+/-)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="stub failure probability")
+    parser.add_argument("--cache", action="store_true", help="keep the in-memory result cache on")
+    parser.add_argument(
+        "--workers", type=int, default=0, help="server worker processes (0: one stdio server)"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(amain(args))
+    print_summary(summary)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0 if summary["completed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
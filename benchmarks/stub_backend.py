@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Local stub of the Ollama and OpenAI HTTP APIs for load testing
+
+Serves /api/version, /api/tags, /api/generate, /v1/models and
+/v1/chat/completions (streaming and non-streaming) with configurable latency.
+Responses list the addresses the local rules find in the prompt, so the
+server sees realistic output without any network access or model.
+
+Run standalone with: python -m benchmarks.stub_backend --port 11500 --latency-ms 200
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+from src.processors.address_patterns import find_addresses
+from src.providers.base_provider import DOCUMENT_HEADER, NO_ADDRESSES_FOUND
+
+STUB_MODELS = ["llama3.2:latest", "llama3.2:3b"]
+
+_DOCUMENT_SPLIT = re.compile(
+    "^" + re.escape(DOCUMENT_HEADER).replace(r"\{index\}", r"\d+") + "$", re.M
+)
+
+
+def answer_prompt(prompt: str) -> str:
+    """Answer an extraction prompt the way a well-behaved model would"""
+    if "DOCUMENTS:\n" in prompt:
+        body = prompt.split("DOCUMENTS:\n", 1)[1].rsplit("\n\nADDRESSES:", 1)[0]
+        documents = _DOCUMENT_SPLIT.split(body)[1:]
+        sections = []
+        for index, document in enumerate(documents, start=1):
+            addresses = find_addresses(document) or [NO_ADDRESSES_FOUND]
+            sections.append("\n".join([DOCUMENT_HEADER.format(index=index), *addresses]))
+        return "\n".join(sections)
+
+    text = prompt.split("TEXT TO ANALYZE:\n", 1)[-1].rsplit("\n\nADDRESSES:", 1)[0]
+    return "\n".join(find_addresses(text)) or NO_ADDRESSES_FOUND
+
+
+class StubBackend:
+    """Threaded HTTP stub with fixed latency, jitter and injected failures"""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 100.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StubBackend":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def _draw(self):
+        """Count a generation request and pick its delay and whether it fails"""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency_ms + self._random.uniform(-1, 1) * self.jitter_ms
+            fail = self._random.random() < self.error_rate
+        return max(0.0, delay) / 1000, fail
+
+    def _handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/api/version":
+                    self._send_json({"version": "0.0.0-stub"})
+                elif self.path == "/api/tags":
+                    self._send_json({"models": [{"name": name} for name in STUB_MODELS]})
+                elif self.path == "/v1/models":
+                    self._send_json(
+                        {"object": "list", "data": [{"id": "gpt-3.5-turbo", "object": "model"}]}
+                    )
+                else:
+                    self._send_json({"error": "not found"}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get("content-length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+
+                if self.path == "/api/generate":
+                    prompt = payload.get("prompt", "")
+                elif self.path == "/v1/chat/completions":
+                    messages = payload.get("messages") or [{}]
+                    prompt = messages[-1].get("content", "")
+                else:
+                    self._send_json({"error": "not found"}, 404)
+                    return
+
+                delay, fail = backend._draw()
+                if fail:
+                    time.sleep(delay)
+                    self._send_json({"error": "injected failure"}, 500)
+                    return
+
+                lines = answer_prompt(prompt).split("\n")
+                if payload.get("stream"):
+                    self._stream(lines, delay, payload.get("model", ""))
+                else:
+                    time.sleep(delay)
+                    self._send_json(self._completion("\n".join(lines), payload.get("model", "")))
+
+            def _completion(self, text: str, model: str):
+                if self.path == "/api/generate":
+                    return {"model": model, "response": text, "done": True}
+                return {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {"role": "assistant", "content": text},
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+
+            def _stream(self, lines: List[str], delay: float, model: str):
+                """Spread the latency over one chunk per output line"""
+                ollama = self.path == "/api/generate"
+                self.send_response(200)
+                self.send_header(
+                    "Content-Type", "application/x-ndjson" if ollama else "text/event-stream"
+                )
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+
+                for i, line in enumerate(lines):
+                    time.sleep(delay / len(lines))
+                    piece = line + ("\n" if i < len(lines) - 1 else "")
+                    if ollama:
+                        event = json.dumps({"model": model, "response": piece, "done": False}) + "\n"
+                    else:
+                        event = "data: " + json.dumps(
+                            {
+                                "id": "chatcmpl-stub",
+                                "object": "chat.completion.chunk",
+                                "created": int(time.time()),
+                                "model": model,
+                                "choices": [
+                                    {"index": 0, "delta": {"content": piece}, "finish_reason": None}
+                                ],
+                            }
+                        ) + "\n\n"
+                    self._write_chunk(event.encode("utf-8"))
+
+                end = (
+                    json.dumps({"model": model, "response": "", "done": True}) + "\n"
+                    if ollama
+                    else "data: [DONE]\n\n"
+                )
+                self._write_chunk(end.encode("utf-8"))
+                self._write_chunk(b"")
+
+            def _write_chunk(self, data: bytes):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def _send_json(self, data, status: int = 200):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stub Ollama/OpenAI backend")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--latency-ms", type=float, default=100.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    backend = StubBackend(
+        args.host, args.port, args.latency_ms, args.jitter_ms, args.error_rate
+    )
+    print(f"Stub backend listening on {backend.url}")
+    try:
+        backend.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        backend.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
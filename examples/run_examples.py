@@ -3,7 +3,9 @@
 Example script to test the MCP server
 """
 
+import argparse
 import json
+import socket
 import subprocess
 import sys
 from pathlib import Path
@@ -41,8 +43,28 @@ def run_example_request(request_data):
         print(f"Error running request: {e}")
         return None
 
+def run_socket_request(request_data, socket_path):
+    """Send a single request to a server already listening on a Unix socket"""
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(30)
+            sock.connect(socket_path)
+            sock.sendall((json.dumps(request_data) + '\n').encode('utf-8'))
+            with sock.makefile('r', encoding='utf-8') as responses:
+                return json.loads(responses.readline())
+    except Exception as e:
+        print(f"Error running request: {e}")
+        return None
+
 def main():
     """Run example requests"""
+    parser = argparse.ArgumentParser(description='Run the sample requests')
+    parser.add_argument(
+        '--socket',
+        help='send requests to a server started with --transport unix instead of '
+             'starting one per request'
+    )
+    args = parser.parse_args()
 
     # Load sample requests
     with open('examples/sample_requests.json', 'r') as f:
@@ -54,7 +76,10 @@ def main():
         print(f"📋 Running: {name}")
         print(f"Request: {json.dumps(request, indent=2)}")
 
-        response = run_example_request(request)
+        if args.socket:
+            response = run_socket_request(request, args.socket)
+        else:
+            response = run_example_request(request)
 
         if response:
             print(f"Response: {json.dumps(response, indent=2)}")
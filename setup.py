@@ -24,7 +24,7 @@ setup(
     install_requires=[
         "openai>=1.0.0",
         "requests>=2.25.0",
-        "beautifulsoup4>=4.9.0",
+        "httpx>=0.24.0",
         "lxml>=4.6.0",
         "python-dotenv>=0.19.0",
     ],
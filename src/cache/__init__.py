@@ -0,0 +1,8 @@
+"""
+Cache module
+"""
+
+from .near_duplicate import NearDuplicateIndex
+from .result_cache import ResultCache
+
+__all__ = ["NearDuplicateIndex", "ResultCache"]
@@ -0,0 +1,273 @@
+"""
+Near-duplicate document index for reusing extraction results
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from ..processors.address_patterns import CANDIDATE_PATTERN
+from ..processors.chunker import normalize_address
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+FINGERPRINT_BITS = 64
+
+# Words per shingle; three keeps word order without making one edit count much
+SHINGLE_WORDS = 3
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """64-bit SimHash of the word shingles of ``text``
+
+    Documents sharing most of their shingles get fingerprints a small Hamming
+    distance apart, however long they are.
+    """
+    tokens = _TOKEN_PATTERN.findall(text.lower())
+    if len(tokens) < SHINGLE_WORDS:
+        shingles = [" ".join(tokens)]
+    else:
+        shingles = [
+            " ".join(tokens[i : i + SHINGLE_WORDS])
+            for i in range(len(tokens) - SHINGLE_WORDS + 1)
+        ]
+
+    # Count set bits per position by transposing the binary strings, which
+    # keeps the per-bit loop in C
+    bits = [
+        format(
+            int.from_bytes(
+                hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big"
+            ),
+            "064b",
+        )
+        for shingle in shingles
+    ]
+    half = len(bits) / 2
+    fingerprint = 0
+    for column in zip(*bits):
+        fingerprint = (fingerprint << 1) | (column.count("1") > half)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def address_markers(text: str) -> FrozenSet[str]:
+    """Normalized address markers (numbers, postcodes, street and place names) in text"""
+    return frozenset(
+        normalize_address(match.group(0)) for match in CANDIDATE_PATTERN.finditer(text)
+    )
+
+
+@dataclass
+class NearDuplicateMatch:
+    """Addresses reused from an earlier, near-identical document"""
+
+    addresses: List[str]
+    provider: str
+    distance: int
+
+
+@dataclass
+class _Entry:
+    scope: str
+    fingerprint: int
+    markers: FrozenSet[str]
+    addresses: List[str]
+    provider: str
+
+
+class NearDuplicateIndex:
+    """Finds earlier documents whose text nearly matches a new one
+
+    Fingerprints are split into ``max_distance + 1`` bands and indexed by
+    band, so any fingerprint within ``max_distance`` bits shares at least one
+    band with the query. Results are scoped (e.g. by requested provider and
+    model) and bounded to ``max_entries``, least recently used first out.
+
+    A near match is only reused after a cheap re-verification: every stored
+    address must appear in the new text, and the new text may not contain
+    address markers the old one lacked. Template pages differing in ads or
+    timestamps pass; the same template listing another store does not.
+
+    Fingerprinting takes a few milliseconds per document, so the async
+    methods run it in a worker thread; the index itself is guarded by a lock.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_distance: int = 6, min_chars: int = 500):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.min_chars = min_chars
+        self.bands = max_distance + 1
+        self.band_bits = FINGERPRINT_BITS // self.bands
+        self._entries: "OrderedDict[int, _Entry]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.rejected = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def accepts(self, text: str) -> bool:
+        """Whether a document is long enough for a stable fingerprint"""
+        return self.max_entries > 0 and len(text) >= self.min_chars
+
+    def lookup(self, text: str, scope: str) -> Optional[NearDuplicateMatch]:
+        """Find a verified near duplicate of ``text`` within ``scope``"""
+        if not self.accepts(text):
+            return None
+        with metrics.timer(stage="near_duplicate"):
+            fingerprint = simhash(text)
+            with self._lock:
+                near = self._near(scope, fingerprint)
+            if not near:
+                self._count("miss")
+                return None
+
+            markers = address_markers(text)
+            normalized = f" {normalize_address(text)} "
+            for distance, entry_id, entry in near:
+                if self._verify(entry, markers, normalized):
+                    with self._lock:
+                        if entry_id in self._entries:
+                            self._entries.move_to_end(entry_id)
+                    self._count("hit")
+                    return NearDuplicateMatch(list(entry.addresses), entry.provider, distance)
+
+        logger.info("Near-duplicate document found, but its addresses did not verify")
+        self._count("rejected")
+        return None
+
+    def add(self, text: str, scope: str, addresses: List[str], provider: str):
+        if not self.accepts(text):
+            return
+        entry = _Entry(scope, simhash(text), address_markers(text), list(addresses), provider)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = entry
+            for key in self._band_keys(scope, entry.fingerprint):
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def split_repeats(self, texts: List[str]) -> Tuple[List[int], List[int]]:
+        """Split documents into the first of each near-identical group and the rest
+
+        Returns ``(first, repeats)`` as indices into ``texts``. Extracting the
+        first documents and indexing them lets the repeats be looked up
+        instead of extracted. Documents too short to fingerprint are firsts.
+        """
+        first: List[int] = []
+        repeats: List[int] = []
+        fingerprints: List[int] = []
+        for i, text in enumerate(texts):
+            if not self.accepts(text):
+                first.append(i)
+                continue
+            fingerprint = simhash(text)
+            if any(
+                hamming_distance(fingerprint, seen) <= self.max_distance
+                for seen in fingerprints
+            ):
+                repeats.append(i)
+            else:
+                first.append(i)
+                fingerprints.append(fingerprint)
+        return first, repeats
+
+    async def alookup(self, text: str, scope: str) -> Optional[NearDuplicateMatch]:
+        """Find a verified near duplicate, fingerprinting in a worker thread"""
+        if not self.accepts(text):
+            return None
+        return await asyncio.to_thread(self.lookup, text, scope)
+
+    async def asplit_repeats(self, texts: List[str]) -> Tuple[List[int], List[int]]:
+        """``split_repeats`` in a worker thread"""
+        return await asyncio.to_thread(self.split_repeats, texts)
+
+    async def aadd(self, text: str, scope: str, addresses: List[str], provider: str):
+        """Index a document's addresses, fingerprinting in a worker thread"""
+        if self.accepts(text):
+            await asyncio.to_thread(self.add, text, scope, addresses, provider)
+
+    @staticmethod
+    def _verify(entry: _Entry, markers: FrozenSet[str], normalized: str) -> bool:
+        if not markers <= entry.markers:
+            return False
+        return all(
+            f" {normalize_address(address)} " in normalized for address in entry.addresses
+        )
+
+    def _band_keys(self, scope: str, fingerprint: int) -> List[Tuple[str, int, int]]:
+        mask = (1 << self.band_bits) - 1
+        return [
+            (scope, band, (fingerprint >> (band * self.band_bits)) & mask)
+            for band in range(self.bands)
+        ]
+
+    def _near(self, scope: str, fingerprint: int) -> List[Tuple[int, int, _Entry]]:
+        """Entries within ``max_distance`` bits, closest first"""
+        entry_ids: Set[int] = set()
+        for key in self._band_keys(scope, fingerprint):
+            entry_ids |= self._buckets.get(key, set())
+
+        near = []
+        for entry_id in entry_ids:
+            entry = self._entries[entry_id]
+            distance = hamming_distance(fingerprint, entry.fingerprint)
+            if distance <= self.max_distance:
+                near.append((distance, entry_id, entry))
+        near.sort(key=lambda item: item[:2])
+        return near
+
+    def _evict(self):
+        entry_id, entry = self._entries.popitem(last=False)
+        for key in self._band_keys(entry.scope, entry.fingerprint):
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+        self.evictions += 1
+
+    def _count(self, outcome: str):
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "rejected":
+                self.rejected += 1
+            else:
+                self.misses += 1
+        metrics.inc("near_duplicate_lookups_total", outcome=outcome)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.rejected + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "rejected": self.rejected,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
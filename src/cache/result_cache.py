@@ -0,0 +1,240 @@
+"""
+Content-addressed cache for address extraction results
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+CACHE_MODES = ("use", "bypass", "refresh")
+
+
+class MemoryLRU:
+    """Bounded in-memory LRU with per-entry expiry
+
+    Values are stored as tuples and returned as new lists, so callers may
+    change a result without changing the cached entry.
+    """
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[List[str]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            return None
+        self._entries.move_to_end(key)
+        return list(value)
+
+    def set(self, key: str, value: List[str]):
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, tuple(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+
+class SQLiteTier:
+    """Persistent cache tier shared by every server process on the host
+
+    The entry count is counted once on open and after each prune, and
+    estimated from this process's writes in between, so reporting it never
+    scans the table on the caller's thread.
+    """
+
+    # Run size eviction once every this many writes
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int, ttl: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        # WAL lets readers in other processes proceed while one process writes
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, addresses TEXT NOT NULL, "
+            "created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_created_at ON results (created_at)"
+        )
+        self._conn.commit()
+        self._entries = self._count_entries()
+
+    def __len__(self) -> int:
+        return self._entries
+
+    def _count_entries(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def get(self, key: str) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT addresses FROM results WHERE key = ? AND expires_at >= ?",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, key: str, value: List[str]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now + self.ttl),
+            )
+            self._conn.commit()
+            self._writes += 1
+            # Overwrites make this an overestimate until the next prune recounts
+            self._entries += 1
+            if self._writes % self.PRUNE_EVERY == 0:
+                self._prune(now)
+
+    def _prune(self, now: float):
+        expired = self._conn.execute(
+            "DELETE FROM results WHERE expires_at < ?", (now,)
+        ).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM results WHERE key IN (SELECT key FROM results "
+            "ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        ).rowcount
+        self._conn.commit()
+        self.evictions += expired + overflow
+        self._entries = self._count_entries()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._entries = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ResultCache:
+    """Two-tier cache of extraction results keyed by content, provider and model
+
+    Lookups go to the in-memory LRU first and then to the optional SQLite
+    tier, promoting disk hits into memory. Writes go to both tiers.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 86400,
+        path: Optional[str] = None,
+        max_disk_entries: int = 100000,
+    ):
+        self.memory = MemoryLRU(max_entries, ttl)
+        self.disk = SQLiteTier(path, max_disk_entries, ttl) if path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if self.disk is not None:
+            logger.info(f"Result cache persisted to {path}")
+
+    @staticmethod
+    def make_key(
+        content: str, provider: str, model: Optional[str], prompt_version: str
+    ) -> str:
+        """Hash the inputs that determine an extraction result"""
+        digest = hashlib.sha256()
+        for part in (prompt_version, provider, model or "", content):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[str]]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = self.disk.get(key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        self._count(value)
+        return value
+
+    def set(self, key: str, addresses: List[str]):
+        self.memory.set(key, addresses)
+        if self.disk is not None:
+            self.disk.set(key, addresses)
+
+    async def aget(self, key: str) -> Optional[List[str]]:
+        """Look up a result, querying the SQLite tier in a worker thread"""
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.disk_hits += 1
+                self.memory.set(key, value)
+        self._count(value)
+        return value
+
+    async def aset(self, key: str, addresses: List[str]):
+        """Store a result, writing the SQLite tier in a worker thread"""
+        self.memory.set(key, addresses)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, list(addresses))
+
+    def _count(self, value: Optional[List[str]]):
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_evictions": self.memory.evictions,
+        }
+        if self.disk is not None:
+            stats["disk_entries"] = len(self.disk)
+            stats["disk_evictions"] = self.disk.evictions
+        return stats
+
+    def clear(self):
+        self.memory.clear()
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
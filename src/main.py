@@ -3,7 +3,9 @@
 Main entry point for Address Identification MCP Server
 """
 
+import argparse
 import asyncio
+from typing import List, Optional
 
 from src.server.mcp_server import MCPServer
 from src.utils.config import Config
@@ -11,10 +13,42 @@ from src.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+TRANSPORTS = ("stdio", "unix", "tcp")
 
-def main():
+
+def parse_args(server_config, argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Address identification MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=TRANSPORTS,
+        default=server_config["transport"],
+        help="stdio serves the client that started the server; unix and tcp serve "
+        "any number of clients from one process",
+    )
+    parser.add_argument(
+        "--socket", default=server_config["socket_path"], help="Unix socket path"
+    )
+    parser.add_argument("--host", default=server_config["host"], help="TCP host")
+    parser.add_argument(
+        "--port", type=int, default=server_config["port"], help="TCP port (0: any free port)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=server_config["workers"],
+        help="worker processes sharing the unix or tcp socket, e.g. one per core "
+        "(0: serve in this process)",
+    )
+    args = parser.parse_args(argv)
+    if args.workers and args.transport == "stdio":
+        parser.error("--workers needs --transport unix or tcp")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point"""
     config = Config()
+    args = parse_args(config.server_config, argv)
 
     # Log available providers
     logger.info(f"OpenAI available: {config.has_openai}")
@@ -23,10 +57,36 @@ def main():
     if not config.has_openai:
         logger.info("No OpenAI API key found. Using Ollama only.")
 
+    if args.workers:
+        from src.server.socket_transport import serve_socket
+        from src.server.supervisor import Supervisor
+
+        path = args.socket if args.transport == "unix" else None
+        try:
+            asyncio.run(
+                serve_socket(
+                    Supervisor(config, args.workers),
+                    path,
+                    args.host,
+                    args.port,
+                    config.server_config["max_line_bytes"],
+                    max_pending=config.server_config["max_pending_requests"],
+                    allow_remote=config.server_config["allow_remote"],
+                )
+            )
+        except KeyboardInterrupt:
+            logger.info("Server stopped")
+        return
+
     server = MCPServer(config)
 
     try:
-        asyncio.run(server.run())
+        if args.transport == "unix":
+            asyncio.run(server.run_socket(path=args.socket))
+        elif args.transport == "tcp":
+            asyncio.run(server.run_socket(host=args.host, port=args.port))
+        else:
+            asyncio.run(server.run())
     except KeyboardInterrupt:
         logger.info("Server stopped")
 
@@ -0,0 +1,207 @@
+"""
+Precompiled address patterns and small gazetteers
+
+Everything here is compiled once at import time so that scanning a document is
+a single regex pass over the text.
+"""
+
+import re
+from typing import List
+
+# Street suffixes written as a separate word after the street name (US/UK)
+STREET_SUFFIXES = [
+    "Street", "St", "Avenue", "Ave", "Av", "Road", "Rd", "Boulevard", "Blvd",
+    "Drive", "Dr", "Lane", "Ln", "Way", "Court", "Ct", "Place", "Pl", "Terrace",
+    "Ter", "Close", "Crescent", "Cres", "Square", "Sq", "Highway", "Hwy",
+    "Parkway", "Pkwy", "Circle", "Cir", "Row", "Mews", "Gardens", "Grove",
+    "Walk", "Trail", "Trl", "Pike", "Alley", "Plaza", "Broadway", "Hill",
+    "Park", "Green", "Parade", "Esplanade", "Expressway", "Freeway",
+]
+
+# Street words that come before the street name (FR/ES/IT/PT)
+STREET_PREFIXES = [
+    "Rue", "Avenue", "Boulevard", "Chemin", "Allée", "Impasse", "Quai", "Place",
+    "Calle", "Avenida", "Plaza", "Paseo", "Carrera", "Camino", "Via", "Viale",
+    "Piazza", "Corso", "Largo", "Rua", "Travessa", "Praça",
+]
+
+# Street words glued to the end of the street name (DE/NL/Nordic)
+STREET_COMPOUND_SUFFIXES = [
+    "straße", "strasse", "str.", "weg", "gasse", "platz", "allee", "ring",
+    "damm", "ufer", "chaussee", "straat", "laan", "plein", "gracht", "kade",
+    "singel", "vej", "gade", "gatan", "vägen", "veien",
+]
+
+# Lowercase particles allowed inside street names ("Rue de la Paix")
+NAME_PARTICLES = [
+    "de", "del", "della", "des", "du", "la", "le", "los", "las", "di", "da",
+    "do", "dos", "van", "von", "der", "den",
+]
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas",
+    "CA": "California", "CO": "Colorado", "CT": "Connecticut", "DE": "Delaware",
+    "FL": "Florida", "GA": "Georgia", "HI": "Hawaii", "ID": "Idaho",
+    "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
+    "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland",
+    "MA": "Massachusetts", "MI": "Michigan", "MN": "Minnesota",
+    "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska",
+    "NV": "Nevada", "NH": "New Hampshire", "NJ": "New Jersey",
+    "NM": "New Mexico", "NY": "New York", "NC": "North Carolina",
+    "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon",
+    "PA": "Pennsylvania", "RI": "Rhode Island", "SC": "South Carolina",
+    "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas", "UT": "Utah",
+    "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming", "DC": "District of Columbia",
+}
+
+COUNTRIES = [
+    "USA", "United States", "United Kingdom", "UK", "England", "Scotland",
+    "Wales", "Ireland", "Germany", "Deutschland", "France", "Spain", "España",
+    "Italy", "Italia", "Netherlands", "Nederland", "Belgium", "België",
+    "Belgique", "Austria", "Österreich", "Switzerland", "Schweiz", "Suisse",
+    "Portugal", "Denmark", "Danmark", "Sweden", "Sverige", "Norway", "Norge",
+    "Poland", "Polska", "Canada", "Australia", "Luxembourg",
+]
+
+# Large cities, named in addresses that lack other markers
+CITIES = [
+    "New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia",
+    "San Francisco", "Seattle", "Boston", "Miami", "Atlanta", "Toronto",
+    "Montreal", "Vancouver", "London", "Manchester", "Birmingham", "Edinburgh",
+    "Glasgow", "Dublin", "Paris", "Lyon", "Marseille", "Berlin", "Hamburg",
+    "München", "Munich", "Köln", "Cologne", "Frankfurt", "Stuttgart", "Madrid",
+    "Barcelona", "Rome", "Roma", "Milan", "Milano", "Amsterdam", "Rotterdam",
+    "Brussels", "Bruxelles", "Vienna", "Wien", "Zürich", "Zurich", "Geneva",
+    "Genève", "Lisbon", "Lisboa", "Copenhagen", "København", "Stockholm", "Oslo",
+    "Warsaw", "Warszawa", "Sydney", "Melbourne", "Tokyo", "Beijing", "Shanghai",
+    "Seoul", "Dubai", "Mumbai", "Delhi", "Singapore", "Hong Kong",
+]
+
+# Address words in scripts the street patterns do not cover: Japanese postal
+# mark and block numbers, Chinese and Japanese road/district/city words,
+# Korean road numbers, Arabic street/road/district/PO box
+NON_LATIN_MARKERS = [
+    "〒", "丁目", "番地", "号楼", "号", "路", "街道", "大道", "区", "市", "県", "省",
+    "로", "길", "شارع", "طريق", "حي", "ص.ب",
+]
+
+POSTCODE = (
+    r"(?:\d{5}(?:-\d{4})?"  # US ZIP, DE/FR/ES/IT
+    r"|[A-Z]{1,2}\d[A-Z\d]?\s?\d[A-Z]{2}"  # UK
+    r"|\d{4}\s?[A-Z]{2}"  # NL
+    r"|\d{4})"  # AT/BE/CH/DK
+)
+
+_UPPER = r"A-ZÀ-ÖØ-Þ"
+_WORD = r"[\w'’.-]"
+_NAME_WORD = rf"(?:[{_UPPER}0-9]{_WORD}*)"
+_ALPHA_NAME_WORD = rf"(?:[{_UPPER}]{_WORD}*)"
+_PARTICLE = rf"(?:{'|'.join(NAME_PARTICLES)})"
+_PLACE_WORD = rf"(?:[{_UPPER}][^\W\d_]*(?:['’-][^\W\d_]+)*(?!\w))"
+_PLACE = rf"(?:{_PLACE_WORD}(?:\s+{_PLACE_WORD}){{0,2}})"
+_NUMBER = r"(?:\d{1,6}[A-Za-z]?(?:[-/]\d{1,4}[A-Za-z]?)?)"
+_DIRECTION = r"(?:\s+(?:N|S|E|W|NE|NW|SE|SW)\b)"
+_UNIT = r"(?:,?\s*(?:Apt|Apartment|Suite|Ste|Unit|Floor|Fl|Room|Rm|#)\.?\s*[\w-]+)"
+_TAIL_SEGMENT = (
+    rf"(?:,\s*(?:{POSTCODE}\s+)?{_PLACE}(?:\s+{POSTCODE})?"
+    rf"|,?\s+{POSTCODE}(?:\s+{_PLACE})?)"
+)
+_TAIL = rf"(?:{_TAIL_SEGMENT}){{0,3}}"
+
+_suffixes = "|".join(re.escape(s) for s in STREET_SUFFIXES)
+_prefixes = "|".join(re.escape(s) for s in STREET_PREFIXES)
+_compound = "|".join(re.escape(s) for s in STREET_COMPOUND_SUFFIXES)
+_states = "|".join(US_STATES)
+
+# Alternatives are ordered from most to least specific
+ADDRESS_PATTERN = re.compile(
+    "|".join(
+        [
+            # 123 Main Street, Springfield, IL 62701
+            rf"\b{_NUMBER}\s+(?:{_NAME_WORD}\s+){{0,4}}(?i:{_suffixes})\b\.?{_DIRECTION}?{_UNIT}?{_TAIL}",
+            # 456 Broadway, Manhattan, NY 10013 (no suffix, so state and ZIP required)
+            rf"\b{_NUMBER}\s+(?:{_NAME_WORD}\s*){{1,3}},\s*{_PLACE},\s*(?:{_states})\s+\d{{5}}(?:-\d{{4}})?",
+            # 12 rue de la Paix, 75002 Paris / 123 Calle Principal, Madrid
+            rf"\b{_NUMBER},?\s+(?i:{_prefixes})\s+(?:(?:{_PARTICLE}|{_ALPHA_NAME_WORD})\s+){{0,3}}{_ALPHA_NAME_WORD}{_TAIL}",
+            # Calle Mayor 5, 28013 Madrid / Via Roma 10
+            rf"\b(?i:{_prefixes})\s+(?:(?:{_PARTICLE}|{_ALPHA_NAME_WORD})\s+){{0,3}}{_ALPHA_NAME_WORD},?\s+{_NUMBER}\b{_TAIL}",
+            # Hauptstraße 456, 10115 Berlin / Keizersgracht 123
+            rf"\b(?:[{_UPPER}]\w*\s+)?[{_UPPER}]\w*(?i:{_compound})\s*{_NUMBER}\b{_TAIL}",
+            # Berliner Straße 5 / Am Alten Weg 3
+            rf"\b(?:[{_UPPER}]\w*\s+){{1,2}}(?i:{_compound})\s+{_NUMBER}\b{_TAIL}",
+        ]
+    )
+)
+
+POSTCODE_PATTERN = re.compile(rf"\b{POSTCODE}\b")
+PLACE_NAME_PATTERN = re.compile(
+    r"\b(?:"
+    + "|".join(re.escape(name) for name in [*US_STATES.values(), *COUNTRIES])
+    + rf"|(?:{_states})(?=\s+\d{{5}}))\b"
+)
+
+# Recall-oriented markers of text near an address, for picking out the parts
+# of a document worth sending to a model. Matches need not be addresses.
+_candidate_first = "".join(sorted({marker[0] for marker in NON_LATIN_MARKERS}))
+
+CANDIDATE_PATTERN = re.compile(
+    # Every alternative starts with a digit, a capital or a marker character;
+    # checking that first lets the scan skip most positions cheaply
+    rf"(?=[\d{_UPPER}{re.escape(_candidate_first)}])(?:"
+    + "|".join(
+        [
+            # House number within a few words of a street suffix: 123 Main St
+            rf"\b\d{{1,6}}[A-Za-z]?\s+(?:{_NAME_WORD}\s+){{0,4}}(?:{_suffixes})\b",
+            # Street words before the name, capitalized or after a number
+            rf"\b(?:{_prefixes})\s+(?:{_PARTICLE}\s+)*[{_UPPER}]",
+            rf"\b\d{{1,6}},?\s+(?i:{_prefixes})\b",
+            # Compound street names: Hauptstraße 5, Am Alten Weg 3
+            rf"\b[{_UPPER}]\w*(?i:{_compound})\s*\d",
+            rf"\b(?:{'|'.join(re.escape(s.capitalize()) for s in STREET_COMPOUND_SUFFIXES)})\s+\d",
+            # Postcodes: US ZIP and 5-digit EU, UK, NL, 4-digit before a place name
+            r"\b\d{5}(?:-\d{4})?\b",
+            r"\b[A-Z]{1,2}\d[A-Z\d]?\s?\d[A-Z]{2}\b",
+            r"\b\d{4}\s?[A-Z]{2}\b",
+            rf"\b\d{{4}}\s+{_PLACE_WORD}",
+            # Unit and PO box markers
+            r"\b(?:Apt|Suite|Ste|Unit|P\.?\s?O\.?\s?Box|Postfach)\b\.?\s*#?\d",
+            # Country, state and city names
+            r"\b(?:"
+            + "|".join(re.escape(name) for name in [*COUNTRIES, *US_STATES.values(), *CITIES])
+            + r")\b",
+            "|".join(re.escape(marker) for marker in NON_LATIN_MARKERS),
+        ]
+    )
+    + ")"
+)
+
+# Scripts the rule engine does not understand, e.g. CJK, Arabic, Devanagari
+UNSUPPORTED_SCRIPT_PATTERN = re.compile(
+    "[\u0600-\u06ff\u0900-\u097f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]"
+)
+
+_TRAILING_PUNCTUATION = " \t\n,;:.-"
+
+
+def find_addresses(text: str) -> List[str]:
+    """Find address-like spans in text, in order of appearance"""
+    addresses = []
+    seen = set()
+    for match in ADDRESS_PATTERN.finditer(text):
+        address = " ".join(match.group(0).split()).strip(_TRAILING_PUNCTUATION)
+        key = address.lower()
+        if address and key not in seen:
+            seen.add(key)
+            addresses.append(address)
+    return addresses
+
+
+def score_address(address: str) -> float:
+    """Score how certain we are that a matched span is a complete address"""
+    score = 0.5
+    if POSTCODE_PATTERN.search(address):
+        score += 0.3
+    if "," in address or PLACE_NAME_PATTERN.search(address):
+        score += 0.2
+    return min(score, 1.0)
@@ -0,0 +1,65 @@
+"""
+Selecting the parts of a document that may contain addresses
+"""
+
+from typing import List, Tuple
+
+from .address_patterns import CANDIDATE_PATTERN
+
+# Placed between windows so the model does not read them as one passage
+WINDOW_SEPARATOR = "\n...\n"
+
+# How far a window edge may move to avoid cutting a word in half
+_SNAP_LIMIT = 20
+
+
+def find_candidate_windows(text: str, context: int = 200) -> List[Tuple[int, int]]:
+    """Spans of ``text`` around candidate address markers, merged where they meet
+
+    Each marker is widened by ``context`` characters on both sides, so a
+    postcode brings in the street before it and a street number the city
+    after it. Overlapping or adjacent windows are merged.
+    """
+    windows: List[Tuple[int, int]] = []
+    for match in CANDIDATE_PATTERN.finditer(text):
+        start = _snap_start(text, max(0, match.start() - context))
+        end = _snap_end(text, min(len(text), match.end() + context))
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+        else:
+            windows.append((start, end))
+    return windows
+
+
+def select_candidate_text(
+    text: str, context: int = 200, max_coverage: float = 0.8
+) -> str:
+    """Reduce a document to its candidate windows for an extraction prompt
+
+    Returns an empty string when nothing in the document looks like part of
+    an address, and the whole document when the windows would cover more
+    than ``max_coverage`` of it anyway.
+    """
+    windows = find_candidate_windows(text, context)
+    if not windows:
+        return ""
+    covered = sum(end - start for start, end in windows)
+    if covered >= max_coverage * len(text):
+        return text
+    return WINDOW_SEPARATOR.join(text[start:end].strip() for start, end in windows)
+
+
+def _snap_start(text: str, index: int) -> int:
+    """Move a window start back to the beginning of its word"""
+    limit = max(0, index - _SNAP_LIMIT)
+    while index > limit and not text[index - 1].isspace():
+        index -= 1
+    return index
+
+
+def _snap_end(text: str, index: int) -> int:
+    """Move a window end forward to the end of its word"""
+    limit = min(len(text), index + _SNAP_LIMIT)
+    while index < limit and not text[index].isspace():
+        index += 1
+    return index
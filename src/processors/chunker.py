@@ -0,0 +1,107 @@
+"""
+Splitting long documents into overlapping chunks and merging chunk results
+"""
+
+import re
+from typing import Iterable, List
+
+# Preferred break points, strongest first
+_BOUNDARIES = ("\n\n", "\n", ". ", "; ", ", ", " ")
+
+# Only look for a break point in the last part of a chunk
+_BOUNDARY_WINDOW = 0.25
+
+_NORMALIZE_PATTERN = re.compile(r"[\W_]+")
+
+
+def split_into_chunks(text: str, chunk_size: int, overlap: int = 0) -> List[str]:
+    """Split text into chunks of at most ``chunk_size`` characters
+
+    Chunks end at the strongest boundary (paragraph, line, sentence, clause,
+    word) found near the size limit, and each chunk repeats the last
+    ``overlap`` characters of the previous one so an address spanning a
+    boundary appears whole in at least one chunk.
+    """
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    overlap = max(0, min(overlap, chunk_size // 2))
+
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            end = _find_boundary(text, start, end)
+        chunks.append(text[start:end])
+
+        if end >= len(text):
+            break
+        next_start = _snap_to_word(text, max(end - overlap, start + 1))
+        start = next_start if next_start < end else end
+    return chunks
+
+
+def _find_boundary(text: str, start: int, end: int) -> int:
+    window_start = end - int((end - start) * _BOUNDARY_WINDOW)
+    for boundary in _BOUNDARIES:
+        index = text.rfind(boundary, window_start, end)
+        if index != -1:
+            return index + len(boundary)
+    return end
+
+
+def _snap_to_word(text: str, index: int) -> int:
+    """Move an overlap start forward to the beginning of the next word"""
+    while index < len(text) and not text[index - 1].isspace():
+        index += 1
+    return index
+
+
+def normalize_address(address: str) -> str:
+    """Normalize an address for duplicate detection"""
+    return _NORMALIZE_PATTERN.sub(" ", address.lower()).strip()
+
+
+def merge_addresses(results: Iterable[List[str]]) -> List[str]:
+    """Merge per-chunk address lists, dropping duplicates and partial copies
+
+    An address whose normalized form is contained in a longer address (as
+    happens when an overlap cuts it short) is dropped in favour of the longer.
+    """
+    merged = []
+    normalized = []
+    for addresses in results:
+        for address in addresses:
+            # Pad with spaces so containment only matches whole words
+            key = f" {normalize_address(address)} "
+            if not key.strip() or any(key in existing for existing in normalized):
+                continue
+            # Replace shorter partial copies already collected
+            keep = [i for i, existing in enumerate(normalized) if existing not in key]
+            merged = [merged[i] for i in keep]
+            normalized = [normalized[i] for i in keep]
+            merged.append(address)
+            normalized.append(key)
+    return merged
+
+
+def pack_documents(
+    lengths: List[int], budget: int, max_documents: int
+) -> List[List[int]]:
+    """Group document indices so each group's total length fits ``budget``
+
+    Documents are packed greedily in order. A document longer than the budget
+    gets a group of its own.
+    """
+    groups: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for index, length in enumerate(lengths):
+        if current and (used + length > budget or len(current) >= max_documents):
+            groups.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += length
+    if current:
+        groups.append(current)
+    return groups
@@ -0,0 +1,213 @@
+"""
+Worker pool for cleaning large HTML documents off the GIL
+"""
+
+import asyncio
+import codecs
+import threading
+import time
+from concurrent.futures import BrokenExecutor, Executor, Future
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import STAGE_SECONDS, metrics
+from .html_extractor import FEED_SIZE, HTMLTextExtractor
+
+logger = setup_logger(__name__)
+
+# Modules every worker needs, imported once by the fork server
+_PRELOAD = [__name__]
+
+
+def decode_body(body: bytes, encoding: str) -> str:
+    """Decode a response body, falling back to UTF-8 for unknown encodings"""
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        encoding = "utf-8"
+    return body.decode(encoding, errors="replace")
+
+
+def clean_document(
+    html: Union[str, bytes],
+    max_length: Optional[int] = None,
+    encoding: str = "utf-8",
+    collect_links: bool = False,
+) -> Tuple[str, List[str], float]:
+    """Extract the text (and optionally links) of an HTML document
+
+    Returns ``(text, links, seconds spent)``. Runs in pool workers, so it
+    takes and returns only picklable values and records no metrics itself.
+    """
+    start = time.perf_counter()
+    if isinstance(html, bytes):
+        html = decode_body(html, encoding)
+    extractor = HTMLTextExtractor(max_length, collect_links=collect_links)
+    for offset in range(0, len(html), FEED_SIZE):
+        if extractor.feed(html[offset : offset + FEED_SIZE]):
+            break
+    text = extractor.close()
+    return text, extractor.links, time.perf_counter() - start
+
+
+def _mp_context():
+    import multiprocessing
+
+    # Forking a process with live threads can copy held locks into the child,
+    # so workers come from a fork server (or are spawned where there is none)
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload(_PRELOAD)
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+class CleaningPool:
+    """Runs HTML cleaning inline or in worker processes, by document size
+
+    Documents shorter than ``min_chars`` are cleaned in the calling thread
+    (or a worker thread for async callers): they take a few milliseconds,
+    less than sending them to another process. Longer ones go to a pool of
+    ``workers`` processes, so parsing several large pages at once uses
+    several cores instead of contending for the GIL. ``workers=0`` cleans
+    everything in threads.
+
+    Processes are started on the first large document, not at server
+    startup. If the pool breaks, the document is cleaned inline and a new
+    pool is started for the next one.
+    """
+
+    def __init__(self, workers: int = 2, min_chars: int = 131072):
+        self.workers = workers
+        self.min_chars = min_chars
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    def uses_pool(self, size: int) -> bool:
+        """Whether a document of ``size`` characters (or bytes) goes to the pool"""
+        return self.enabled and size >= self.min_chars
+
+    def clean(
+        self,
+        html: Union[str, bytes],
+        max_length: Optional[int] = None,
+        encoding: str = "utf-8",
+        collect_links: bool = False,
+    ) -> Tuple[str, List[str]]:
+        """Clean a document, blocking until done; returns (text, links)"""
+        args = (html, max_length, encoding, collect_links)
+        if not self.uses_pool(len(html)):
+            return self._inline(args)
+
+        queued = self._submit(args)
+        if queued is None:
+            return self._inline(args, mode="fallback")
+        future, submitted = queued
+        try:
+            result = future.result()
+        except BrokenExecutor as e:
+            self._broken(e)
+            return self._inline(args, mode="fallback")
+        return self._record(result, submitted)
+
+    async def aclean(
+        self,
+        html: Union[str, bytes],
+        max_length: Optional[int] = None,
+        encoding: str = "utf-8",
+        collect_links: bool = False,
+    ) -> Tuple[str, List[str]]:
+        """Clean a document without blocking the event loop; returns (text, links)"""
+        args = (html, max_length, encoding, collect_links)
+        if not self.uses_pool(len(html)):
+            return await asyncio.to_thread(self._inline, args)
+
+        queued = self._submit(args)
+        if queued is None:
+            return await asyncio.to_thread(self._inline, args, "fallback")
+        future, submitted = queued
+        try:
+            # Cancelling the wrapper also drops the document from the queue
+            result = await asyncio.wrap_future(future)
+        except BrokenExecutor as e:
+            self._broken(e)
+            return await asyncio.to_thread(self._inline, args, "fallback")
+        return self._record(result, submitted)
+
+    def _inline(self, args: Tuple[Any, ...], mode: str = "inline") -> Tuple[str, List[str]]:
+        text, links, elapsed = clean_document(*args)
+        metrics.inc("cleaning_jobs_total", mode=mode)
+        metrics.observe(STAGE_SECONDS, elapsed, stage="html_clean")
+        return text, links
+
+    def _submit(self, args: Tuple[Any, ...]) -> Optional[Tuple[Future, float]]:
+        """Queue a document; returns (future, submit time), or None without a pool"""
+        submitted = time.perf_counter()
+        try:
+            with self._lock:
+                if self._executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers, mp_context=_mp_context()
+                    )
+                future = self._executor.submit(clean_document, *args)
+                self._pending += 1
+                self._publish()
+        except (BrokenExecutor, OSError, RuntimeError) as e:
+            logger.warning(f"Cleaning pool unavailable, cleaning inline: {e}")
+            self._reset()
+            return None
+
+        future.add_done_callback(self._done)
+        return future, submitted
+
+    def _record(
+        self, result: Tuple[str, List[str], float], submitted: float
+    ) -> Tuple[str, List[str]]:
+        text, links, elapsed = result
+        # Time not spent cleaning was spent queued or moving the document
+        waited = time.perf_counter() - submitted - elapsed
+        metrics.inc("cleaning_jobs_total", mode="pool")
+        metrics.observe(STAGE_SECONDS, elapsed, stage="html_clean")
+        metrics.observe("cleaning_pool_wait_seconds", max(0.0, waited))
+        return text, links
+
+    def _broken(self, error: Exception):
+        logger.warning(f"Cleaning pool broke, cleaning inline: {error}")
+        self._reset()
+
+    def _done(self, future: Future):
+        with self._lock:
+            self._pending -= 1
+            self._publish()
+
+    def _publish(self):
+        """Update the queue gauges; called with the lock held"""
+        metrics.set_gauge("cleaning_pool_pending", self._pending)
+        metrics.set_gauge("cleaning_pool_queue_depth", max(0, self._pending - self.workers))
+
+    def _reset(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "min_chars": self.min_chars,
+                "started": self._executor is not None,
+                "pending": self._pending,
+                "queue_depth": max(0, self._pending - self.workers),
+            }
+
+    def close(self):
+        """Stop the worker processes; queued documents are dropped"""
+        self._reset()
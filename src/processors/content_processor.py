@@ -3,8 +3,11 @@ Content processing utilities for cleaning and extracting text
 """
 
 import re
+from typing import Optional
 
 from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+from .html_extractor import extract_html_text
 
 logger = setup_logger(__name__)
 
@@ -13,43 +16,21 @@ class ContentProcessor:
     """Handles content cleaning and processing"""
 
     @staticmethod
-    def clean_html_content(html_content: str) -> str:
-        """Clean HTML content by removing scripts, CSS, and other non-content elements"""
-        try:
-            from bs4 import BeautifulSoup
-
-            soup = BeautifulSoup(html_content, "html.parser")
-
-            # Remove script and style elements
-            for element in soup(["script", "style", "meta", "link", "noscript"]):
-                element.decompose()
-
-            # Remove CSS and JS file references
-            for tag in soup.find_all(attrs={"href": re.compile(r"\.(css|js)$", re.I)}):
-                tag.decompose()
-
-            for tag in soup.find_all(attrs={"src": re.compile(r"\.(css|js)$", re.I)}):
-                tag.decompose()
+    def clean_html_content(html_content: str, max_length: Optional[int] = 10000) -> str:
+        """Clean HTML content by removing scripts, CSS, and other non-content elements
 
-            # Get text content
-            text = soup.get_text()
-
-            # Clean up whitespace
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = "\n".join(chunk for chunk in chunks if chunk)
-
-            return ContentProcessor._truncate_content(text, 10000)
-
-        except ImportError:
-            logger.warning("BeautifulSoup not available, using basic extraction")
-            return ContentProcessor.basic_text_extraction(html_content)
+        Runs a single streaming pass that skips script/style/noscript subtrees
+        and stops parsing once ``max_length`` characters of text are collected.
+        """
+        try:
+            text = extract_html_text(html_content, max_length)
+            return ContentProcessor._truncate_content(text, max_length)
         except Exception as e:
             logger.error(f"Error cleaning HTML content: {e}")
-            return html_content[:5000]
+            return ContentProcessor.basic_text_extraction(html_content, max_length)
 
     @staticmethod
-    def basic_text_extraction(html_content: str) -> str:
+    def basic_text_extraction(html_content: str, max_length: Optional[int] = 8000) -> str:
         """Basic text extraction without BeautifulSoup"""
         # Remove script and style tags
         html_content = re.sub(
@@ -71,12 +52,13 @@ class ContentProcessor:
         # Clean whitespace
         html_content = re.sub(r"\s+", " ", html_content).strip()
 
-        return ContentProcessor._truncate_content(html_content, 8000)
+        return ContentProcessor._truncate_content(html_content, max_length)
 
     @staticmethod
-    def _truncate_content(content: str, max_length: int) -> str:
-        """Truncate content if too long"""
-        if len(content) > max_length:
+    def _truncate_content(content: str, max_length: Optional[int]) -> str:
+        """Truncate content if too long (``None`` disables truncation)"""
+        if max_length is not None and len(content) > max_length:
             content = content[:max_length] + "... [content truncated]"
             logger.info(f"Content truncated to {max_length} characters")
+            metrics.inc("truncations_total")
         return content
@@ -0,0 +1,362 @@
+"""
+Concurrent same-site crawler for finding the pages that list addresses
+"""
+
+import asyncio
+import heapq
+import re
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+from urllib.parse import urldefrag, urljoin, urlparse
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+from .cleaning_pool import CleaningPool, decode_body
+
+if TYPE_CHECKING:
+    from urllib.robotparser import RobotFileParser
+
+    import httpx
+
+logger = setup_logger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (compatible; AppWizardCrawler/0.1)"
+
+# Pages likely to list addresses are fetched before others at the same depth
+PRIORITY_LINK_PATTERN = re.compile(
+    r"contact|kontakt|location|store|standort|filial|branch|office|about|"
+    r"impressum|imprint|legal|find-us|visit|address|adresse",
+    re.I,
+)
+
+# Links to these are never pages worth reading
+SKIPPED_EXTENSIONS = (
+    ".pdf", ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".css",
+    ".js", ".zip", ".gz", ".mp3", ".mp4", ".avi", ".mov", ".woff", ".woff2",
+    ".xml", ".json", ".doc", ".docx", ".xls", ".xlsx",
+)
+
+# Sitemap indexes may point to many sitemaps; only read this many
+MAX_SITEMAPS = 5
+
+
+@dataclass
+class CrawledPage:
+    """Cleaned text of one crawled page"""
+
+    url: str
+    depth: int
+    content: str
+
+
+def site_key(url: str) -> str:
+    """Host of a URL without a leading www., for same-site checks"""
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class RedirectRejected(Exception):
+    """A redirect pointed off the crawled site or to a disallowed page"""
+
+
+def normalize_link(base: str, href: str) -> Optional[str]:
+    """Resolve a link against its page, dropping fragments and non-page targets"""
+    url, _ = urldefrag(urljoin(base, href))
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return None
+    if parsed.path.lower().endswith(SKIPPED_EXTENSIONS):
+        return None
+    return url
+
+
+def parse_sitemap(xml: str) -> Tuple[List[str], List[str]]:
+    """Return the (page URLs, nested sitemap URLs) listed in a sitemap"""
+    import xml.etree.ElementTree as ElementTree
+
+    try:
+        root = ElementTree.fromstring(xml)
+    except ElementTree.ParseError:
+        return [], []
+    locs = [
+        element.text.strip()
+        for element in root.iter()
+        if element.tag.rsplit("}", 1)[-1] == "loc" and element.text
+    ]
+    if root.tag.rsplit("}", 1)[-1] == "sitemapindex":
+        return [], locs
+    return locs, []
+
+
+class _HostGate:
+    """Caps concurrent requests to one host and spaces their starts"""
+
+    def __init__(self, connections: int, delay: float):
+        self.slots = asyncio.Semaphore(connections)
+        self.delay = delay
+        self._next_start = 0.0
+
+    async def __aenter__(self):
+        await self.slots.acquire()
+        now = time.monotonic()
+        start = max(now, self._next_start)
+        self._next_start = start + self.delay
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *args):
+        self.slots.release()
+
+
+class SiteCrawler:
+    """Crawls one site from a seed URL, breadth first
+
+    Links on the seed's site (www. or not) are followed up to ``max_depth``
+    clicks away, and pages listed in the site's sitemap count as one click
+    away. At most ``max_pages`` pages are read. Requests to a host are
+    limited to ``connections`` at once and their starts spaced at least
+    ``delay`` seconds apart, or the robots.txt crawl delay when that is
+    longer. Pages robots.txt disallows are skipped, and redirects are only
+    followed when their target passes the same checks.
+
+    ``timeout`` bounds each network wait and ``deadline`` the whole
+    download of a page, robots.txt or sitemap, so a server trickling bytes
+    cannot hold a connection slot until ``max_bytes`` arrive.
+
+    Pages are downloaded concurrently and cleaned by ``cleaning_pool`` (in
+    worker threads when none is given), keeping the first ``max_chars``
+    characters of text of each.
+    """
+
+    def __init__(
+        self,
+        max_pages: int = 20,
+        max_depth: int = 2,
+        connections: int = 4,
+        delay: float = 0.25,
+        timeout: float = 15.0,
+        deadline: float = 20.0,
+        max_bytes: int = 5 * 1024 * 1024,
+        max_chars: int = 10000,
+        respect_robots: bool = True,
+        transport: Optional["httpx.AsyncBaseTransport"] = None,
+        cleaning_pool: Optional[CleaningPool] = None,
+    ):
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.connections = connections
+        self.delay = delay
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_bytes = max_bytes
+        self.max_chars = max_chars
+        self.respect_robots = respect_robots
+        self.transport = transport
+        self.cleaning_pool = cleaning_pool or CleaningPool(workers=0)
+        self._gates: Dict[str, _HostGate] = {}
+        self._robots: Optional["RobotFileParser"] = None
+
+    async def crawl(self, seed: str) -> List[CrawledPage]:
+        """Crawl from ``seed`` and return the readable pages in crawl order"""
+        import httpx
+
+        self._gates = {}
+        self._robots = None
+        site = site_key(seed)
+        pages: List[CrawledPage] = []
+        seen: Set[str] = set()
+        # (depth, not a likely address page, discovery order, url)
+        frontier: List[Tuple[int, bool, int, str]] = []
+        order = 0
+
+        def enqueue(url: Optional[str], depth: int):
+            nonlocal order
+            if url is None or url in seen or depth > self.max_depth:
+                return
+            if site_key(url) != site:
+                return
+            if self._robots is not None and not self._robots.can_fetch(USER_AGENT, url):
+                metrics.inc("crawl_pages_total", outcome="disallowed")
+                return
+            seen.add(url)
+            likely = bool(PRIORITY_LINK_PATTERN.search(urlparse(url).path))
+            heapq.heappush(frontier, (depth, not likely, order, url))
+            order += 1
+
+        async def check_redirect(response: "httpx.Response"):
+            # Redirect targets pass the same site and robots.txt checks as links,
+            # and fail before they are requested
+            if not response.has_redirect_location:
+                return
+            target = str(response.url.join(response.headers["location"]))
+            if site_key(target) != site or (
+                self._robots is not None and not self._robots.can_fetch(USER_AGENT, target)
+            ):
+                raise RedirectRejected(f"{response.url} redirects to {target}")
+
+        async with httpx.AsyncClient(
+            timeout=httpx.Timeout(self.timeout),
+            limits=httpx.Limits(max_connections=self.connections * 2),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+            event_hooks={"response": [check_redirect]},
+            transport=self.transport,
+        ) as client:
+            started = time.perf_counter()
+            if self.respect_robots:
+                await self._load_robots(client, seed)
+            enqueue(seed, 0)
+            for url in await self._sitemap_urls(client, seed):
+                enqueue(normalize_link(seed, url), 1)
+
+            in_flight: Dict[asyncio.Task, int] = {}
+            try:
+                while frontier or in_flight:
+                    # Never start more fetches than pages still wanted
+                    while frontier and len(in_flight) + len(pages) < self.max_pages:
+                        depth, _, _, url = heapq.heappop(frontier)
+                        task = asyncio.create_task(self._fetch_page(client, url))
+                        in_flight[task] = depth
+                    if not in_flight:
+                        break
+                    done, _ = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        depth = in_flight.pop(task)
+                        result = task.result()
+                        if result is None:
+                            continue
+                        page_url, content, links = result
+                        if content:
+                            pages.append(CrawledPage(page_url, depth, content))
+                        for href in links:
+                            enqueue(normalize_link(page_url, href), depth + 1)
+            finally:
+                for task in in_flight:
+                    task.cancel()
+                await asyncio.gather(*in_flight, return_exceptions=True)
+
+        metrics.observe("crawl_duration_seconds", time.perf_counter() - started)
+        logger.info(f"Crawled {len(pages)} pages from {seed}")
+        return pages
+
+    def _gate(self, url: str) -> _HostGate:
+        host = urlparse(url).netloc.lower()
+        if host not in self._gates:
+            delay = self.delay
+            if self._robots is not None:
+                delay = max(delay, float(self._robots.crawl_delay(USER_AGENT) or 0))
+            self._gates[host] = _HostGate(self.connections, delay)
+        return self._gates[host]
+
+    async def _read_capped(self, response: "httpx.Response") -> bytes:
+        """Read a streamed body, stopping at ``max_bytes``"""
+        body = bytearray()
+        async for chunk in response.aiter_bytes():
+            body.extend(chunk)
+            if len(body) >= self.max_bytes:
+                logger.info(f"Stopped reading {response.url} at {self.max_bytes} bytes")
+                del body[self.max_bytes :]
+                break
+        return bytes(body)
+
+    async def _get_text(self, client: "httpx.AsyncClient", url: str) -> Optional[str]:
+        """GET a small text resource such as robots.txt, or None if unavailable
+
+        Like pages, only the first ``max_bytes`` are read, within ``deadline``.
+        """
+
+        async def download() -> Optional[Tuple[bytes, str]]:
+            async with client.stream("GET", url) as response:
+                if response.status_code != 200:
+                    return None
+                return await self._read_capped(response), response.encoding or "utf-8"
+
+        try:
+            async with self._gate(url):
+                result = await asyncio.wait_for(download(), self.deadline)
+        except asyncio.TimeoutError:
+            logger.info(f"Could not fetch {url}: no response within {self.deadline}s")
+            return None
+        except Exception as e:
+            logger.info(f"Could not fetch {url}: {e}")
+            return None
+        if result is None:
+            return None
+        return decode_body(*result)
+
+    async def _load_robots(self, client: "httpx.AsyncClient", seed: str):
+        from urllib.robotparser import RobotFileParser
+
+        text = await self._get_text(client, urljoin(seed, "/robots.txt"))
+        if text is None:
+            return
+        self._robots = RobotFileParser()
+        self._robots.parse(text.splitlines())
+        # Host gates created before the crawl delay was known would ignore it
+        self._gates = {}
+
+    async def _sitemap_urls(self, client: "httpx.AsyncClient", seed: str) -> List[str]:
+        """Page URLs from the sitemaps named in robots.txt, or /sitemap.xml"""
+        queue = (self._robots.site_maps() if self._robots else None) or [
+            urljoin(seed, "/sitemap.xml")
+        ]
+        urls: List[str] = []
+        read = 0
+        while queue and read < MAX_SITEMAPS:
+            text = await self._get_text(client, queue.pop(0))
+            read += 1
+            if text:
+                pages, nested = parse_sitemap(text)
+                urls.extend(pages)
+                queue.extend(nested)
+        return urls
+
+    async def _fetch_page(
+        self, client: "httpx.AsyncClient", url: str
+    ) -> Optional[Tuple[str, str, List[str]]]:
+        """Download one page and clean it; returns (final url, text, links)
+
+        The download, redirects included, must finish within ``deadline``.
+        """
+
+        async def download() -> Optional[Tuple[bytes, str, str, str]]:
+            async with client.stream("GET", url) as response:
+                response.raise_for_status()
+                content_type = response.headers.get("content-type", "").lower()
+                if "text/html" not in content_type and "text/plain" not in content_type:
+                    return None
+                body = await self._read_capped(response)
+                return body, str(response.url), response.encoding or "utf-8", content_type
+
+        try:
+            async with self._gate(url):
+                result = await asyncio.wait_for(download(), self.deadline)
+            if result is None:
+                metrics.inc("crawl_pages_total", outcome="skipped")
+                return None
+            body, final_url, encoding, content_type = result
+        except asyncio.TimeoutError:
+            logger.warning(f"Error crawling {url}: not read within {self.deadline}s")
+            metrics.inc("crawl_pages_total", outcome="timeout")
+            return None
+        except RedirectRejected as e:
+            logger.info(f"Not following redirect: {e}")
+            metrics.inc("crawl_pages_total", outcome="redirect_rejected")
+            return None
+        except Exception as e:
+            logger.warning(f"Error crawling {url}: {e}")
+            metrics.inc("crawl_pages_total", outcome="error")
+            return None
+
+        metrics.inc("crawl_pages_total", outcome="fetched")
+        metrics.inc("input_bytes_total", len(body), input_type="crawl")
+        if "text/html" in content_type:
+            text, links = await self.cleaning_pool.aclean(
+                body, self.max_chars, encoding, collect_links=True
+            )
+        else:
+            text, links = decode_body(body, encoding), []
+        return final_url, text[: self.max_chars], links
@@ -0,0 +1,121 @@
+"""
+Bounded file reading with encoding detection
+"""
+
+import codecs
+import mmap
+import os
+from typing import Callable, Iterator, Optional
+
+from ..utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Bytes looked at to guess the encoding of a file
+SNIFF_BYTES = 65536
+WINDOW_BYTES = 65536
+
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+
+def detect_encoding(prefix: bytes) -> str:
+    """Guess the encoding of a file from its first bytes
+
+    Checks for a byte order mark, then whether the prefix is valid UTF-8,
+    then asks charset_normalizer when it is installed. Falls back to cp1252,
+    which decodes any byte sequence.
+    """
+    for bom, encoding in _BOMS:
+        if prefix.startswith(bom):
+            return encoding
+
+    try:
+        # Not final: the prefix may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(prefix, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    try:
+        from charset_normalizer import from_bytes
+
+        match = from_bytes(prefix).best()
+        if match is not None:
+            return match.encoding
+    except ImportError:
+        pass
+
+    return "cp1252"
+
+
+def iter_text_windows(
+    file_path: str,
+    encoding: Optional[str] = None,
+    window_bytes: int = WINDOW_BYTES,
+    overlap_bytes: int = 0,
+    max_bytes: Optional[int] = None,
+) -> Iterator[str]:
+    """Yield decoded text windows from a file without loading it into memory
+
+    The file is memory-mapped and decoded one window at a time, so memory use
+    depends on ``window_bytes`` rather than the file size. With
+    ``overlap_bytes`` each window also repeats the end of the previous one,
+    which lets callers scan for matches that cross window borders.
+    """
+    size = os.path.getsize(file_path)
+    if max_bytes is not None:
+        size = min(size, max_bytes)
+    if size == 0:
+        return
+
+    with open(file_path, "rb") as f, mmap.mmap(
+        f.fileno(), 0, access=mmap.ACCESS_READ
+    ) as mm:
+        if encoding is None:
+            encoding = detect_encoding(mm[:SNIFF_BYTES])
+            logger.debug(f"Detected {encoding} encoding for {file_path}")
+        overlap_bytes = max(0, min(overlap_bytes, window_bytes // 2))
+
+        if overlap_bytes == 0:
+            decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+            for start in range(0, size, window_bytes):
+                end = min(start + window_bytes, size)
+                yield decoder.decode(mm[start:end], final=end >= size)
+            return
+
+        # Overlapping windows are decoded independently
+        start = 0
+        while start < size:
+            end = min(start + window_bytes, size)
+            yield mm[start:end].decode(encoding, errors="replace")
+            if end >= size:
+                break
+            start = end - overlap_bytes
+
+
+def read_text(
+    file_path: str,
+    consume: Callable[[str], bool],
+    max_bytes: Optional[int] = None,
+) -> int:
+    """Decode a file into ``consume`` until it returns True
+
+    ``consume`` receives each decoded window and returns True once it needs
+    no more input. Returns the number of bytes read.
+    """
+    size = os.path.getsize(file_path)
+    if max_bytes is not None:
+        size = min(size, max_bytes)
+
+    windows = 0
+    for text in iter_text_windows(file_path, max_bytes=max_bytes):
+        windows += 1
+        if consume(text):
+            break
+    return min(windows * WINDOW_BYTES, size)
@@ -0,0 +1,176 @@
+"""
+Single-pass, incremental HTML to text extraction
+"""
+
+import re
+from html.parser import HTMLParser
+from typing import List, Optional
+
+try:
+    from lxml import etree
+except ImportError:  # pragma: no cover - lxml is optional
+    etree = None
+
+# Elements whose whole subtree carries no readable text
+SKIP_TAGS = frozenset(["script", "style", "noscript", "template", "svg"])
+
+# Elements that start a new line of text
+BLOCK_TAGS = frozenset(
+    [
+        "address", "article", "aside", "blockquote", "br", "dd", "div", "dl",
+        "dt", "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2",
+        "h3", "h4", "h5", "h6", "header", "hr", "li", "main", "nav", "ol", "p",
+        "pre", "section", "table", "td", "th", "title", "tr", "ul",
+    ]
+)
+
+# Feed documents in slices so extraction can stop early on large pages
+FEED_SIZE = 65536
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class HTMLTextExtractor:
+    """Event-based HTML text extractor with a character budget
+
+    Text is collected as parse events arrive, skipping script/style/noscript
+    subtrees, and feeding can stop as soon as ``max_length`` characters of
+    text have been collected. Uses lxml's parser when it is installed and the
+    standard library parser otherwise.
+
+    With ``collect_links`` the ``href`` of every ``<a>`` is kept in ``links``.
+    Navigation often sits in the footer, so parsing then continues past the
+    text budget; only text collection stops.
+    """
+
+    def __init__(
+        self,
+        max_length: Optional[int] = None,
+        use_lxml: bool = True,
+        collect_links: bool = False,
+    ):
+        self.max_length = max_length
+        self.length = 0
+        self.collect_links = collect_links
+        self.links: List[str] = []
+        self._lines: List[str] = []
+        self._line: List[str] = []
+        self._skip_depth = 0
+
+        if use_lxml and etree is not None:
+            self._parser = etree.HTMLParser(target=_LxmlTarget(self), recover=True)
+        else:
+            self._parser = _StdlibParser(self)
+
+    @property
+    def full(self) -> bool:
+        """Whether the character budget has been reached"""
+        return self.max_length is not None and self.length >= self.max_length
+
+    @property
+    def done(self) -> bool:
+        """Whether no more input is needed"""
+        return self.full and not self.collect_links
+
+    def feed(self, html: str) -> bool:
+        """Feed more markup; returns True once no more input is needed"""
+        if not self.done:
+            self._parser.feed(html)
+        return self.done
+
+    def close(self) -> str:
+        """Finish parsing and return the extracted text, one line per block"""
+        try:
+            self._parser.close()
+        except Exception:
+            # Unterminated markup after an early stop is expected
+            pass
+        self._break_line()
+        return "\n".join(self._lines)
+
+    def start(self, tag: str, href: Optional[str] = None):
+        tag = tag.lower()
+        if href and tag == "a" and self.collect_links:
+            self.links.append(href.strip())
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self._break_line()
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag in SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self._break_line()
+
+    def data(self, text: str):
+        if self._skip_depth or self.full:
+            return
+        text = _WHITESPACE.sub(" ", text)
+        if text.strip():
+            self._line.append(text)
+            self.length += len(text)
+        elif self._line:
+            self._line.append(" ")
+
+    def _break_line(self):
+        if self._line:
+            line = "".join(self._line).strip()
+            if line:
+                self._lines.append(line)
+                self.length += 1
+            self._line = []
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, extractor: HTMLTextExtractor):
+        super().__init__(convert_charrefs=True)
+        self.extractor = extractor
+
+    def handle_starttag(self, tag, attrs):
+        self.extractor.start(tag, dict(attrs).get("href"))
+
+    def handle_startendtag(self, tag, attrs):
+        # Void elements like <br/> still break lines, but never open a subtree
+        if tag.lower() not in SKIP_TAGS:
+            self.extractor.start(tag)
+
+    def handle_endtag(self, tag):
+        self.extractor.end(tag)
+
+    def handle_data(self, data):
+        self.extractor.data(data)
+
+
+class _LxmlTarget:
+    def __init__(self, extractor: HTMLTextExtractor):
+        self.extractor = extractor
+
+    def start(self, tag, attrib):
+        if isinstance(tag, str):
+            self.extractor.start(tag, attrib.get("href"))
+
+    def end(self, tag):
+        if isinstance(tag, str):
+            self.extractor.end(tag)
+
+    def data(self, data):
+        self.extractor.data(data)
+
+    def comment(self, text):
+        pass
+
+    def close(self):
+        return None
+
+
+def extract_html_text(
+    html: str, max_length: Optional[int] = None, use_lxml: bool = True
+) -> str:
+    """Extract readable text from HTML, stopping once ``max_length`` is reached"""
+    extractor = HTMLTextExtractor(max_length, use_lxml)
+    for start in range(0, len(html), FEED_SIZE):
+        if extractor.feed(html[start : start + FEED_SIZE]):
+            break
+    return extractor.close()
@@ -2,32 +2,78 @@
 Input handling for different input types (text, file, URL)
 """
 
+import codecs
 import os
-from typing import Tuple
+import socket
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-import requests
-
 from ..utils.logger import setup_logger
+from ..utils.metrics import STAGE_SECONDS, Stopwatch, metrics
+from .cleaning_pool import CleaningPool
 from .content_processor import ContentProcessor
+from .file_reader import read_text
+from .html_extractor import HTMLTextExtractor
 
 logger = setup_logger(__name__)
 
+FETCH_CHUNK_SIZE = 16384
+
+DEFAULT_FETCH_CONFIG = {"timeout": 15, "deadline": 20.0, "max_bytes": 5 * 1024 * 1024}
+
 
 class InputHandler:
     """Handles different types of input (text, file, URL)"""
 
-    def __init__(self):
+    def __init__(
+        self,
+        fetch_config: Optional[Dict[str, Any]] = None,
+        cleaning_pool: Optional[CleaningPool] = None,
+    ):
         self.content_processor = ContentProcessor()
+        self.fetch_config = {**DEFAULT_FETCH_CONFIG, **(fetch_config or {})}
+        self.cleaning_pool = cleaning_pool
+        self._session = None
+
+    @property
+    def session(self):
+        """Pooled HTTP session, created on the first URL fetch"""
+        if self._session is None:
+            import requests
 
-    def process_input(self, input_data: str) -> Tuple[str, str]:
-        """Process input and return (content, input_type)"""
-        if self._is_file_path(input_data):
-            return self._read_file(input_data), "file"
-        elif self._is_valid_url(input_data):
-            return self._fetch_url(input_data), "url"
+            self._session = requests.Session()
+        return self._session
+
+    def process_input(
+        self, input_data: str, max_length: Optional[int] = None
+    ) -> Tuple[str, str]:
+        """Process input and return (content, input_type)
+
+        ``max_length`` replaces the per-type truncation limits for files and
+        URLs, e.g. to keep whole documents for chunked extraction.
+        """
+        with metrics.timer(stage="classify"):
+            if self._is_file_path(input_data):
+                input_type = "file"
+            elif self._is_valid_url(input_data):
+                input_type = "url"
+            else:
+                input_type = "text"
+
+        if input_type == "file":
+            with metrics.timer(stage="file_read"):
+                content = self._read_file(input_data, max_length)
+        elif input_type == "url":
+            with metrics.timer(stage="url_fetch"):
+                content = self._fetch_url(input_data, max_length)
         else:
-            return input_data, "text"
+            content = input_data
+            metrics.inc("input_bytes_total", len(content.encode("utf-8")), input_type="text")
+
+        metrics.inc("inputs_total", input_type=input_type)
+        metrics.inc("content_chars_total", len(content), input_type=input_type)
+        return content, input_type
 
     def _is_file_path(self, path: str) -> bool:
         """Check if string is a valid file path"""
@@ -41,59 +87,264 @@ class InputHandler:
         except:
             return False
 
-    def _process_file_content(self, content: str, file_path: str) -> str:
-        """Process file content, cleaning HTML if it's an HTML file"""
+    @staticmethod
+    def _file_budget(file_path: str, max_length: Optional[int] = None) -> int:
+        """Character budget for a file, by extension unless ``max_length`` is given"""
+        if max_length:
+            return max_length
         file_extension = os.path.splitext(file_path)[1].lower()
+        if file_extension in [".html", ".htm", ".txt", ".md", ".json"]:
+            return 10000
+        # For other files, treat as plain text but truncate more aggressively
+        return 8000
 
-        if file_extension in [".html", ".htm"]:
-            logger.info(f"Processing HTML file: {file_path}")
-            return self.content_processor.clean_html_content(content)
-        elif file_extension in [".txt", ".md", ".json"]:
-            return self.content_processor._truncate_content(content, 10000)
-        else:
-            # For other files, treat as plain text but truncate more aggressively
-            return self.content_processor._truncate_content(content, 8000)
+    def _read_file(self, file_path: str, max_length: Optional[int] = None) -> str:
+        """Read content from a file with smart processing
 
-    def _read_file(self, file_path: str) -> str:
-        """Read content from a file with smart processing"""
+        The file is memory-mapped and decoded window by window in its detected
+        encoding, and reading stops as soon as the character budget is met, so
+        large files are never loaded whole. The exception is an HTML file of
+        at least the cleaning pool's size threshold whose text budget is not
+        met inline: it is read whole and cleaned in the pool.
+        """
+        max_length = self._file_budget(file_path, max_length)
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                raw_content = f.read()
+            if os.path.splitext(file_path)[1].lower() in [".html", ".htm"]:
+                logger.info(f"Processing HTML file: {file_path}")
+                pool = self.cleaning_pool
+                offload = pool is not None and pool.uses_pool(os.path.getsize(file_path))
+                bytes_read = 0
+
+                def read(consume: Callable[[str], bool]):
+                    nonlocal bytes_read
+                    bytes_read = read_text(file_path, consume)
+
+                raw_content = self._clean_html(read, max_length, offload)
+            else:
+                parts = []
+                collected = 0
 
-            processed_content = self._process_file_content(raw_content, file_path)
+                def collect(text: str) -> bool:
+                    nonlocal collected
+                    parts.append(text)
+                    collected += len(text)
+                    return collected >= max_length
+
+                bytes_read = read_text(file_path, collect)
+                raw_content = "".join(parts)
+
+            metrics.inc("input_bytes_total", bytes_read, input_type="file")
+            content = self.content_processor._truncate_content(raw_content, max_length)
             logger.info(f"Successfully read and processed file: {file_path}")
-            return processed_content
+            return content
         except Exception as e:
             logger.error(f"Error reading file {file_path}: {e}")
+            metrics.inc("errors_total", stage="file_read")
             return ""
 
-    def _fetch_url(self, url: str) -> str:
-        """Fetch content from a URL with smart content processing"""
+    def _fetch_url(self, url: str, max_length: Optional[int] = None) -> str:
+        """Fetch content from a URL with smart content processing
+
+        The body is streamed and decoded incrementally. Reading stops once
+        enough text has been collected for the extraction budget, the byte cap
+        is reached, or the total deadline passes.
+        """
+        max_length = max_length or 10000
         try:
             headers = {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
             }
 
-            response = requests.get(url, timeout=15, headers=headers, stream=True)
-            response.raise_for_status()
-
-            content_type = response.headers.get("content-type", "").lower()
-
-            if "text/html" in content_type:
-                cleaned_content = self.content_processor.clean_html_content(
-                    response.text
-                )
-                logger.info(f"Successfully fetched and cleaned HTML from URL: {url}")
-                return cleaned_content
-            elif "text/" in content_type:
-                content = response.text
-                content = self.content_processor._truncate_content(content, 10000)
-                logger.info(f"Successfully fetched text from URL: {url}")
-                return content
-            else:
-                logger.warning(f"Unsupported content type: {content_type}")
-                return ""
+            with self.session.get(
+                url,
+                timeout=self.fetch_config["timeout"],
+                headers=headers,
+                stream=True,
+            ) as response:
+                response.raise_for_status()
+
+                content_type = response.headers.get("content-type", "").lower()
+                if "text/" not in content_type:
+                    logger.warning(f"Unsupported content type: {content_type}")
+                    metrics.inc("errors_total", stage="url_content_type")
+                    return ""
+
+                if "text/html" in content_type:
+                    pool = self.cleaning_pool
+                    text = self._clean_html(
+                        lambda consume: self._read_body(response, url, consume),
+                        max_length,
+                        offload=pool is not None and pool.uses_pool(max_length),
+                    )
+                    content = self.content_processor._truncate_content(text, max_length)
+                    logger.info(f"Successfully fetched and cleaned HTML from URL: {url}")
+                    return content
+
+                parts = []
+                collected = 0
+
+                def collect(text: str) -> bool:
+                    nonlocal collected
+                    parts.append(text)
+                    collected += len(text)
+                    return collected >= max_length
+
+                self._read_body(response, url, collect)
+
+            content = self.content_processor._truncate_content("".join(parts), max_length)
+            logger.info(f"Successfully fetched text from URL: {url}")
+            return content
 
         except Exception as e:
             logger.error(f"Error fetching URL {url}: {e}")
+            metrics.inc("errors_total", stage="url_fetch")
             return ""
+
+    def _clean_html(
+        self,
+        read: Callable[[Callable[[str], bool]], Any],
+        max_length: int,
+        offload: bool,
+    ) -> str:
+        """Clean HTML text fed by ``read``, handing large documents to the cleaning pool
+
+        ``read`` passes each decoded piece of the document to the consumer it
+        is given until that returns True. HTML is parsed while it is read, so
+        reading stops once the text budget is met. With ``offload``, markup
+        past the pool's size threshold is only buffered and the document is
+        cleaned in the pool instead, off the GIL the event loop needs.
+
+        Once buffering starts, the budget can no longer be checked while
+        reading, so the rest of the document is read (for URLs, up to the
+        byte cap). URL fetches therefore only offload when the budget is at
+        least the pool threshold, where the page would mostly be parsed whole
+        anyway; smaller budgets keep stopping early.
+        """
+        pool = self.cleaning_pool
+        extractor = HTMLTextExtractor(max_length)
+        feed, cleaning = self._timed_consumer(extractor.feed)
+        parts: List[str] = []
+        buffered = 0
+        inline = True
+
+        def consume(text: str) -> bool:
+            nonlocal buffered, inline
+            if inline and feed(text):
+                return True
+            if offload:
+                parts.append(text)
+                buffered += len(text)
+                inline = inline and not pool.uses_pool(buffered)
+            return False
+
+        read(consume)
+        if not inline:
+            text, _ = pool.clean("".join(parts), max_length)
+            return text
+
+        with cleaning:
+            text = extractor.close()
+        metrics.observe(STAGE_SECONDS, cleaning.elapsed, stage="html_clean")
+        return text
+
+    @staticmethod
+    def _timed_consumer(consume: Callable[[str], bool]):
+        """Wrap ``consume`` so the time spent inside it is accumulated
+
+        HTML is parsed while it is read, so cleaning time is measured across
+        the interleaved calls rather than as one block.
+        """
+        stopwatch = Stopwatch()
+
+        def timed(text: str) -> bool:
+            with stopwatch:
+                return consume(text)
+
+        return timed, stopwatch
+
+    def _read_body(self, response, url: str, consume: Callable[[str], bool]):
+        """Decode a streamed body into ``consume`` until it has enough, or a cap or deadline is hit
+
+        ``consume`` receives each decoded piece of text and returns True once
+        it needs no more input. A body declared larger than the byte cap is
+        rejected unread. The deadline covers the whole read: when it passes,
+        the connection is shut down, so a server trickling bytes cannot hold
+        a read open for the socket timeout on every chunk.
+        """
+        max_bytes = self.fetch_config["max_bytes"]
+
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            metrics.inc("fetch_early_stops_total", reason="declared_size")
+            raise ValueError(f"declares {declared} bytes, over the {max_bytes} byte limit")
+
+        decoder = codecs.getincrementaldecoder(
+            self._response_encoding(response)
+        )(errors="replace")
+        received = 0
+        expired = threading.Event()
+
+        def expire():
+            expired.set()
+            self._abort(response)
+
+        watchdog = threading.Timer(self.fetch_config["deadline"], expire)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            for chunk in response.iter_content(chunk_size=FETCH_CHUNK_SIZE):
+                chunk = chunk[: max_bytes - received]
+                received += len(chunk)
+
+                if consume(decoder.decode(chunk)):
+                    logger.info(f"Stopped reading {url} after {received} bytes: budget reached")
+                    metrics.inc("fetch_early_stops_total", reason="budget")
+                    break
+                if received >= max_bytes:
+                    logger.warning(f"Stopped reading {url} at the {max_bytes} byte limit")
+                    metrics.inc("fetch_early_stops_total", reason="byte_cap")
+                    break
+                if expired.is_set():
+                    raise ConnectionAbortedError
+            else:
+                consume(decoder.decode(b"", final=True))
+        except Exception:
+            if not expired.is_set():
+                raise
+            # Keep the text read so far
+            logger.warning(f"Stopped reading {url} after {received} bytes: deadline passed")
+            metrics.inc("fetch_early_stops_total", reason="deadline")
+        finally:
+            watchdog.cancel()
+
+        metrics.inc("input_bytes_total", received, input_type="url")
+
+    @staticmethod
+    def _abort(response):
+        """Interrupt a read blocked on ``response`` from another thread"""
+        raw = getattr(response, "raw", None)
+        connection = getattr(raw, "connection", None) or getattr(raw, "_connection", None)
+        sock = getattr(connection, "sock", None)
+        try:
+            if sock is not None:
+                # Closing alone does not wake a thread blocked in recv
+                sock.shutdown(socket.SHUT_RDWR)
+            else:
+                response.close()
+        except OSError:
+            pass
+
+    @staticmethod
+    def _response_encoding(response) -> str:
+        """Pick the body encoding from the Content-Type charset, defaulting to UTF-8"""
+        encoding = response.encoding
+        # requests reports ISO-8859-1 when a text/* response names no charset
+        if not encoding or (
+            encoding.lower() == "iso-8859-1"
+            and "charset" not in response.headers.get("content-type", "").lower()
+        ):
+            return "utf-8"
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            return "utf-8"
@@ -1,10 +1,34 @@
 """
 Providers module
+
+Provider classes are imported on first access, so importing one provider
+does not pull in the client libraries of all the others.
 """
 
-from .base_provider import BaseProvider
-from .ollama_provider import OllamaProvider
-from .openai_provider import OpenAIProvider
-from .provider_factory import ProviderFactory
+import importlib
+
+_EXPORTS = {
+    "BaseProvider": ".base_provider",
+    "ProviderError": ".base_provider",
+    "LocalProvider": ".local_provider",
+    "OllamaProvider": ".ollama_provider",
+    "OpenAIProvider": ".openai_provider",
+    "ProviderFactory": ".provider_factory",
+}
+
+__all__ = [
+    "BaseProvider",
+    "LocalProvider",
+    "OpenAIProvider",
+    "OllamaProvider",
+    "ProviderError",
+    "ProviderFactory",
+]
+
 
-__all__ = ["BaseProvider", "OpenAIProvider", "OllamaProvider", "ProviderFactory"]
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
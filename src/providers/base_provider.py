@@ -2,13 +2,53 @@
 Base provider interface for AI models
 """
 
+import asyncio
+import re
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from ..utils.metrics import STAGE_SECONDS, Stopwatch, metrics
+
+NO_ADDRESSES_FOUND = "No addresses found"
+
+# Bump whenever the extraction prompt changes so cached results are not reused
+PROMPT_VERSION = "1"
+
+MAX_COMPLETION_TOKENS = 500
+# Rough token cost of the instructions wrapped around the text in the prompt
+PROMPT_OVERHEAD_TOKENS = 400
+CHARS_PER_TOKEN = 4
+
+DOCUMENT_HEADER = "=== DOCUMENT {index} ==="
+_DOCUMENT_HEADER_PATTERN = re.compile(r"^\s*=+\s*DOCUMENT\s+(\d+)\s*=+\s*$", re.M)
+
+
+def estimate_tokens(prompt_chars: int) -> int:
+    """Rough total token cost of a call: the prompt plus a full completion"""
+    return prompt_chars // CHARS_PER_TOKEN + PROMPT_OVERHEAD_TOKENS + MAX_COMPLETION_TOKENS
+
+
+class ProviderError(Exception):
+    """A provider call failed, timed out, or was rejected by its circuit breaker
+
+    Raised instead of returning an empty address list, so callers can tell
+    "no addresses" from "no answer". ``reason`` is ``error``, ``timeout``,
+    ``circuit_open`` or ``unavailable`` (a requested provider is not set up
+    or not reachable).
+    """
+
+    def __init__(self, provider: str, message: str, reason: str = "error"):
+        super().__init__(f"{provider}: {message}")
+        self.provider = provider
+        self.reason = reason
 
 
 class BaseProvider(ABC):
     """Abstract base class for AI providers"""
 
+    # Whether acomplete() can run arbitrary prompts, e.g. packed batch prompts
+    supports_raw_prompts = False
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
 
@@ -33,6 +73,158 @@ class BaseProvider(ABC):
         """Get provider name"""
         pass
 
+    def context_tokens(self, model: Optional[str] = None) -> int:
+        """Get the context window of a model in tokens"""
+        return 4096
+
+    def max_input_chars(self, model: Optional[str] = None) -> int:
+        """Get how many characters of text fit in one extraction prompt"""
+        available = (
+            self.context_tokens(model) - PROMPT_OVERHEAD_TOKENS - MAX_COMPLETION_TOKENS
+        )
+        return max(1000, available * CHARS_PER_TOKEN)
+
+    def resolve_model(
+        self, model: Optional[str], available_models: Optional[List[str]] = None
+    ) -> Optional[str]:
+        """Pick the model to use for a request given the known model list"""
+        return model or getattr(self, "default_model", None)
+
+    async def ais_available(self) -> bool:
+        """Check availability without blocking the event loop"""
+        return await asyncio.to_thread(self.is_available)
+
+    async def aextract_addresses(
+        self, text: str, model: Optional[str] = None
+    ) -> List[str]:
+        """Extract addresses from text without blocking the event loop
+
+        Providers with a native async client should override this; the default
+        runs the synchronous implementation in a worker thread. Unlike
+        ``extract_addresses``, backend errors are raised to the caller.
+        """
+        return await asyncio.to_thread(self.extract_addresses, text, model)
+
+    async def aget_available_models(self) -> List[str]:
+        """Get list of available models without blocking the event loop"""
+        return await asyncio.to_thread(self.get_available_models)
+
+    async def acomplete(self, prompt: str, model: Optional[str] = None) -> str:
+        """Run a raw prompt through the provider and return the completion text"""
+        raise NotImplementedError(
+            f"Provider '{self.provider_name}' does not support raw completions"
+        )
+
+    async def astream_complete(
+        self, prompt: str, model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Run a raw prompt and yield the completion text as it is generated
+
+        The default yields the whole completion at once; providers with token
+        streaming should override this.
+        """
+        yield await self.acomplete(prompt, model)
+
+    async def astream_addresses(
+        self, text: str, model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Yield addresses one by one as soon as each line of output is complete
+
+        Only deltas that complete a line are parsed, and the parsing time of
+        the whole response is recorded as one ``parse`` sample.
+        """
+        if not self.supports_raw_prompts:
+            for address in await self.aextract_addresses(text, model):
+                yield address
+            return
+
+        prompt = self.get_address_extraction_prompt(text)
+        parsing = Stopwatch()
+        buffer = ""
+        async for delta in self.astream_complete(prompt, model):
+            buffer += delta
+            if "\n" not in delta:
+                continue
+            with parsing:
+                *lines, buffer = buffer.split("\n")
+                addresses = self._split_addresses("\n".join(lines))
+            for address in addresses:
+                yield address
+        with parsing:
+            addresses = self._split_addresses(buffer)
+        metrics.observe(STAGE_SECONDS, parsing.elapsed, stage="parse")
+        for address in addresses:
+            yield address
+
+    def preload(self):
+        """Import client libraries ahead of the first call; runs in a worker thread"""
+        pass
+
+    async def astart(self):
+        """Start background work such as loading models; must not block"""
+        pass
+
+    def runtime_stats(self) -> Dict[str, Any]:
+        """Provider-specific figures for the stats method"""
+        return {}
+
+    async def aclose(self):
+        """Release pooled connections held by the provider"""
+        pass
+
+    @staticmethod
+    def parse_addresses(addresses_text: str) -> List[str]:
+        """Split a model response into a list of addresses"""
+        with metrics.timer(stage="parse"):
+            return BaseProvider._split_addresses(addresses_text)
+
+    @staticmethod
+    def _split_addresses(addresses_text: str) -> List[str]:
+        addresses_text = (addresses_text or "").strip()
+        if not addresses_text or addresses_text == NO_ADDRESSES_FOUND:
+            return []
+        return [addr.strip() for addr in addresses_text.split("\n") if addr.strip()]
+
+    @staticmethod
+    def parse_batch_addresses(
+        addresses_text: str, count: int
+    ) -> List[Optional[List[str]]]:
+        """Split a packed batch response into per-document address lists
+
+        Documents whose section is missing from the response (e.g. because the
+        completion was cut off) are returned as ``None``.
+        """
+        results: List[Optional[List[str]]] = [None] * count
+        headers = list(_DOCUMENT_HEADER_PATTERN.finditer(addresses_text or ""))
+        for i, header in enumerate(headers):
+            index = int(header.group(1)) - 1
+            end = headers[i + 1].start() if i + 1 < len(headers) else None
+            if 0 <= index < count:
+                section = addresses_text[header.end() : end]
+                results[index] = BaseProvider.parse_addresses(section)
+        return results
+
+    def get_batch_extraction_prompt(self, texts: List[str]) -> str:
+        """Get a prompt extracting addresses from several documents at once"""
+        documents = "\n\n".join(
+            f"{DOCUMENT_HEADER.format(index=i)}\n{text}"
+            for i, text in enumerate(texts, start=1)
+        )
+        return f"""You are an expert address identification agent that works with multiple languages and formats.
+
+TASK: Extract ALL physical addresses from each of the {len(texts)} documents below, regardless of language or format.
+
+INSTRUCTIONS:
+1. Treat every document separately. Each one starts with a line like "{DOCUMENT_HEADER.format(index=1)}".
+2. Recognize US, UK, European and Asian address formats, including building, unit, city, postal code and country parts.
+3. For EVERY document, in order, output its header line exactly as given, followed by its addresses, one per line, without any additional text, numbering, or formatting.
+4. If a document has no addresses, output its header line followed by exactly: "{NO_ADDRESSES_FOUND}"
+
+DOCUMENTS:
+{documents}
+
+ADDRESSES:"""
+
     def get_address_extraction_prompt(self, text: str) -> str:
         """Get the standard prompt for address extraction"""
         return f"""You are an expert address identification agent that works with multiple languages and formats.
@@ -56,7 +248,7 @@ INSTRUCTIONS:
    - Country names (if present)
 
 4. IMPORTANT: Return ONLY the addresses, one per line, without any additional text, numbering, or formatting.
-5. If no addresses are found, return exactly: "No addresses found"
+5. If no addresses are found, return exactly: "{NO_ADDRESSES_FOUND}"
 
 TEXT TO ANALYZE:
 {text}
@@ -0,0 +1,172 @@
+"""
+Per-provider circuit breakers and latency-based adaptive timeouts
+"""
+
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops sending traffic to a provider whose calls keep failing
+
+    Closed: calls flow and outcomes are recorded over a sliding time window.
+    Once at least ``min_calls`` outcomes are in the window and the failure
+    rate reaches ``failure_rate``, the breaker opens and rejects calls for
+    ``open_seconds``. It then goes half-open and lets ``half_open_calls``
+    trial calls through: a success closes it, a failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_rate: float = 0.5,
+        min_calls: int = 5,
+        window: float = 60.0,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1,
+    ):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._outcomes: Deque[Tuple[float, bool]] = deque()
+
+    @property
+    def state(self) -> str:
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; claims a trial slot when half-open"""
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._trials < self.half_open_calls:
+            self._trials += 1
+            return True
+        return False
+
+    def is_open(self) -> bool:
+        """Whether calls are currently being rejected, without claiming a trial slot"""
+        state = self.state
+        return state == OPEN or (
+            state == HALF_OPEN and self._trials >= self.half_open_calls
+        )
+
+    def release(self):
+        """Give back a trial slot claimed by a call that ended without an outcome"""
+        if self._state == HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def record_success(self):
+        if self._state == HALF_OPEN:
+            self._transition(CLOSED)
+        else:
+            self._record(True)
+
+    def record_failure(self):
+        if self._state == HALF_OPEN:
+            self._transition(OPEN)
+            return
+        self._record(False)
+        if self._state == CLOSED and len(self._outcomes) >= self.min_calls:
+            failures = sum(1 for _, ok in self._outcomes if not ok)
+            if failures / len(self._outcomes) >= self.failure_rate:
+                self._transition(OPEN)
+
+    def retry_after(self) -> float:
+        """Seconds until an open breaker lets a trial call through"""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.open_seconds - (time.monotonic() - self._opened_at))
+
+    def _record(self, ok: bool):
+        now = time.monotonic()
+        self._outcomes.append((now, ok))
+        while self._outcomes and now - self._outcomes[0][0] > self.window:
+            self._outcomes.popleft()
+
+    def _transition(self, state: str):
+        logger.warning(f"Circuit for {self.name} is now {state}")
+        metrics.inc("circuit_transitions_total", provider=self.name, state=state)
+        self._state = state
+        self._trials = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == CLOSED:
+            self._outcomes.clear()
+
+
+class AdaptiveTimeout:
+    """Per-model timeouts that follow observed latency, by input size class
+
+    Keeps a smoothed latency and deviation for each (model, size class) pair,
+    as TCP does for retransmission timeouts, and allows ``smoothed +
+    deviations * deviation``, clamped to ``[min_timeout, max_timeout]``.
+    Until ``min_samples`` calls have been seen the maximum is used.
+    """
+
+    # Inputs up to 1k, 2k, 4k, ... characters share a size class
+    SIZE_CLASS_BASE = 1000
+
+    def __init__(
+        self,
+        min_timeout: float = 5.0,
+        max_timeout: float = 120.0,
+        deviations: float = 4.0,
+        min_samples: int = 5,
+        alpha: float = 0.125,
+        beta: float = 0.25,
+    ):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.deviations = deviations
+        self.min_samples = min_samples
+        self.alpha = alpha
+        self.beta = beta
+        # (model, size class) -> (smoothed latency, deviation, samples)
+        self._estimates: Dict[Tuple[str, int], Tuple[float, float, int]] = {}
+
+    @classmethod
+    def size_class(cls, chars: int) -> int:
+        size_class = 0
+        while chars > cls.SIZE_CLASS_BASE << size_class:
+            size_class += 1
+        return size_class
+
+    def timeout(self, model: Optional[str], chars: int) -> float:
+        estimate = self._estimates.get((model or "", self.size_class(chars)))
+        if estimate is None or estimate[2] < self.min_samples:
+            return self.max_timeout
+        smoothed, deviation, _ = estimate
+        return min(
+            self.max_timeout,
+            max(self.min_timeout, smoothed + self.deviations * deviation),
+        )
+
+    def observe(self, model: Optional[str], chars: int, seconds: float):
+        key = (model or "", self.size_class(chars))
+        estimate = self._estimates.get(key)
+        if estimate is None:
+            self._estimates[key] = (seconds, seconds / 2, 1)
+            return
+        smoothed, deviation, samples = estimate
+        deviation = (1 - self.beta) * deviation + self.beta * abs(smoothed - seconds)
+        smoothed = (1 - self.alpha) * smoothed + self.alpha * seconds
+        self._estimates[key] = (smoothed, deviation, samples + 1)
@@ -0,0 +1,167 @@
+"""
+Keeping Ollama models loaded and sizing their context windows
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+from .base_provider import CHARS_PER_TOKEN, MAX_COMPLETION_TOKENS, PROMPT_OVERHEAD_TOKENS
+
+logger = setup_logger(__name__)
+
+# A response whose model load took longer than this found the model unloaded
+COLD_LOAD_SECONDS = 0.5
+
+# Fewest completion tokens allowed, enough for an empty answer or a short list
+MIN_PREDICT_TOKENS = 128
+
+# Room left in the context for tokenizer differences from the 4 chars/token estimate
+CONTEXT_MARGIN_TOKENS = 256
+
+# Sends a generate request with (model, options); returns Ollama's response JSON
+Loader = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+@dataclass
+class ModelResidency:
+    """What the server last saw of one model in Ollama"""
+
+    num_ctx: Optional[int] = None
+    last_used: float = 0.0
+    loaded_at: Optional[float] = None
+    cold_loads: int = 0
+    last_load_seconds: Optional[float] = None
+
+
+class ModelResidencyManager:
+    """Keeps Ollama models in memory and sizes each call's context window
+
+    The configured models are loaded when the server starts and pinged every
+    ``ping_interval`` seconds they have not been used, so neither Ollama's
+    idle timeout nor another client's models leave them unloaded. Every call
+    passes ``keep_alive``.
+
+    ``num_ctx`` is chosen per call as the smallest power of two between
+    ``min_ctx`` and ``max_ctx`` that fits the prompt and its completion. Ollama
+    reloads a model whenever ``num_ctx`` changes, so a model's context only
+    ever grows while it stays loaded. ``num_predict`` scales with the text in
+    the prompt, up to the usual completion limit.
+
+    Loads slower than ``COLD_LOAD_SECONDS``, as reported by Ollama's
+    ``load_duration``, are counted as cold loads by model and cause.
+    """
+
+    def __init__(
+        self,
+        models: List[str],
+        keep_alive: str = "30m",
+        ping_interval: float = 600.0,
+        min_ctx: int = 2048,
+        max_ctx: int = 2048,
+    ):
+        self.models = [model for model in models if model]
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.max_ctx = max_ctx
+        self.min_ctx = min(min_ctx, max_ctx)
+        self._residency: Dict[str, ModelResidency] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def residency(self, model: str) -> ModelResidency:
+        if model not in self._residency:
+            self._residency[model] = ModelResidency()
+        return self._residency[model]
+
+    def options(self, model: str, prompt: str) -> Dict[str, Any]:
+        """Ollama ``options`` sized for ``prompt``, for a call to ``model``"""
+        prompt_tokens = len(prompt) // CHARS_PER_TOKEN
+        text_tokens = max(0, prompt_tokens - PROMPT_OVERHEAD_TOKENS)
+        # Addresses come from the text, so the answer is rarely longer than it
+        num_predict = min(
+            MAX_COMPLETION_TOKENS, max(MIN_PREDICT_TOKENS, text_tokens * 3 // 2)
+        )
+
+        needed = prompt_tokens + num_predict + CONTEXT_MARGIN_TOKENS
+        num_ctx = self.min_ctx
+        while num_ctx < needed and num_ctx < self.max_ctx:
+            num_ctx *= 2
+        num_ctx = min(num_ctx, self.max_ctx)
+
+        state = self.residency(model)
+        state.last_used = time.monotonic()
+        if state.loaded_at is not None and state.num_ctx:
+            num_ctx = max(num_ctx, state.num_ctx)
+        state.num_ctx = num_ctx
+        return {"temperature": 0.1, "num_ctx": num_ctx, "num_predict": num_predict}
+
+    def record(self, model: str, response: Dict[str, Any], cause: str = "request"):
+        """Note a finished generate call, counting it if the model had to load"""
+        state = self.residency(model)
+        state.loaded_at = state.loaded_at or time.monotonic()
+        load_seconds = response.get("load_duration", 0) / 1e9
+        if load_seconds < COLD_LOAD_SECONDS:
+            return
+
+        state.loaded_at = time.monotonic()
+        state.cold_loads += 1
+        state.last_load_seconds = load_seconds
+        metrics.inc("ollama_cold_loads_total", model=model, cause=cause)
+        metrics.observe("ollama_load_seconds", load_seconds, model=model)
+        logger.info(f"Ollama loaded {model} in {load_seconds:.1f}s ({cause})")
+
+    def forget(self, model: str):
+        """Stop assuming a model is loaded, e.g. after a failed call"""
+        self.residency(model).loaded_at = None
+
+    async def warm(self, load: Loader, model: str, cause: str) -> bool:
+        """Load ``model`` (or refresh its keep-alive) with an empty request"""
+        state = self.residency(model)
+        options = {"num_ctx": state.num_ctx or self.min_ctx}
+        state.last_used = time.monotonic()
+        try:
+            response = await load(model, options)
+        except Exception as e:
+            logger.info(f"Could not {cause} Ollama model {model}: {e}")
+            self.forget(model)
+            return False
+        state.num_ctx = options["num_ctx"]
+        self.record(model, response, cause)
+        return True
+
+    async def _keep_warm(self, load: Loader):
+        await asyncio.gather(*(self.warm(load, model, "warmup") for model in self.models))
+        if self.ping_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.ping_interval / 2)
+            now = time.monotonic()
+            for model in self.models:
+                # Recent traffic has already refreshed the keep-alive
+                if now - self.residency(model).last_used >= self.ping_interval:
+                    await self.warm(load, model, "ping")
+
+    def start(self, load: Loader):
+        """Load the configured models, then keep them loaded in the background"""
+        if self.models and (self._task is None or self._task.done()):
+            self._task = asyncio.create_task(self._keep_warm(load))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            model: {
+                "resident": state.loaded_at is not None,
+                "num_ctx": state.num_ctx,
+                "cold_loads": state.cold_loads,
+                "last_load_seconds": state.last_load_seconds,
+            }
+            for model, state in self._residency.items()
+        }
@@ -2,94 +2,244 @@
 Ollama provider implementation
 """
 
-from typing import List, Optional
-
-import requests
+import json
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional
 
 from ..utils.logger import setup_logger
 from .base_provider import BaseProvider
+from .model_residency import ModelResidencyManager
+
+if TYPE_CHECKING:
+    import httpx
+    import requests
 
 logger = setup_logger(__name__)
 
+PROBE_TIMEOUT = 5
+GENERATE_TIMEOUT = 120
+
 
 class OllamaProvider(BaseProvider):
     """Ollama provider for address extraction"""
 
+    supports_raw_prompts = True
+
     def __init__(self, config):
         super().__init__(config)
         self.base_url = config.get("base_url", "http://localhost:11434")
         self.default_model = config.get("default_model", "llama3.2:latest")
+        self.max_connections = config.get("max_connections", 16)
+        self.num_ctx = config.get("num_ctx", 2048)
+        self.residency = ModelResidencyManager(
+            models=config.get("warm_models", [self.default_model]),
+            keep_alive=config.get("keep_alive", "30m"),
+            ping_interval=config.get("keep_alive_interval", 600.0),
+            min_ctx=config.get("min_ctx", 2048),
+            max_ctx=self.num_ctx,
+        )
+
+        # Long-lived pools so repeated calls reuse keep-alive connections. Both
+        # are created on first use to keep the HTTP libraries out of startup.
+        self._session: Optional["requests.Session"] = None
+        self._client: Optional["httpx.AsyncClient"] = None
         logger.info(f"Ollama provider initialized with URL: {self.base_url}")
 
     @property
     def provider_name(self) -> str:
         return "ollama"
 
+    @property
+    def session(self) -> "requests.Session":
+        """Pooled sync HTTP session, created on first use"""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+        return self._session
+
+    @property
+    def client(self) -> "httpx.AsyncClient":
+        """Pooled async HTTP client, created on first use"""
+        if self._client is None or self._client.is_closed:
+            import httpx
+
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(GENERATE_TIMEOUT, connect=PROBE_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                    keepalive_expiry=60,
+                ),
+            )
+        return self._client
+
+    def preload(self):
+        import httpx  # noqa: F401
+
     def is_available(self) -> bool:
         try:
-            response = requests.get(f"{self.base_url}/api/version", timeout=5)
+            response = self.session.get(
+                f"{self.base_url}/api/version", timeout=PROBE_TIMEOUT
+            )
             response.raise_for_status()
             return True
-        except:
+        except Exception:
+            return False
+
+    async def ais_available(self) -> bool:
+        try:
+            response = await self.client.get("/api/version", timeout=PROBE_TIMEOUT)
+            response.raise_for_status()
+            return True
+        except Exception:
             return False
 
     def get_available_models(self) -> List[str]:
         try:
-            response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+            response = self.session.get(
+                f"{self.base_url}/api/tags", timeout=PROBE_TIMEOUT
+            )
             response.raise_for_status()
-            models = response.json().get("models", [])
-            model_names = [
-                model.get("name", "") for model in models if model.get("name")
-            ]
-            logger.info(f"Available Ollama models: {model_names}")
-            return model_names
+            return self._parse_model_names(response.json())
         except Exception as e:
             logger.error(f"Error fetching Ollama models: {e}")
             return []
 
-    def extract_addresses(self, text: str, model: Optional[str] = None) -> List[str]:
-        if not self.is_available():
-            logger.error("Ollama is not accessible")
+    async def aget_available_models(self) -> List[str]:
+        try:
+            response = await self.client.get("/api/tags", timeout=PROBE_TIMEOUT)
+            response.raise_for_status()
+            return self._parse_model_names(response.json())
+        except Exception as e:
+            logger.error(f"Error fetching Ollama models: {e}")
             return []
 
-        try:
-            model_name = model or self.default_model
-            available_models = self.get_available_models()
+    def _parse_model_names(self, data: Dict[str, Any]) -> List[str]:
+        models = data.get("models", [])
+        model_names = [model.get("name", "") for model in models if model.get("name")]
+        logger.info(f"Available Ollama models: {model_names}")
+        return model_names
+
+    def context_tokens(self, model: Optional[str] = None) -> int:
+        return self.num_ctx
+
+    def resolve_model(
+        self, model: Optional[str], available_models: Optional[List[str]] = None
+    ) -> str:
+        model_name = model or self.default_model
+        if available_models and model_name not in available_models:
+            logger.warning(
+                f"Model '{model_name}' not found. Using: {available_models[0]}"
+            )
+            model_name = available_models[0]
+        return model_name
+
+    def _build_payload(
+        self, prompt: str, model_name: str, stream: bool = False
+    ) -> Dict[str, Any]:
+        return {
+            "model": model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "keep_alive": self.residency.keep_alive,
+            "options": self.residency.options(model_name, prompt),
+        }
+
+    async def _aload(self, model_name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Load a model without generating, refreshing its keep-alive"""
+        response = await self.client.post(
+            "/api/generate",
+            json={
+                "model": model_name,
+                "keep_alive": self.residency.keep_alive,
+                "options": options,
+            },
+        )
+        response.raise_for_status()
+        return response.json()
 
-            if available_models and model_name not in available_models:
-                logger.warning(
-                    f"Model '{model_name}' not found. Using: {available_models[0]}"
-                )
-                model_name = (
-                    available_models[0] if available_models else self.default_model
-                )
+    async def astart(self):
+        self.residency.start(self._aload)
 
-            prompt = self.get_address_extraction_prompt(text)
+    def runtime_stats(self) -> Dict[str, Any]:
+        return {"models": self.residency.stats()}
 
-            payload = {
-                "model": model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0.1, "num_predict": 500},
-            }
+    def extract_addresses(self, text: str, model: Optional[str] = None) -> List[str]:
+        model_name = self.resolve_model(model)
+        try:
+            prompt = self.get_address_extraction_prompt(text)
 
-            response = requests.post(
-                f"{self.base_url}/api/generate", json=payload, timeout=120
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json=self._build_payload(prompt, model_name),
+                timeout=GENERATE_TIMEOUT,
             )
             response.raise_for_status()
+            data = response.json()
+            self.residency.record(model_name, data)
 
-            result = response.json()
-            addresses_text = result.get("response", "").strip()
-
-            if not addresses_text or addresses_text == "No addresses found":
-                return []
-
-            addresses = [
-                addr.strip() for addr in addresses_text.split("\n") if addr.strip()
-            ]
+            addresses = self.parse_addresses(data.get("response", ""))
             logger.info(f"Ollama ({model_name}) found {len(addresses)} addresses")
             return addresses
 
         except Exception as e:
             logger.error(f"Error with Ollama address extraction: {e}")
+            self.residency.forget(model_name)
             return []
+
+    async def acomplete(self, prompt: str, model: Optional[str] = None) -> str:
+        model_name = model or self.default_model
+        try:
+            response = await self.client.post(
+                "/api/generate", json=self._build_payload(prompt, model_name)
+            )
+            response.raise_for_status()
+        except Exception:
+            self.residency.forget(model_name)
+            raise
+        data = response.json()
+        self.residency.record(model_name, data)
+        return data.get("response", "")
+
+    async def astream_complete(
+        self, prompt: str, model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        model_name = model or self.default_model
+        async with self.client.stream(
+            "POST",
+            "/api/generate",
+            json=self._build_payload(prompt, model_name, stream=True),
+        ) as response:
+            response.raise_for_status()
+            # Ollama streams one JSON object per line
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                yield chunk.get("response", "")
+                if chunk.get("done"):
+                    # Timings, including the model load, come with the last chunk
+                    self.residency.record(model_name, chunk)
+                    break
+
+    async def aextract_addresses(
+        self, text: str, model: Optional[str] = None
+    ) -> List[str]:
+        model_name = self.resolve_model(model)
+        prompt = self.get_address_extraction_prompt(text)
+
+        addresses = self.parse_addresses(await self.acomplete(prompt, model_name))
+        logger.info(f"Ollama ({model_name}) found {len(addresses)} addresses")
+        return addresses
+
+    async def aclose(self):
+        await self.residency.stop()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
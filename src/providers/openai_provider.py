@@ -2,40 +2,90 @@
 OpenAI provider implementation
 """
 
-from typing import List, Optional
-
-from openai import OpenAI
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional
 
 from ..utils.logger import setup_logger
-from .base_provider import BaseProvider
+from .base_provider import MAX_COMPLETION_TOKENS, BaseProvider
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI, OpenAI
 
 logger = setup_logger(__name__)
 
+CONTEXT_TOKENS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo-preview": 128000,
+}
+
 
 class OpenAIProvider(BaseProvider):
     """OpenAI provider for address extraction"""
 
+    supports_raw_prompts = True
+
     def __init__(self, config):
         super().__init__(config)
-        self.client = None
+        self._client: Optional["OpenAI"] = None
+        self._async_client: Optional["AsyncOpenAI"] = None
         self.default_model = "gpt-3.5-turbo"
 
         if self.is_available():
-            self.client = OpenAI(api_key=config.get("api_key"))
             logger.info("OpenAI provider initialized")
 
     @property
     def provider_name(self) -> str:
         return "openai"
 
+    # The openai package takes most of a second to import, so the clients are
+    # created on first use. Both keep a pooled keep-alive HTTP connection.
+
+    @property
+    def client(self) -> Optional["OpenAI"]:
+        if self._client is None and self.is_available():
+            from openai import OpenAI
+
+            self._client = OpenAI(api_key=self.config.get("api_key"))
+        return self._client
+
+    @property
+    def async_client(self) -> Optional["AsyncOpenAI"]:
+        if self._async_client is None and self.is_available():
+            from openai import AsyncOpenAI
+
+            self._async_client = AsyncOpenAI(api_key=self.config.get("api_key"))
+        return self._async_client
+
+    def preload(self):
+        if self.is_available():
+            import openai  # noqa: F401
+
     def is_available(self) -> bool:
         return bool(self.config.get("api_key"))
 
+    async def ais_available(self) -> bool:
+        return self.is_available()
+
     def get_available_models(self) -> List[str]:
         if not self.is_available():
             return []
         return ["gpt-3.5-turbo", "gpt-4", "gpt-4-turbo-preview"]
 
+    async def aget_available_models(self) -> List[str]:
+        return self.get_available_models()
+
+    def context_tokens(self, model: Optional[str] = None) -> int:
+        return CONTEXT_TOKENS.get(model or self.default_model, 8192)
+
+    def _build_messages(self, prompt: str) -> List[Dict[str, str]]:
+        return [
+            {
+                "role": "system",
+                "content": "You are a precise address extraction agent.",
+            },
+            {"role": "user", "content": prompt},
+        ]
+
     def extract_addresses(self, text: str, model: Optional[str] = None) -> List[str]:
         if not self.client:
             logger.error("OpenAI client not initialized")
@@ -47,28 +97,54 @@ class OpenAIProvider(BaseProvider):
 
             response = self.client.chat.completions.create(
                 model=model_name,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a precise address extraction agent.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
+                messages=self._build_messages(prompt),
                 temperature=0.1,
-                max_tokens=500,
+                max_tokens=MAX_COMPLETION_TOKENS,
             )
 
-            addresses_text = response.choices[0].message.content.strip()
-
-            if addresses_text == "No addresses found":
-                return []
-
-            addresses = [
-                addr.strip() for addr in addresses_text.split("\n") if addr.strip()
-            ]
+            addresses = self.parse_addresses(response.choices[0].message.content)
             logger.info(f"OpenAI found {len(addresses)} addresses")
             return addresses
 
         except Exception as e:
             logger.error(f"Error with OpenAI address extraction: {e}")
             return []
+
+    async def acomplete(self, prompt: str, model: Optional[str] = None) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=model or self.default_model,
+            messages=self._build_messages(prompt),
+            temperature=0.1,
+            max_tokens=MAX_COMPLETION_TOKENS,
+        )
+        return response.choices[0].message.content or ""
+
+    async def astream_complete(
+        self, prompt: str, model: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        stream = await self.async_client.chat.completions.create(
+            model=model or self.default_model,
+            messages=self._build_messages(prompt),
+            temperature=0.1,
+            max_tokens=MAX_COMPLETION_TOKENS,
+            stream=True,
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    async def aextract_addresses(
+        self, text: str, model: Optional[str] = None
+    ) -> List[str]:
+        if not self.async_client:
+            raise RuntimeError("OpenAI client not initialized")
+
+        prompt = self.get_address_extraction_prompt(text)
+        addresses = self.parse_addresses(await self.acomplete(prompt, model))
+        logger.info(f"OpenAI found {len(addresses)} addresses")
+        return addresses
+
+    async def aclose(self):
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
@@ -2,15 +2,36 @@
 Factory for creating AI providers
 """
 
-from typing import List, Optional
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar, Union
 
+from ..cache.near_duplicate import NearDuplicateIndex
+from ..cache.result_cache import ResultCache
+from ..processors.candidates import select_candidate_text
+from ..processors.chunker import (
+    merge_addresses,
+    normalize_address,
+    pack_documents,
+    split_into_chunks,
+)
 from ..utils.logger import setup_logger
-from .base_provider import BaseProvider
+from ..utils.metrics import STAGE_SECONDS, metrics
+from .base_provider import PROMPT_VERSION, BaseProvider, ProviderError, estimate_tokens
+from .circuit_breaker import AdaptiveTimeout, CircuitBreaker
+from .local_provider import LocalProvider
 from .ollama_provider import OllamaProvider
 from .openai_provider import OpenAIProvider
+from .provider_registry import ProviderRegistry
+from .scheduler import BATCH, INTERACTIVE, ProviderScheduler
 
 logger = setup_logger(__name__)
 
+# Called with each address as soon as it is found when streaming
+AddressCallback = Callable[[str], Awaitable[None]]
+
+T = TypeVar("T")
+
 
 class ProviderFactory:
     """Factory class for creating and managing AI providers"""
@@ -19,29 +40,48 @@ class ProviderFactory:
         self.config = config
         self.providers = {}
         self._initialize_providers()
+        self.registry = ProviderRegistry(
+            self.providers, ttl=config.registry_config["ttl"]
+        )
+        self.result_cache = ResultCache(
+            max_entries=config.cache_config["max_entries"],
+            ttl=config.cache_config["ttl"],
+            path=config.cache_config["path"],
+            max_disk_entries=config.cache_config["max_disk_entries"],
+        )
+        self.near_duplicates = NearDuplicateIndex(**config.near_duplicate_config)
+        self.scheduler = ProviderScheduler(config.scheduler_config)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._timeouts: Dict[str, AdaptiveTimeout] = {}
+        self._startup: Optional[asyncio.Task] = None
 
     def _initialize_providers(self):
-        """Initialize all available providers"""
+        """Register the configured providers
+
+        Nothing is probed here: the registry checks which providers are up in
+        the background once the server runs, so startup never waits on a
+        provider that is down.
+        """
 
         # OpenAI Provider
         if self.config.openai_config.get("api_key"):
             try:
                 self.providers["openai"] = OpenAIProvider(self.config.openai_config)
-                if self.providers["openai"].is_available():
-                    logger.info("OpenAI provider registered")
+                logger.info("OpenAI provider registered")
             except Exception as e:
                 logger.error(f"Failed to initialize OpenAI provider: {e}")
 
         # Ollama Provider
         try:
             self.providers["ollama"] = OllamaProvider(self.config.ollama_config)
-            if self.providers["ollama"].is_available():
-                logger.info("Ollama provider registered")
-            else:
-                logger.warning("Ollama provider not available")
+            logger.info("Ollama provider registered")
         except Exception as e:
             logger.error(f"Failed to initialize Ollama provider: {e}")
 
+        # Local rule-based provider (registered last so LLMs stay preferred in auto mode)
+        self.providers["local"] = LocalProvider(self.config.local_config)
+        logger.info("Local provider registered")
+
     def get_provider(self, provider_name: str) -> Optional[BaseProvider]:
         """Get a specific provider by name"""
         provider = self.providers.get(provider_name)
@@ -83,3 +123,742 @@ class ProviderFactory:
 
         addresses = provider.extract_addresses(text, model)
         return addresses, provider.provider_name
+
+    async def aget_provider(self, provider_name: str) -> Optional[BaseProvider]:
+        """Get a specific provider by name from the cached registry state"""
+        await self.registry.ensure_fresh(provider_name)
+        if self.registry.is_available(provider_name):
+            return self.providers[provider_name]
+        return None
+
+    async def aget_available_providers(self) -> List[str]:
+        """Get list of available provider names from the cached registry state"""
+        await self.registry.ensure_all_fresh()
+        return [name for name in self.providers if self.registry.is_available(name)]
+
+    async def aget_best_available_provider(self) -> Optional[BaseProvider]:
+        """Get the best available provider (OpenAI first, then others)"""
+        candidates = await self._aauto_candidates()
+        return candidates[0] if candidates else None
+
+    async def _aauto_candidates(self) -> List[BaseProvider]:
+        """Available providers in auto preference order, skipping open circuits"""
+        await self.registry.ensure_all_fresh()
+        names = sorted(self.providers, key=lambda name: name != "openai")
+        return [
+            self.providers[name]
+            for name in names
+            if self.registry.is_available(name) and not self.breaker(name).is_open()
+        ]
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        """Get the circuit breaker of a provider"""
+        if name not in self._breakers:
+            self._breakers[name] = CircuitBreaker(name, **self.config.breaker_config)
+        return self._breakers[name]
+
+    def timeouts(self, name: str) -> AdaptiveTimeout:
+        """Get the adaptive call timeouts of a provider"""
+        if name not in self._timeouts:
+            self._timeouts[name] = AdaptiveTimeout(**self.config.timeout_config)
+        return self._timeouts[name]
+
+    def circuit_states(self) -> Dict[str, str]:
+        return {name: self.breaker(name).state for name in self.providers}
+
+    def provider_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Runtime figures of the providers that report any"""
+        stats = {name: provider.runtime_stats() for name, provider in self.providers.items()}
+        return {name: value for name, value in stats.items() if value}
+
+    async def aextract_addresses(
+        self,
+        text: str,
+        provider_name: str = "auto",
+        model: Optional[str] = None,
+        cache_mode: str = "use",
+        on_address: Optional[AddressCallback] = None,
+    ) -> tuple[List[str], str]:
+        """Extract addresses using specified provider without blocking the event loop
+
+        ``cache_mode`` is ``use`` to read and write the result cache, ``refresh``
+        to skip the lookup but store the new result, or ``bypass`` to skip the
+        cache entirely. When ``on_address`` is given, the provider output is
+        streamed and the callback is awaited with each address as it is found.
+
+        Raises ProviderError when the provider fails, times out or has an open
+        circuit. In auto mode the next provider is tried first.
+
+        Documents nearly identical to one extracted before with the same
+        provider and model, such as template pages differing in ads or
+        timestamps, reuse its verified addresses without a provider call.
+        """
+        scope = f"{provider_name}/{model or ''}"
+        if cache_mode == "use":
+            match = await self.near_duplicates.alookup(text, scope)
+            if match is not None:
+                await self._emit_all(match.addresses, on_address)
+                return match.addresses, match.provider
+
+        addresses, used_provider = await self._aextract_routed(
+            text, provider_name, model, cache_mode, on_address
+        )
+        if cache_mode != "bypass" and used_provider not in ("local", "none"):
+            await self.near_duplicates.aadd(text, scope, addresses, used_provider)
+        return addresses, used_provider
+
+    async def _aextract_routed(
+        self,
+        text: str,
+        provider_name: str,
+        model: Optional[str],
+        cache_mode: str,
+        on_address: Optional[AddressCallback],
+    ) -> tuple[List[str], str]:
+        """Send a document to the requested provider, or down the auto list"""
+        if provider_name == "auto":
+            if self.config.local_config["auto_first"]:
+                addresses = await self._aextract_locally_if_confident(text)
+                if addresses is not None:
+                    await self._emit_all(addresses, on_address)
+                    return addresses, "local"
+            return await self._aextract_auto(text, model, cache_mode, on_address)
+
+        provider = await self._aselect_provider(provider_name)
+        if not provider:
+            raise ProviderError(provider_name, "not available", "unavailable")
+
+        model_name = provider.resolve_model(
+            model, self.registry.models(provider.provider_name)
+        )
+        addresses = await self._aextract_document(
+            provider, text, model_name, cache_mode, on_address
+        )
+        return addresses, provider.provider_name
+
+    async def aextract_addresses_batch(
+        self,
+        texts: List[str],
+        provider_name: str = "auto",
+        model: Optional[str] = None,
+        cache_mode: str = "use",
+    ) -> tuple[List[Union[List[str], ProviderError]], str]:
+        """Extract addresses from many documents, packing small ones into shared prompts
+
+        Documents are packed greedily into groups that fit the prompt budget
+        and each group costs one provider call. Documents missing from a packed
+        response, and documents too large to pack, are extracted on their own.
+        Documents whose provider call failed get the ProviderError instead of
+        an address list.
+
+        As in ``aextract_addresses``, near duplicates of earlier documents
+        reuse their addresses. Near duplicates of another document in the
+        batch, such as crawled pages sharing a template, wait for its result
+        and are then looked up rather than extracted.
+        """
+        results: List[Union[None, List[str], ProviderError]] = [None] * len(texts)
+        used_provider = "local"
+        scope = f"{provider_name}/{model or ''}"
+
+        if cache_mode == "use":
+            for i, text in enumerate(texts):
+                match = await self.near_duplicates.alookup(text, scope)
+                if match is not None:
+                    results[i] = match.addresses
+                    used_provider = match.provider
+
+        if provider_name == "auto" and self.config.local_config["auto_first"]:
+            for i, text in enumerate(texts):
+                if results[i] is None:
+                    results[i] = await self._aextract_locally_if_confident(text)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results, used_provider
+
+        provider = await self._aselect_provider(provider_name)
+        if not provider:
+            if provider_name == "auto":
+                return [result or [] for result in results], "none"
+            error = ProviderError(provider_name, "not available", "unavailable")
+            return [error if result is None else result for result in results], provider_name
+
+        used_provider = provider.provider_name
+        model_name = provider.resolve_model(model, self.registry.models(used_provider))
+
+        repeats: List[int] = []
+        if cache_mode == "use":
+            first, repeats = await self.near_duplicates.asplit_repeats(
+                [texts[i] for i in pending]
+            )
+            repeats = [pending[i] for i in repeats]
+            pending = [pending[i] for i in first]
+
+        await self._aextract_pending(provider, model_name, texts, pending, results, cache_mode)
+        await self._index_batch(texts, pending, results, scope, used_provider, cache_mode)
+        if repeats:
+            for i in repeats:
+                match = await self.near_duplicates.alookup(texts[i], scope)
+                if match is not None:
+                    results[i] = match.addresses
+            missed = [i for i in repeats if results[i] is None]
+            await self._aextract_pending(
+                provider, model_name, texts, missed, results, cache_mode
+            )
+            await self._index_batch(texts, missed, results, scope, used_provider, cache_mode)
+        return results, used_provider
+
+    async def _index_batch(
+        self,
+        texts: List[str],
+        indices: List[int],
+        results: List[Union[None, List[str], ProviderError]],
+        scope: str,
+        provider_name: str,
+        cache_mode: str,
+    ):
+        """Add extracted batch documents to the near-duplicate index"""
+        if cache_mode == "bypass" or provider_name in ("local", "none"):
+            return
+        for i in indices:
+            if isinstance(results[i], list):
+                await self.near_duplicates.aadd(texts[i], scope, results[i], provider_name)
+
+    async def _aextract_pending(
+        self,
+        provider: BaseProvider,
+        model_name: Optional[str],
+        texts: List[str],
+        pending: List[int],
+        results: List[Union[None, List[str], ProviderError]],
+        cache_mode: str,
+    ):
+        """Extract the ``pending`` documents of a batch into ``results``, packing small ones"""
+        budget = min(
+            provider.max_input_chars(model_name),
+            self.config.batch_config["max_batch_chars"],
+        )
+        max_documents = self.config.batch_config["max_documents"]
+        if not provider.supports_raw_prompts:
+            max_documents = 1
+
+        prompt_texts = {}
+        for i in pending:
+            selected = self._candidate_text(provider, texts[i])
+            if selected:
+                prompt_texts[i] = selected
+            else:
+                results[i] = []
+        pending = [i for i in pending if i in prompt_texts]
+        if not pending:
+            return
+
+        groups = pack_documents(
+            [len(prompt_texts[i]) for i in pending], budget, max_documents
+        )
+        fan_out = asyncio.Semaphore(self.config.batch_config["fan_out"])
+        logger.info(
+            f"Packed {len(pending)} documents into {len(groups)} prompts for "
+            f"{provider.provider_name}"
+        )
+
+        async def extract_group(group: List[int]):
+            indices = [pending[i] for i in group]
+            async with fan_out:
+                if len(indices) == 1:
+                    packed = [None]
+                else:
+                    try:
+                        packed = await self._aextract_packed(
+                            provider,
+                            [prompt_texts[i] for i in indices],
+                            model_name,
+                            cache_mode,
+                            priority=BATCH,
+                        )
+                    except ProviderError as e:
+                        packed = [e] * len(indices)
+                for index, addresses in zip(indices, packed):
+                    results[index] = addresses
+
+            missing = [index for index in indices if results[index] is None]
+            singles = await asyncio.gather(
+                *(
+                    self._aextract_document(
+                        provider,
+                        prompt_texts[index],
+                        model_name,
+                        cache_mode,
+                        priority=BATCH,
+                        select_candidates=False,
+                    )
+                    for index in missing
+                ),
+                return_exceptions=True,
+            )
+            for index, addresses in zip(missing, singles):
+                if isinstance(addresses, BaseException) and not isinstance(
+                    addresses, ProviderError
+                ):
+                    raise addresses
+                results[index] = addresses
+
+        await asyncio.gather(*(extract_group(group) for group in groups))
+
+    async def _aextract_auto(
+        self,
+        text: str,
+        model: Optional[str],
+        cache_mode: str,
+        on_address: Optional[AddressCallback],
+    ) -> tuple[List[str], str]:
+        """Extract with the preferred provider, falling back down the list on errors
+
+        With hedging enabled, the first two LLM providers are raced. The local
+        rule provider is never a hedge, as it is not a substitute for a model
+        answer, but it is the last fallback. Streaming requests are neither
+        hedged nor retried, so addresses are never reported twice.
+        """
+        candidates = await self._aauto_candidates()
+        if not candidates:
+            logger.error("No providers available")
+            return [], "none"
+
+        first = candidates[0]
+        error: Optional[ProviderError] = None
+        llms = [p for p in candidates if p.provider_name != "local"]
+        if self.config.hedging_config["enabled"] and on_address is None and len(llms) > 1:
+            tried: List[BaseProvider] = []
+            try:
+                return await self._aextract_hedged(text, llms[:2], model, cache_mode, tried)
+            except ProviderError as e:
+                error = e
+                candidates = [p for p in candidates if p not in tried]
+
+        for provider in candidates:
+            # An explicit model only applies to the provider it was meant for
+            model_name = provider.resolve_model(
+                model if provider is first else None,
+                self.registry.models(provider.provider_name),
+            )
+            try:
+                addresses = await self._aextract_document(
+                    provider, text, model_name, cache_mode, on_address
+                )
+                return addresses, provider.provider_name
+            except ProviderError as e:
+                if on_address:
+                    raise
+                logger.warning(f"{e}; trying the next provider")
+                metrics.inc("auto_fallbacks_total", provider=provider.provider_name)
+                error = e
+
+        raise error
+
+    def _hedge_delay(self, provider: BaseProvider, model_name: Optional[str]) -> float:
+        """Seconds to wait on the primary before hedging, from its latency history"""
+        hedging = self.config.hedging_config
+        histogram = metrics.histogram(
+            STAGE_SECONDS, stage="provider_call", **self._call_labels(provider, model_name)
+        )
+        if histogram is None or histogram.count < hedging["min_samples"]:
+            return hedging["default_delay"]
+        return max(hedging["min_delay"], histogram.quantile(hedging["percentile"]))
+
+    async def _aextract_hedged(
+        self,
+        text: str,
+        candidates: List[BaseProvider],
+        model: Optional[str],
+        cache_mode: str,
+        tried: List[BaseProvider],
+    ) -> tuple[List[str], str]:
+        """Extract with the primary, hedging to the backup if it is slow
+
+        The backup is started once the primary has been running longer than
+        its percentile delay, or as soon as the primary fails. The first
+        successful answer wins and the other request is cancelled. A failing
+        request leaves the other one to finish. Providers that were called
+        are appended to ``tried``.
+        """
+        primary, backup = candidates
+
+        def start(provider: BaseProvider) -> asyncio.Task:
+            tried.append(provider)
+            model_name = provider.resolve_model(
+                model if provider is primary else None,
+                self.registry.models(provider.provider_name),
+            )
+            return asyncio.create_task(
+                self._aextract_document(provider, text, model_name, cache_mode)
+            )
+
+        primary_model = primary.resolve_model(
+            model, self.registry.models(primary.provider_name)
+        )
+        tasks = {start(primary): primary}
+        pending = set(tasks)
+        error: Optional[BaseException] = None
+        try:
+            done, _ = await asyncio.wait(
+                pending, timeout=self._hedge_delay(primary, primary_model)
+            )
+            hedged = not done
+            failed = [task.exception() for task in done if task.exception() is not None]
+            if failed:
+                logger.warning(f"{failed[0]}; trying {backup.provider_name}")
+                metrics.inc("auto_fallbacks_total", provider=primary.provider_name)
+            elif hedged:
+                logger.info(
+                    f"{primary.provider_name} is slow, hedging with {backup.provider_name}"
+                )
+                metrics.inc(
+                    "hedges_total",
+                    primary=primary.provider_name,
+                    backup=backup.provider_name,
+                )
+            if hedged or failed:
+                backup_task = start(backup)
+                tasks[backup_task] = backup
+                pending.add(backup_task)
+
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                        continue
+                    winner = tasks[task]
+                    if hedged:
+                        role = "primary" if winner is primary else "backup"
+                        metrics.inc("hedge_wins_total", winner=role)
+                    return task.result(), winner.provider_name
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        raise error
+
+    async def _aselect_provider(self, provider_name: str) -> Optional[BaseProvider]:
+        """Resolve a provider name, or ``auto``, to an available provider"""
+        if provider_name == "auto":
+            provider = await self.aget_best_available_provider()
+            if not provider:
+                logger.error("No providers available")
+        else:
+            provider = await self.aget_provider(provider_name)
+            if not provider:
+                logger.error(f"Provider '{provider_name}' not available")
+        return provider
+
+    async def _aextract_document(
+        self,
+        provider: BaseProvider,
+        text: str,
+        model_name: Optional[str],
+        cache_mode: str,
+        on_address: Optional[AddressCallback] = None,
+        priority: int = INTERACTIVE,
+        select_candidates: bool = True,
+    ) -> List[str]:
+        """Extract addresses from one document, chunking it if it is too long
+
+        The document is first narrowed to its candidate windows unless
+        ``select_candidates`` is false, e.g. because the caller already did.
+        """
+        if select_candidates:
+            text = self._candidate_text(provider, text)
+            if not text:
+                return []
+
+        chunk_size = min(
+            provider.max_input_chars(model_name),
+            self.config.chunking_config["max_chunk_chars"],
+        )
+
+        if self.config.chunking_config["enabled"] and len(text) > chunk_size:
+            return await self._aextract_chunked(
+                provider, text, model_name, cache_mode, chunk_size, on_address, priority
+            )
+        return await self._aextract_cached(
+            provider, text, model_name, cache_mode, on_address, priority
+        )
+
+    def _candidate_text(self, provider: BaseProvider, text: str) -> str:
+        """Narrow a document to the windows around likely address parts
+
+        Returns an empty string when nothing in the document looks like part
+        of an address, in which case no provider call is needed. The local
+        provider scans the whole text itself, so it gets the document as is.
+        """
+        candidates = self.config.candidate_config
+        if not candidates["enabled"] or provider.provider_name == "local":
+            return text
+
+        with metrics.timer(stage="candidates"):
+            selected = select_candidate_text(
+                text, candidates["context"], candidates["max_coverage"]
+            )
+        if not selected:
+            outcome = "skipped"
+        elif len(selected) < len(text):
+            outcome = "windowed"
+            metrics.inc("candidate_chars_saved_total", len(text) - len(selected))
+        else:
+            outcome = "full"
+        metrics.inc("candidate_selections_total", outcome=outcome)
+        return selected
+
+    async def _aextract_packed(
+        self,
+        provider: BaseProvider,
+        texts: List[str],
+        model_name: Optional[str],
+        cache_mode: str,
+        priority: int = INTERACTIVE,
+    ) -> List[Optional[List[str]]]:
+        """Extract addresses from several documents with one packed prompt
+
+        Returns ``None`` for documents the response did not cover.
+        """
+        name = provider.provider_name
+        keys = [
+            ResultCache.make_key(text, name, model_name, PROMPT_VERSION)
+            for text in texts
+        ]
+        results: List[Optional[List[str]]] = [None] * len(texts)
+
+        if cache_mode == "use":
+            for i, key in enumerate(keys):
+                results[i] = await self.result_cache.aget(key)
+
+        uncached = [i for i, result in enumerate(results) if result is None]
+        if len(uncached) < 2:
+            # Nothing left worth packing; the caller extracts leftovers singly
+            return results
+
+        prompt = provider.get_batch_extraction_prompt([texts[i] for i in uncached])
+        response = await self._acall(
+            provider,
+            model_name,
+            len(prompt),
+            "batch",
+            lambda: provider.acomplete(prompt, model_name),
+            priority,
+        )
+
+        parsed = provider.parse_batch_addresses(response, len(uncached))
+        for i, addresses in zip(uncached, parsed):
+            results[i] = addresses
+            if addresses is not None and cache_mode != "bypass":
+                await self.result_cache.aset(keys[i], addresses)
+
+        return results
+
+    async def _aextract_chunked(
+        self,
+        provider: BaseProvider,
+        text: str,
+        model_name: Optional[str],
+        cache_mode: str,
+        chunk_size: int,
+        on_address: Optional[AddressCallback] = None,
+        priority: int = INTERACTIVE,
+    ) -> List[str]:
+        """Map extraction over overlapping chunks concurrently and merge the results"""
+        chunks = split_into_chunks(
+            text, chunk_size, self.config.chunking_config["overlap"]
+        )
+        fan_out = asyncio.Semaphore(self.config.chunking_config["fan_out"])
+        logger.info(
+            f"Split {len(text)} characters into {len(chunks)} chunks for {provider.provider_name}"
+        )
+
+        emit_chunk_address = None
+        if on_address:
+            emitted = set()
+
+            # Chunks overlap, so only forward the first copy of each address
+            async def emit_chunk_address(address: str):
+                key = normalize_address(address)
+                if key not in emitted:
+                    emitted.add(key)
+                    await on_address(address)
+
+        async def extract_chunk(chunk: str) -> List[str]:
+            async with fan_out:
+                return await self._aextract_cached(
+                    provider, chunk, model_name, cache_mode, emit_chunk_address, priority
+                )
+
+        tasks = [asyncio.ensure_future(extract_chunk(chunk)) for chunk in chunks]
+        try:
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # One failed chunk fails the document; stop the rest
+            for task in tasks:
+                task.cancel()
+            raise
+        return merge_addresses(results)
+
+    async def _aextract_cached(
+        self,
+        provider: BaseProvider,
+        text: str,
+        model_name: Optional[str],
+        cache_mode: str,
+        on_address: Optional[AddressCallback] = None,
+        priority: int = INTERACTIVE,
+    ) -> List[str]:
+        """Extract addresses with one provider call, going through the result cache"""
+        name = provider.provider_name
+        cache_key = ResultCache.make_key(text, name, model_name, PROMPT_VERSION)
+
+        if cache_mode == "use":
+            cached = await self.result_cache.aget(cache_key)
+            if cached is not None:
+                logger.info(f"Result cache hit for {name} ({model_name})")
+                await self._emit_all(cached, on_address)
+                return cached
+
+        async def call() -> List[str]:
+            if not on_address:
+                return await provider.aextract_addresses(text, model_name)
+            addresses = []
+            async for address in provider.astream_addresses(text, model_name):
+                addresses.append(address)
+                await on_address(address)
+            return addresses
+
+        # A failed call raises, so partial streamed results are never cached
+        addresses = await self._acall(
+            provider, model_name, len(text), "single", call, priority
+        )
+
+        labels = self._call_labels(provider, model_name)
+        metrics.inc("provider_input_chars_total", len(text), **labels)
+        metrics.inc("addresses_found_total", len(addresses), **labels)
+
+        if cache_mode != "bypass":
+            await self.result_cache.aset(cache_key, addresses)
+
+        return addresses
+
+    async def _acall(
+        self,
+        provider: BaseProvider,
+        model_name: Optional[str],
+        chars: int,
+        kind: str,
+        call: Callable[[], Awaitable[T]],
+        priority: int = INTERACTIVE,
+    ) -> T:
+        """Run one provider call behind its circuit breaker, scheduler and timeout
+
+        The call first waits for a slot in its provider/model lane; queueing
+        time does not count towards the timeout. Every failure, including a
+        rejected call, is raised as ProviderError.
+        """
+        name = provider.provider_name
+        labels = self._call_labels(provider, model_name)
+        breaker = self.breaker(name)
+        timeouts = self.timeouts(name)
+
+        if not breaker.allow():
+            metrics.inc("provider_calls_total", status="rejected", kind=kind, **labels)
+            raise ProviderError(
+                name,
+                f"circuit open, retrying in {breaker.retry_after():.0f}s",
+                "circuit_open",
+            )
+
+        tokens = estimate_tokens(chars)
+        timeout = timeouts.timeout(model_name, chars)
+        try:
+            async with self.scheduler.slot(name, model_name, tokens, priority):
+                start = time.perf_counter()
+                result = await asyncio.wait_for(call(), timeout)
+        except asyncio.CancelledError:
+            # E.g. the losing side of a hedge; says nothing about the provider
+            breaker.release()
+            raise
+        except asyncio.TimeoutError as e:
+            logger.error(f"{name} address extraction timed out after {timeout:.1f}s")
+            metrics.inc("provider_calls_total", status="timeout", kind=kind, **labels)
+            breaker.record_failure()
+            # Count the timeout as a slow sample so the limit backs off
+            timeouts.observe(model_name, chars, timeout)
+            self.registry.mark_failure(name, e)
+            raise ProviderError(name, f"timed out after {timeout:.1f}s", "timeout") from e
+        except Exception as e:
+            logger.error(f"Error with {name} address extraction: {e}")
+            metrics.inc("provider_calls_total", status="error", kind=kind, **labels)
+            breaker.record_failure()
+            self.registry.mark_failure(name, e)
+            raise ProviderError(name, str(e) or type(e).__name__) from e
+
+        elapsed = time.perf_counter() - start
+        breaker.record_success()
+        timeouts.observe(model_name, chars, elapsed)
+        metrics.observe(STAGE_SECONDS, elapsed, stage="provider_call", **labels)
+        metrics.inc("provider_calls_total", status="ok", kind=kind, **labels)
+        return result
+
+    @staticmethod
+    def _call_labels(provider: BaseProvider, model_name: Optional[str]):
+        return {"provider": provider.provider_name, "model": model_name or "default"}
+
+    @staticmethod
+    async def _emit_all(addresses: List[str], on_address: Optional[AddressCallback]):
+        if on_address:
+            for address in addresses:
+                await on_address(address)
+
+    async def _aextract_locally_if_confident(self, text: str) -> Optional[List[str]]:
+        """Run the local extractor, returning None when an LLM should decide"""
+        addresses, confidence = await self.providers["local"].aextract_with_confidence(text)
+        if confidence >= self.config.local_config["min_confidence"]:
+            logger.info(f"Local extraction accepted with confidence {confidence:.2f}")
+            metrics.inc("local_first_total", outcome="accepted")
+            return addresses
+
+        logger.info(f"Local confidence {confidence:.2f} too low, falling back to LLM")
+        metrics.inc("local_first_total", outcome="fallback")
+        return None
+
+    def start(self):
+        """Begin background start-up: preload client libraries, then probe providers"""
+        if self._startup is None:
+            self._startup = asyncio.create_task(self._astart())
+
+    async def _astart(self):
+        # Importing client libraries on the event loop would stall early requests
+        for provider in self.providers.values():
+            try:
+                await asyncio.to_thread(provider.preload)
+            except Exception as e:
+                logger.error(f"Error preloading provider {provider.provider_name}: {e}")
+        self.registry.start()
+        for provider in self.providers.values():
+            try:
+                await provider.astart()
+            except Exception as e:
+                logger.error(f"Error starting provider {provider.provider_name}: {e}")
+
+    async def aclose(self):
+        """Stop background probing and close pooled provider connections"""
+        if self._startup is not None:
+            self._startup.cancel()
+            await asyncio.gather(self._startup, return_exceptions=True)
+            self._startup = None
+        await self.registry.stop()
+        self.result_cache.close()
+        for provider in self.providers.values():
+            try:
+                await provider.aclose()
+            except Exception as e:
+                logger.error(f"Error closing provider {provider.provider_name}: {e}")
@@ -0,0 +1,134 @@
+"""
+Cached provider health and model registry
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from ..utils.logger import setup_logger
+from .base_provider import BaseProvider
+
+logger = setup_logger(__name__)
+
+
+@dataclass
+class ProviderStatus:
+    """Last known liveness and model list of a provider"""
+
+    available: bool = False
+    models: List[str] = field(default_factory=list)
+    checked_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+
+class ProviderRegistry:
+    """Tracks provider liveness and models so the request path never probes
+
+    Statuses are refreshed by a background task every ``ttl`` seconds, and on
+    demand after a provider call fails. Reads only probe a provider that has
+    never been checked; stale entries are served as-is while a refresh runs
+    in the background.
+    """
+
+    def __init__(self, providers: Dict[str, BaseProvider], ttl: float = 30.0):
+        self.providers = providers
+        self.ttl = ttl
+        self._status: Dict[str, ProviderStatus] = {}
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def status(self, name: str) -> ProviderStatus:
+        """Get the cached status of a provider"""
+        return self._status.get(name, ProviderStatus())
+
+    def is_available(self, name: str) -> bool:
+        return name in self.providers and self.status(name).available
+
+    def models(self, name: str) -> List[str]:
+        return list(self.status(name).models)
+
+    def is_stale(self, name: str) -> bool:
+        checked_at = self.status(name).checked_at
+        return checked_at is None or time.monotonic() - checked_at > self.ttl
+
+    async def ensure_fresh(self, name: str):
+        """Make sure a status exists, refreshing stale ones in the background"""
+        if name not in self.providers:
+            return
+        if self.status(name).checked_at is None:
+            await self.refresh(name)
+        elif self.is_stale(name):
+            self._schedule_refresh(name)
+
+    async def ensure_all_fresh(self):
+        await asyncio.gather(*(self.ensure_fresh(name) for name in self.providers))
+
+    async def refresh(self, name: str) -> ProviderStatus:
+        """Probe a provider now, sharing the probe with concurrent callers"""
+        task = self._refreshing.get(name)
+        if task is None:
+            task = self._schedule_refresh(name)
+        return await asyncio.shield(task)
+
+    async def refresh_all(self):
+        await asyncio.gather(*(self.refresh(name) for name in self.providers))
+
+    def mark_failure(self, name: str, error: Exception):
+        """Record a failed provider call and re-probe it in the background"""
+        if name not in self.providers:
+            return
+        self.status(name).last_error = str(error)
+        self._schedule_refresh(name)
+
+    def _schedule_refresh(self, name: str) -> asyncio.Task:
+        task = self._refreshing.get(name)
+        if task is None:
+            task = asyncio.create_task(self._probe(name))
+            self._refreshing[name] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(name, None))
+        return task
+
+    async def _probe(self, name: str) -> ProviderStatus:
+        provider = self.providers[name]
+        status = ProviderStatus()
+        try:
+            status.available = await provider.ais_available()
+            if status.available:
+                status.models = await provider.aget_available_models()
+        except Exception as e:
+            logger.error(f"Error probing provider {name}: {e}")
+            status.available = False
+            status.last_error = str(e)
+
+        previous = self._status.get(name)
+        if previous is None or previous.available != status.available:
+            state = "available" if status.available else "unavailable"
+            logger.info(f"Provider {name} is {state}")
+
+        status.checked_at = time.monotonic()
+        self._status[name] = status
+        return status
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh_all()
+            except Exception as e:
+                logger.error(f"Error refreshing provider registry: {e}")
+            await asyncio.sleep(self.ttl)
+
+    def start(self):
+        """Start refreshing provider statuses in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        """Stop background refreshing"""
+        tasks = [t for t in [self._task, *self._refreshing.values()] if t]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+        self._refreshing.clear()
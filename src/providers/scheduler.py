@@ -0,0 +1,174 @@
+"""
+Outbound request scheduling: per-model concurrency caps, rate limits and priorities
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+
+logger = setup_logger(__name__)
+
+# Lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch"}
+
+
+class TokenBucket:
+    """Rate limiter refilling ``rate`` tokens per second up to ``capacity``
+
+    Reservations may overdraw the bucket; the caller then waits until the
+    debt has been refilled. This keeps reservations in arrival order and
+    lets a single request larger than the capacity through eventually.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens and return the seconds to wait before using them"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= amount
+        return max(0.0, -self.tokens / self.rate)
+
+
+class _Lane:
+    """Queue and limits for one provider/model pair"""
+
+    def __init__(self, max_concurrency: int, rpm: float, tpm: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.active = 0
+        self.waiters: List[Tuple[int, int, asyncio.Future]] = []
+        # Bursts of up to one minute's allowance, refilled continuously
+        self.requests = TokenBucket(rpm / 60, rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm / 60, tpm) if tpm > 0 else None
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for _, _, future in self.waiters if not future.done())
+
+    def rate_delay(self, tokens: int) -> float:
+        delays = [0.0]
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.tokens:
+            delays.append(self.tokens.reserve(tokens))
+        return max(delays)
+
+
+class ProviderScheduler:
+    """Admits provider calls per provider/model lane
+
+    Each lane runs at most ``max_concurrency`` calls at once and, when rpm
+    or tpm limits are configured, paces calls with token buckets over
+    requests and estimated tokens. A call waits for its rate allowance
+    before it takes a concurrency slot, so paced calls never hold slots
+    idle. Calls over the cap wait in a priority queue, so interactive
+    requests overtake queued batch work. Providers without limits
+    configured are not scheduled.
+    """
+
+    def __init__(self, limits: Dict[str, Dict[str, Any]]):
+        self.limits = limits
+        self._lanes: Dict[Tuple[str, str], _Lane] = {}
+        self._order = itertools.count()
+
+    def _lane(self, provider: str, model: str) -> Optional[_Lane]:
+        if provider not in self.limits:
+            return None
+        key = (provider, model)
+        if key not in self._lanes:
+            limits = self.limits[provider]
+            self._lanes[key] = _Lane(
+                limits.get("max_concurrency", 4), limits.get("rpm", 0), limits.get("tpm", 0)
+            )
+        return self._lanes[key]
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        model: Optional[str],
+        tokens: int,
+        priority: int = INTERACTIVE,
+    ) -> AsyncIterator[None]:
+        """Wait for rate allowance, then a concurrency slot, for one call"""
+        model = model or "default"
+        lane = self._lane(provider, model)
+        if lane is None:
+            yield
+            return
+
+        labels = {"provider": provider, "model": model}
+        start = time.perf_counter()
+        delay = lane.rate_delay(tokens)
+        if delay > 0:
+            metrics.inc("scheduler_rate_limited_total", **labels)
+            await asyncio.sleep(delay)
+        await self._acquire(lane, priority, labels)
+        try:
+            metrics.observe(
+                "scheduler_wait_seconds",
+                time.perf_counter() - start,
+                priority=PRIORITY_NAMES.get(priority, str(priority)),
+                **labels,
+            )
+            yield
+        finally:
+            self._release(lane, labels)
+
+    async def _acquire(self, lane: _Lane, priority: int, labels: Dict[str, str]):
+        if lane.active < lane.max_concurrency and not lane.queued:
+            lane.active += 1
+            self._update_gauges(lane, labels)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.waiters, (priority, next(self._order), future))
+        self._update_gauges(lane, labels)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just before the cancel; hand the slot on
+                self._release(lane, labels)
+            raise
+        finally:
+            self._update_gauges(lane, labels)
+
+    def _release(self, lane: _Lane, labels: Dict[str, str]):
+        lane.active -= 1
+        while lane.waiters:
+            _, _, future = heapq.heappop(lane.waiters)
+            if not future.done():
+                lane.active += 1
+                future.set_result(None)
+                break
+        self._update_gauges(lane, labels)
+
+    @staticmethod
+    def _update_gauges(lane: _Lane, labels: Dict[str, str]):
+        metrics.set_gauge("scheduler_queue_depth", lane.queued, **labels)
+        metrics.set_gauge("scheduler_active_calls", lane.active, **labels)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            f"{provider}/{model}": {
+                "active": lane.active,
+                "queued": lane.queued,
+                "max_concurrency": lane.max_concurrency,
+            }
+            for (provider, model), lane in self._lanes.items()
+        }
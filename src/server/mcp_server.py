@@ -5,14 +5,41 @@ MCP Server implementation
 import asyncio
 import json
 import sys
-from typing import Any, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from urllib.parse import urlparse
 
+from ..cache.result_cache import CACHE_MODES
+from ..processors.chunker import normalize_address
+from ..processors.cleaning_pool import CleaningPool
 from ..processors.input_handler import InputHandler
+from ..providers.base_provider import ProviderError
 from ..providers.provider_factory import ProviderFactory
 from ..utils.logger import setup_logger
+from ..utils.metrics import MetricsExporter, metrics
+from .socket_transport import SocketTransport, serve_socket
 
 logger = setup_logger(__name__)
 
+# Methods cheap enough to answer without waiting for a dispatch slot
+INLINE_METHODS = {"ping", "stats"}
+
+KNOWN_METHODS = {
+    "identify_addresses",
+    "identify_addresses_batch",
+    "list_providers",
+    "list_models",
+    "stats",
+    "ping",
+}
+
+# JSON-RPC server error code for a failed, timed out or circuit-broken provider
+PROVIDER_ERROR_CODE = -32000
+
+# Sends a JSON-RPC notification to the client that made the request
+Notifier = Callable[[Dict[str, Any]], Awaitable[None]]
+
 
 class MCPServer:
     """MCP Server for address identification"""
@@ -20,21 +47,65 @@ class MCPServer:
     def __init__(self, config):
         self.config = config
         self.provider_factory = ProviderFactory(config)
-        self.input_handler = InputHandler()
+        self.cleaning_pool = CleaningPool(**config.cleaning_config)
+        self.input_handler = InputHandler(config.fetch_config, self.cleaning_pool)
+        self.max_concurrent_requests = config.server_config["max_concurrent_requests"]
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        metrics_config = config.metrics_config
+        self.metrics_exporter = MetricsExporter(
+            metrics,
+            path=metrics_config["prometheus_file"],
+            port=metrics_config["prometheus_port"],
+            interval=metrics_config["interval"],
+            gauges=self._gauges,
+        )
         logger.info("MCP Server initialized")
 
-    async def handle_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
-        """Handle incoming MCP requests"""
+    async def handle_request(
+        self, request: Dict[str, Any], notify: Optional[Notifier] = None
+    ) -> Dict[str, Any]:
+        """Handle incoming MCP requests
+
+        ``notify`` is used to send progress notifications, e.g. addresses found
+        by a streaming ``identify_addresses`` request, before the response.
+        """
         method = request.get("method")
         params = request.get("params", {})
 
+        start = time.perf_counter()
+        if isinstance(params, dict):
+            response = await self._route(method, params, request, notify)
+        else:
+            response = {"error": "Invalid params", "code": -32602}
+        # Unknown names would give every typo its own series
+        label = method if method in KNOWN_METHODS else "unknown"
+        metrics.observe("request_duration_seconds", time.perf_counter() - start, method=label)
+        metrics.inc(
+            "requests_total", method=label, status="error" if "error" in response else "ok"
+        )
+        return response
+
+    async def _route(
+        self,
+        method: Optional[str],
+        params: Dict[str, Any],
+        request: Dict[str, Any],
+        notify: Optional[Notifier],
+    ) -> Dict[str, Any]:
         try:
             if method == "identify_addresses":
-                return await self._handle_identify_addresses(params)
+                return await self._handle_identify_addresses(
+                    params, self._address_notifier(request, notify)
+                )
+            elif method == "identify_addresses_batch":
+                return await self._handle_identify_addresses_batch(params)
             elif method == "list_providers":
-                return self._handle_list_providers()
+                return await self._handle_list_providers()
             elif method == "list_models":
-                return self._handle_list_models(params)
+                return await self._handle_list_models(params)
+            elif method == "stats":
+                return self._handle_stats()
             elif method == "ping":
                 return {"result": "pong"}
             else:
@@ -43,19 +114,55 @@ class MCPServer:
             logger.error(f"Error handling request: {e}")
             return {"error": f"Internal error: {str(e)}", "code": -32603}
 
+    def _address_notifier(self, request: Dict[str, Any], notify: Optional[Notifier]):
+        """Build the per-address callback for a streaming request, if requested"""
+        if not notify or not request.get("params", {}).get("stream"):
+            return None
+
+        found = 0
+
+        async def on_address(address: str):
+            nonlocal found
+            found += 1
+            await notify(
+                {
+                    "method": "notifications/progress",
+                    "params": {
+                        "id": request.get("id"),
+                        "progress": found,
+                        "address": address,
+                    },
+                }
+            )
+
+        return on_address
+
     async def _handle_identify_addresses(
-        self, params: Dict[str, Any]
+        self,
+        params: Dict[str, Any],
+        on_address: Optional[Callable[[str], Awaitable[None]]] = None,
     ) -> Dict[str, Any]:
         """Handle address identification request"""
         input_data = params.get("input", "")
         provider_name = params.get("provider", "auto")
         model = params.get("model")
+        cache_mode = params.get("cache", "use")
 
         if not input_data:
             return {"error": "No input provided", "code": -32602}
 
-        # Process input
-        content, input_type = self.input_handler.process_input(input_data)
+        if cache_mode not in CACHE_MODES:
+            return self._invalid_cache_mode(cache_mode)
+
+        if params.get("crawl"):
+            return await self._handle_crawl(
+                input_data, params["crawl"], provider_name, model, cache_mode
+            )
+
+        # Process input (file reads and URL fetches block, so keep them off the loop)
+        content, input_type = await asyncio.to_thread(
+            self.input_handler.process_input, input_data, self._max_document_chars()
+        )
 
         if not content:
             return {
@@ -68,9 +175,12 @@ class MCPServer:
             }
 
         # Extract addresses
-        addresses, used_provider = self.provider_factory.extract_addresses(
-            content, provider_name, model
-        )
+        try:
+            addresses, used_provider = await self.provider_factory.aextract_addresses(
+                content, provider_name, model, cache_mode, on_address
+            )
+        except ProviderError as e:
+            return self._provider_error(e)
 
         result = {
             "input_type": input_type,
@@ -86,9 +196,212 @@ class MCPServer:
 
         return {"result": result}
 
-    def _handle_list_providers(self) -> Dict[str, Any]:
+    async def _handle_identify_addresses_batch(
+        self, params: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Handle address identification for a list of inputs"""
+        inputs = params.get("inputs")
+        provider_name = params.get("provider", "auto")
+        model = params.get("model")
+        cache_mode = params.get("cache", "use")
+        max_inputs = self.config.batch_config["max_inputs"]
+
+        if not isinstance(inputs, list) or not inputs:
+            return {"error": "No inputs provided", "code": -32602}
+
+        if len(inputs) > max_inputs:
+            return {
+                "error": f"Too many inputs ({len(inputs)}), the limit is {max_inputs}",
+                "code": -32602,
+            }
+
+        if cache_mode not in CACHE_MODES:
+            return self._invalid_cache_mode(cache_mode)
+
+        processed = await asyncio.gather(
+            *(
+                asyncio.to_thread(
+                    self.input_handler.process_input,
+                    str(input_data),
+                    self._max_document_chars(),
+                )
+                for input_data in inputs
+            )
+        )
+        readable = [i for i, (content, _) in enumerate(processed) if content]
+
+        addresses_by_input, used_provider = [], provider_name
+        if readable:
+            addresses_by_input, used_provider = (
+                await self.provider_factory.aextract_addresses_batch(
+                    [processed[i][0] for i in readable], provider_name, model, cache_mode
+                )
+            )
+        addresses_by_index = dict(zip(readable, addresses_by_input))
+
+        results = []
+        for i, (content, input_type) in enumerate(processed):
+            item = {"index": i, "input_type": input_type}
+            addresses = addresses_by_index.get(i)
+            if isinstance(addresses, ProviderError):
+                item.update(
+                    {
+                        "addresses": [],
+                        "count": 0,
+                        "error": f"Provider error: {addresses}",
+                        "reason": addresses.reason,
+                    }
+                )
+            elif content:
+                item.update({"addresses": addresses, "count": len(addresses)})
+            else:
+                item.update(
+                    {
+                        "addresses": [],
+                        "count": 0,
+                        "error": "No content found or unable to read input",
+                    }
+                )
+            results.append(item)
+
+        total = sum(item["count"] for item in results)
+        logger.info(
+            f"Processed batch of {len(inputs)} inputs with {used_provider}, found {total} addresses"
+        )
+
+        return {
+            "result": {
+                "provider": used_provider,
+                "model": model,
+                "results": results,
+                "total_count": total,
+            }
+        }
+
+    async def _handle_crawl(
+        self,
+        url: str,
+        crawl: Any,
+        provider_name: str,
+        model: Optional[str],
+        cache_mode: str,
+    ) -> Dict[str, Any]:
+        """Crawl a site from ``url`` and identify the addresses across its pages
+
+        ``crawl`` is ``true`` for the configured limits, or an object that may
+        lower ``max_pages`` and ``max_depth``.
+        """
+        parsed = urlparse(str(url))
+        if parsed.scheme not in ("http", "https") or not parsed.netloc:
+            return {"error": "Crawling needs an http(s) URL as input", "code": -32602}
+
+        crawl_config = self.config.crawl_config
+        limits = crawl if isinstance(crawl, dict) else {}
+        try:
+            max_pages = min(int(limits.get("max_pages", crawl_config["max_pages"])),
+                            crawl_config["max_pages"])
+            max_depth = min(int(limits.get("max_depth", crawl_config["max_depth"])),
+                            crawl_config["max_depth"])
+        except (TypeError, ValueError):
+            return {"error": "Crawl limits must be integers", "code": -32602}
+
+        # Crawling is rare, so its imports stay out of server startup
+        from ..processors.crawler import SiteCrawler
+
+        crawler = SiteCrawler(
+            max_pages=max(1, max_pages),
+            max_depth=max(0, max_depth),
+            connections=crawl_config["connections"],
+            delay=crawl_config["delay"],
+            timeout=self.config.fetch_config["timeout"],
+            deadline=self.config.fetch_config["deadline"],
+            max_bytes=self.config.fetch_config["max_bytes"],
+            max_chars=crawl_config["max_page_chars"],
+            respect_robots=crawl_config["respect_robots"],
+            cleaning_pool=self.cleaning_pool,
+        )
+        pages = await crawler.crawl(url)
+        if not pages:
+            return {
+                "result": {
+                    "input_type": "crawl",
+                    "provider": provider_name,
+                    "addresses": [],
+                    "pages_crawled": 0,
+                    "error": "No content found or unable to crawl input",
+                }
+            }
+
+        addresses_by_page, used_provider = (
+            await self.provider_factory.aextract_addresses_batch(
+                [page.content for page in pages], provider_name, model, cache_mode
+            )
+        )
+        errors = [
+            (page, result)
+            for page, result in zip(pages, addresses_by_page)
+            if isinstance(result, ProviderError)
+        ]
+        if len(errors) == len(pages):
+            return self._provider_error(errors[0][1])
+
+        # The same address is usually repeated in every page footer
+        sources: Dict[str, Dict[str, Any]] = {}
+        for page, addresses in zip(pages, addresses_by_page):
+            if isinstance(addresses, ProviderError):
+                continue
+            for address in addresses:
+                source = sources.setdefault(
+                    normalize_address(address), {"address": address, "urls": []}
+                )
+                if page.url not in source["urls"]:
+                    source["urls"].append(page.url)
+
+        addresses: List[str] = [source["address"] for source in sources.values()]
+        result = {
+            "input_type": "crawl",
+            "provider": used_provider,
+            "model": model,
+            "addresses": addresses,
+            "count": len(addresses),
+            "sources": list(sources.values()),
+            "pages_crawled": len(pages),
+        }
+        if errors:
+            result["page_errors"] = [
+                {"url": page.url, "error": f"Provider error: {error}", "reason": error.reason}
+                for page, error in errors
+            ]
+
+        logger.info(
+            f"Crawled {len(pages)} pages from {url} with {used_provider}, "
+            f"found {len(addresses)} addresses"
+        )
+        return {"result": result}
+
+    @staticmethod
+    def _provider_error(error: ProviderError) -> Dict[str, Any]:
+        return {
+            "error": f"Provider error: {error}",
+            "code": PROVIDER_ERROR_CODE,
+            "data": {"provider": error.provider, "reason": error.reason},
+        }
+
+    def _invalid_cache_mode(self, cache_mode: str) -> Dict[str, Any]:
+        return {
+            "error": f"Invalid cache mode '{cache_mode}', expected one of {list(CACHE_MODES)}",
+            "code": -32602,
+        }
+
+    def _max_document_chars(self) -> Optional[int]:
+        """Keep whole documents when they will be chunked rather than truncated"""
+        if self.config.chunking_config["enabled"]:
+            return self.config.chunking_config["max_document_chars"]
+        return None
+
+    async def _handle_list_providers(self) -> Dict[str, Any]:
         """Handle list providers request"""
-        available_providers = self.provider_factory.get_available_providers()
+        available_providers = await self.provider_factory.aget_available_providers()
         return {
             "result": {
                 "available_providers": available_providers,
@@ -96,14 +409,14 @@ class MCPServer:
             }
         }
 
-    def _handle_list_models(self, params: Dict[str, Any]) -> Dict[str, Any]:
+    async def _handle_list_models(self, params: Dict[str, Any]) -> Dict[str, Any]:
         """Handle list models request"""
         provider_name = params.get("provider")
 
         if provider_name:
-            provider = self.provider_factory.get_provider(provider_name)
+            provider = await self.provider_factory.aget_provider(provider_name)
             if provider:
-                models = provider.get_available_models()
+                models = self.provider_factory.registry.models(provider_name)
                 return {"result": {"provider": provider_name, "models": models}}
             else:
                 return {
@@ -113,43 +426,162 @@ class MCPServer:
         else:
             # List models for all providers
             all_models = {}
-            for name in self.provider_factory.get_available_providers():
-                provider = self.provider_factory.get_provider(name)
-                if provider:
-                    all_models[name] = provider.get_available_models()
+            for name in await self.provider_factory.aget_available_providers():
+                all_models[name] = self.provider_factory.registry.models(name)
 
             return {"result": all_models}
 
+    def _handle_stats(self) -> Dict[str, Any]:
+        """Handle stats request: pipeline metrics, cache and concurrency figures"""
+        return {
+            "result": {
+                **metrics.snapshot(),
+                "cache": self.provider_factory.result_cache.stats(),
+                "near_duplicates": self.provider_factory.near_duplicates.stats(),
+                "circuits": self.provider_factory.circuit_states(),
+                "providers": self.provider_factory.provider_stats(),
+                "scheduler": self.provider_factory.scheduler.stats(),
+                "cleaning_pool": self.cleaning_pool.stats(),
+                "in_flight_requests": self._in_flight,
+                "max_concurrent_requests": self.max_concurrent_requests,
+            }
+        }
+
+    def _gauges(self) -> Dict[str, float]:
+        """Point-in-time values added to the Prometheus export"""
+        gauges = {"in_flight_requests": self._in_flight}
+        for name, value in self.provider_factory.result_cache.stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[f"result_cache_{name}"] = value
+        gauges["near_duplicate_entries"] = len(self.provider_factory.near_duplicates)
+        return gauges
+
+    async def dispatch_line(self, line: str, send: Notifier):
+        """Handle a single request line and ``send`` its response when ready
+
+        ``send`` also carries the request's progress notifications, so each
+        transport passes one that writes back to the client that sent the line.
+        """
+        try:
+            request = json.loads(line.strip())
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON received: {e}")
+            await send({"error": "Parse error", "code": -32700})
+            return
+        if not isinstance(request, dict):
+            await send({"error": "Invalid request", "code": -32600})
+            return
+
+        if request.get("method") in INLINE_METHODS:
+            response = await self.handle_request(request, send)
+        else:
+            async with self._slots:
+                self._in_flight += 1
+                try:
+                    response = await self.handle_request(request, send)
+                finally:
+                    self._in_flight -= 1
+
+        if "id" in request:
+            response["id"] = request["id"]
+
+        await send(response)
+
+    async def _send_stdout(self, message: Dict[str, Any]):
+        self._write_response(message)
+
+    def _write_response(self, response: Dict[str, Any]):
+        """Write a response or notification line to stdout"""
+        line = json.dumps(response)
+        print(line)
+        sys.stdout.flush()
+        metrics.inc("response_bytes_total", len(line) + 1)
+
+    async def start(self):
+        """Prepare to serve: worker threads, dispatch slots and background start-up"""
+        loop = asyncio.get_running_loop()
+        # One worker per in-flight request plus one for the stdin reader
+        loop.set_default_executor(
+            ThreadPoolExecutor(
+                max_workers=self.max_concurrent_requests + 1,
+                thread_name_prefix="mcp-worker",
+            )
+        )
+        self._slots = asyncio.Semaphore(self.max_concurrent_requests)
+        self.provider_factory.start()
+        await self.metrics_exporter.start()
+
+    async def aclose(self):
+        """Stop background work and release connections, caches and workers"""
+        await self.metrics_exporter.stop()
+        await self.provider_factory.aclose()
+        self.cleaning_pool.close()
+
     async def run(self):
-        """Run the MCP server"""
+        """Run the MCP server over stdin/stdout
+
+        Requests are dispatched concurrently as they are read, with at most
+        ``max_concurrent_requests`` being processed at once. Reading pauses
+        while ``max_pending_requests`` are unanswered. Responses are written
+        as soon as they are ready, so they may arrive out of order and must be
+        matched to requests by ``id``.
+        """
         logger.info("MCP Server listening for requests...")
 
+        loop = asyncio.get_running_loop()
+        await self.start()
+        pending = set()
+        max_pending = self.config.server_config["max_pending_requests"]
+
         try:
             while True:
-                line = await asyncio.get_event_loop().run_in_executor(
-                    None, sys.stdin.readline
-                )
+                if len(pending) >= max_pending:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+
+                line = await loop.run_in_executor(None, sys.stdin.readline)
 
                 if not line:
                     break
 
-                try:
-                    request = json.loads(line.strip())
-                    response = await self.handle_request(request)
-
-                    if "id" in request:
-                        response["id"] = request["id"]
+                if not line.strip():
+                    continue
 
-                    print(json.dumps(response))
-                    sys.stdout.flush()
+                task = asyncio.create_task(self.dispatch_line(line, self._send_stdout))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
 
-                except json.JSONDecodeError as e:
-                    logger.error(f"Invalid JSON received: {e}")
-                    error_response = {"error": "Parse error", "code": -32700}
-                    print(json.dumps(error_response))
-                    sys.stdout.flush()
+            # Drain requests still in flight once the input is closed
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
 
         except KeyboardInterrupt:
             logger.info("Server shutdown requested")
         except Exception as e:
             logger.error(f"Server error: {e}")
+        finally:
+            await self.aclose()
+
+    async def run_socket(
+        self,
+        path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        ready: Optional[Callable[[SocketTransport], None]] = None,
+    ):
+        """Run the MCP server for many clients on a Unix socket or localhost TCP port
+
+        Serves until SIGTERM or SIGINT. ``ready`` is called once the socket
+        is listening, e.g. to report the port picked for ``port=0``.
+        """
+        server_config = self.config.server_config
+        await serve_socket(
+            self,
+            path,
+            host,
+            port,
+            server_config["max_line_bytes"],
+            ready,
+            server_config["max_pending_requests"],
+            server_config["allow_remote"],
+        )
@@ -0,0 +1,264 @@
+"""
+Unix domain socket and localhost TCP transport for many concurrent clients
+"""
+
+import asyncio
+import ipaddress
+import json
+import os
+import signal
+import socket
+import stat
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Set
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from .mcp_server import MCPServer
+
+logger = setup_logger(__name__)
+
+
+class SocketTransport:
+    """Serves newline-delimited JSON-RPC to many clients over one socket
+
+    Each connection carries requests one per line, as on stdio, and gets its
+    responses and progress notifications back on the same connection as soon
+    as they are ready. All connections share one ``MCPServer``, so its warm
+    provider connections, probes and caches serve every client, and the
+    concurrent request limit applies across all of them. Anything else with
+    the server's ``start``/``dispatch_line``/``aclose`` methods can be
+    served the same way.
+
+    Listens on the Unix socket ``path`` when given (readable by the owner
+    only), otherwise on ``host``:``port``. Port 0 picks a free port.
+    Clients are not authenticated and can name server-side files as input,
+    so a ``host`` that is not a loopback address is refused unless
+    ``allow_remote`` is set.
+    A client that closes its sending side still gets the responses to the
+    requests it sent; when it disconnects, its unfinished requests are
+    cancelled. Reading from a connection pauses while ``max_pending`` of its
+    requests are unanswered.
+    """
+
+    def __init__(
+        self,
+        server: "MCPServer",
+        path: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_line_bytes: int = 16 * 1024 * 1024,
+        max_pending: int = 64,
+        allow_remote: bool = False,
+    ):
+        self.server = server
+        self.path = path
+        self.host = host
+        self.port = port
+        self.max_line_bytes = max_line_bytes
+        self.max_pending = max_pending
+        self.allow_remote = allow_remote
+        self.kind = "unix" if path else "tcp"
+        self._listener: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.Task] = set()
+
+    @property
+    def address(self) -> str:
+        """Where clients connect: a socket path, or host:port"""
+        if self.path:
+            return self.path
+        host, port = self._listener.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def start(self):
+        if self.path:
+            self._remove_stale_socket()
+            self._listener = await asyncio.start_unix_server(
+                self._serve_connection, sock=self._bind_unix(), limit=self.max_line_bytes
+            )
+        else:
+            if not self.allow_remote and not await self._is_loopback(self.host):
+                raise ValueError(
+                    f"Refusing to listen on {self.host}, which is not a loopback address; "
+                    "set MCP_ALLOW_REMOTE=true to accept connections from other hosts"
+                )
+            self._listener = await asyncio.start_server(
+                self._serve_connection, self.host, self.port, limit=self.max_line_bytes
+            )
+        logger.info(f"MCP Server listening on {self.kind} {self.address}")
+
+    async def aclose(self):
+        """Stop accepting connections and drop the open ones"""
+        if self._listener is not None:
+            self._listener.close()
+            await self._listener.wait_closed()
+            self._listener = None
+        for task in self._connections:
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def _bind_unix(self) -> socket.socket:
+        """Bind the Unix socket readable by its owner only from the start
+
+        Changing the mode after binding would leave a moment in which other
+        local users could connect.
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        previous = os.umask(0o177)
+        try:
+            sock.bind(self.path)
+        except OSError:
+            sock.close()
+            raise
+        finally:
+            os.umask(previous)
+        return sock
+
+    @staticmethod
+    async def _is_loopback(host: str) -> bool:
+        """Whether every address ``host`` resolves to is a loopback address"""
+        if not host:
+            # An empty host listens on every interface
+            return False
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(
+                host, None, type=socket.SOCK_STREAM
+            )
+        except OSError:
+            return False
+        return bool(infos) and all(
+            ipaddress.ip_address(info[4][0].split("%")[0]).is_loopback for info in infos
+        )
+
+    def _remove_stale_socket(self):
+        """Remove a socket file left by a server that is no longer running"""
+        try:
+            mode = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(mode):
+            raise OSError(f"{self.path} exists and is not a socket")
+
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+        except (ConnectionRefusedError, FileNotFoundError):
+            os.unlink(self.path)
+            return
+        finally:
+            probe.close()
+        raise OSError(f"Another server is listening on {self.path}")
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        self._connections.add(asyncio.current_task())
+        metrics.inc("connections_total", transport=self.kind)
+        metrics.set_gauge("connections_open", len(self._connections), transport=self.kind)
+
+        pending: Set[asyncio.Task] = set()
+        write_lock = asyncio.Lock()
+        closed = False
+
+        async def send(message: Dict[str, Any]):
+            nonlocal closed
+            if closed:
+                return
+            data = (json.dumps(message) + "\n").encode("utf-8")
+            try:
+                # One drain at a time; concurrent drains fail on older Pythons
+                async with write_lock:
+                    writer.write(data)
+                    await writer.drain()
+            except ConnectionError:
+                closed = True
+                current = asyncio.current_task()
+                for task in pending:
+                    if task is not current:
+                        task.cancel()
+                return
+            metrics.inc("response_bytes_total", len(data))
+
+        try:
+            while True:
+                if len(pending) >= self.max_pending:
+                    await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The rest of an over-long line cannot be told from the next request
+                    await send({"error": "Request line too long", "code": -32600})
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(
+                    self.server.dispatch_line(line.decode("utf-8", errors="replace"), send)
+                )
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+
+            # The client may half-close after sending; answer what it asked
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        except asyncio.CancelledError:
+            # Closed by aclose; asyncio logs handlers that end cancelled as errors
+            pass
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            self._connections.discard(asyncio.current_task())
+            metrics.set_gauge(
+                "connections_open", len(self._connections), transport=self.kind
+            )
+
+
+async def serve_socket(
+    handler: "MCPServer",
+    path: Optional[str] = None,
+    host: str = "127.0.0.1",
+    port: int = 0,
+    max_line_bytes: int = 16 * 1024 * 1024,
+    ready: Optional[Callable[[SocketTransport], None]] = None,
+    max_pending: int = 64,
+    allow_remote: bool = False,
+):
+    """Start ``handler`` and serve it on a socket until SIGTERM or SIGINT"""
+    await handler.start()
+    transport = SocketTransport(
+        handler, path, host, port, max_line_bytes, max_pending, allow_remote
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    signals = []
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+            signals.append(signum)
+        except (NotImplementedError, RuntimeError, ValueError):
+            # Windows, or not in the main thread
+            pass
+
+    try:
+        await transport.start()
+        if ready is not None:
+            ready(transport)
+        await stop.wait()
+        logger.info("Server shutdown requested")
+    finally:
+        for signum in signals:
+            loop.remove_signal_handler(signum)
+        await transport.aclose()
+        await handler.aclose()
@@ -0,0 +1,388 @@
+"""
+Supervisor that spreads socket clients' requests over several worker processes
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import signal
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from ..utils.logger import setup_logger
+from ..utils.metrics import MetricsExporter, metrics
+
+if TYPE_CHECKING:
+    from .mcp_server import Notifier
+
+logger = setup_logger(__name__)
+
+# Seconds a worker has to start listening before it is killed and retried
+WORKER_START_TIMEOUT = 30.0
+
+# A worker exiting sooner than this after starting is restarted with backoff
+CRASH_WINDOW = 10.0
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 30.0
+
+# Seconds a worker has to shut down after SIGTERM
+WORKER_STOP_TIMEOUT = 10.0
+
+# Directory containing the src package
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Workers run in the supervisor's working directory, so relative file paths in
+# requests resolve as in a single server process. This imports src.main from
+# PROJECT_ROOT instead of the working directory, which python -m would search.
+WORKER_BOOTSTRAP = (
+    f"import sys; sys.path[0] = {PROJECT_ROOT!r}; "
+    "from src.main import main; main(sys.argv[1:])"
+)
+
+
+@dataclass
+class _Pending:
+    """A request forwarded to a worker, waiting for its response"""
+
+    future: asyncio.Future
+    send: Optional["Notifier"]
+    client_id: Any = None
+
+
+@dataclass
+class _Worker:
+    """One worker process and the supervisor's connection to it"""
+
+    index: int
+    socket_path: str
+    process: Optional[asyncio.subprocess.Process] = None
+    writer: Optional[asyncio.StreamWriter] = None
+    write_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    pending: Dict[int, _Pending] = field(default_factory=dict)
+    ready: bool = False
+    restarts: int = 0
+    # Set once the first start attempt has succeeded or failed
+    launched: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def outstanding(self) -> int:
+        return len(self.pending)
+
+
+class Supervisor:
+    """Runs ``workers`` MCP server processes behind one socket
+
+    Each worker is a separate ``MCPServer`` process listening on its own Unix
+    socket in a private directory, so HTML cleaning and parsing use as many
+    cores as there are workers. The supervisor holds one connection to each
+    and sends every request to the ready worker with the fewest requests
+    outstanding, rewriting ids so that responses and progress notifications
+    reach the client that asked. ``ping`` and ``stats`` are answered by the
+    supervisor; ``stats`` includes every worker's own stats.
+
+    A worker that exits is restarted, after a backoff if it keeps exiting
+    soon after starting; its outstanding requests get an error. Workers share
+    the SQLite result cache at ``RESULT_CACHE_PATH``, or one in the private
+    directory when none is configured (unless ``max_disk_entries`` is 0), so
+    a document extracted by one worker is a cache hit for all of them.
+
+    Served with ``serve_socket`` like ``MCPServer``.
+    """
+
+    def __init__(self, config, workers: int):
+        self.config = config
+        self.max_line_bytes = config.server_config["max_line_bytes"]
+        self.run_dir: Optional[str] = None
+        self.workers: List[_Worker] = []
+        self._size = workers
+        self._ids = itertools.count(1)
+        self._next = 0
+        self._closing = False
+        self._tasks: List[asyncio.Task] = []
+        metrics_config = config.metrics_config
+        self.metrics_exporter = MetricsExporter(
+            metrics,
+            path=metrics_config["prometheus_file"],
+            port=metrics_config["prometheus_port"],
+            interval=metrics_config["interval"],
+            gauges=lambda: {"workers_ready": self.ready_workers},
+        )
+
+    @property
+    def ready_workers(self) -> int:
+        return sum(worker.ready for worker in self.workers)
+
+    def worker_env(self) -> Dict[str, str]:
+        """Environment for worker processes"""
+        env = dict(os.environ)
+        env["MCP_WORKERS"] = "0"
+        cache_config = self.config.cache_config
+        if not cache_config["path"] and cache_config["max_disk_entries"] > 0:
+            env["RESULT_CACHE_PATH"] = os.path.join(self.run_dir, "results.sqlite")
+        # The workers already use every core; a cleaning pool each would oversubscribe
+        env.setdefault("CLEANING_POOL_WORKERS", "0")
+        # Ollama reloads a model when num_ctx changes, so workers must not disagree on it
+        env.setdefault("OLLAMA_MIN_CTX", str(self.config.ollama_config["num_ctx"]))
+        # Metrics are published by the supervisor, which cannot share a port or file
+        env.pop("METRICS_PROMETHEUS_PORT", None)
+        env.pop("METRICS_PROMETHEUS_FILE", None)
+        return env
+
+    async def start(self):
+        """Start the workers and wait until each is listening or has failed to start
+
+        Raises ``RuntimeError`` if none of them started. Workers that failed
+        are retried in the background.
+        """
+        self.run_dir = tempfile.mkdtemp(prefix="app-wizard-")
+        self.workers = [
+            _Worker(index, os.path.join(self.run_dir, f"worker-{index}.sock"))
+            for index in range(self._size)
+        ]
+        env = self.worker_env()
+        self._tasks = [
+            asyncio.create_task(self._keep_running(worker, env)) for worker in self.workers
+        ]
+        await asyncio.gather(*(worker.launched.wait() for worker in self.workers))
+        if not self.ready_workers:
+            await self.aclose()
+            raise RuntimeError("No worker process started listening")
+        if self.ready_workers < self._size:
+            logger.warning(
+                f"Only {self.ready_workers}/{self._size} workers started; retrying the rest"
+            )
+        await self.metrics_exporter.start()
+        logger.info(f"Supervisor started {self.ready_workers}/{self._size} workers")
+
+    async def aclose(self):
+        """Stop the workers and remove their sockets and the private directory"""
+        self._closing = True
+        await self.metrics_exporter.stop()
+        await asyncio.gather(*(self._stop(worker) for worker in self.workers))
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self.run_dir:
+            shutil.rmtree(self.run_dir, ignore_errors=True)
+
+    async def dispatch_line(self, line: str, send: "Notifier"):
+        """Answer a request line here or forward it to a worker"""
+        try:
+            request = json.loads(line.strip())
+        except json.JSONDecodeError as e:
+            logger.error(f"Invalid JSON received: {e}")
+            await send({"error": "Parse error", "code": -32700})
+            return
+        if not isinstance(request, dict):
+            await send({"error": "Invalid request", "code": -32600})
+            return
+
+        method = request.get("method")
+        if method == "ping":
+            response = {"result": "pong"}
+        elif method == "stats":
+            response = await self._stats()
+        else:
+            worker = self._pick()
+            if worker is None:
+                response = {"error": "No worker available", "code": -32603}
+            else:
+                response = await self._forward(worker, request, send)
+
+        if "id" in request:
+            response["id"] = request["id"]
+        await send(response)
+
+    def _pick(self) -> Optional[_Worker]:
+        """The ready worker with the fewest requests outstanding"""
+        ready = [worker for worker in self.workers if worker.ready]
+        if not ready:
+            return None
+        # Rotate where ties start so idle workers take turns
+        self._next = (self._next + 1) % len(self.workers)
+        return min(
+            ready,
+            key=lambda w: (w.outstanding, (w.index - self._next) % len(self.workers)),
+        )
+
+    async def _forward(
+        self, worker: _Worker, request: Dict[str, Any], send: Optional["Notifier"]
+    ) -> Dict[str, Any]:
+        """Send a request to a worker and wait for its response"""
+        request_id = next(self._ids)
+        pending = _Pending(asyncio.get_running_loop().create_future(), send, request.get("id"))
+        worker.pending[request_id] = pending
+        self._publish(worker)
+        metrics.inc("worker_requests_total", worker=str(worker.index))
+        data = (json.dumps({**request, "id": request_id}) + "\n").encode("utf-8")
+        try:
+            async with worker.write_lock:
+                if worker.writer is None:
+                    raise ConnectionResetError("not connected")
+                worker.writer.write(data)
+                await worker.writer.drain()
+        except ConnectionError:
+            self._resolve(worker, request_id, self._worker_lost(worker))
+
+        try:
+            # The worker keeps working on a cancelled request, so it stays
+            # outstanding until the worker answers
+            response = await asyncio.shield(pending.future)
+        except asyncio.CancelledError:
+            pending.send = None
+            raise
+        response.pop("id", None)
+        return response
+
+    def _resolve(self, worker: _Worker, request_id: int, response: Dict[str, Any]):
+        pending = worker.pending.pop(request_id, None)
+        if pending is None:
+            return
+        if not pending.future.done():
+            pending.future.set_result(response)
+        self._publish(worker)
+
+    async def _read_responses(self, worker: _Worker, reader: asyncio.StreamReader):
+        """Hand each line a worker sends to the request it belongs to"""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = json.loads(line)
+                if "method" in message:
+                    await self._relay_notification(worker, message)
+                elif "id" in message:
+                    self._resolve(worker, message["id"], message)
+                else:
+                    logger.error(f"Worker {worker.index} sent a response without an id")
+        except (ConnectionError, ValueError) as e:
+            logger.error(f"Lost connection to worker {worker.index}: {e}")
+        # A worker that stops answering is restarted
+        if worker.process is not None and worker.process.returncode is None:
+            worker.process.kill()
+
+    async def _relay_notification(self, worker: _Worker, message: Dict[str, Any]):
+        params = message.get("params") or {}
+        pending = worker.pending.get(params.get("id"))
+        if pending is None or pending.send is None:
+            return
+        message["params"] = {**params, "id": pending.client_id}
+        await pending.send(message)
+
+    async def _keep_running(self, worker: _Worker, env: Dict[str, str]):
+        """Run one worker, restarting it whenever it exits"""
+        backoff = RESTART_BACKOFF
+        while not self._closing:
+            started = time.monotonic()
+            reader_task = await self._launch(worker, env)
+            worker.launched.set()
+            code = await worker.process.wait() if worker.process is not None else None
+
+            worker.ready = False
+            if reader_task is not None:
+                reader_task.cancel()
+                await asyncio.gather(reader_task, return_exceptions=True)
+            if worker.writer is not None:
+                worker.writer.close()
+                worker.writer = None
+            for request_id in list(worker.pending):
+                self._resolve(worker, request_id, self._worker_lost(worker))
+            if self._closing:
+                break
+
+            worker.restarts += 1
+            metrics.inc("worker_restarts_total", worker=str(worker.index))
+            quick = time.monotonic() - started < CRASH_WINDOW
+            # A clean exit usually means Ctrl-C reached the whole process group,
+            # so give the supervisor a moment to be stopped too
+            delay = backoff if quick or code == 0 else 0
+            backoff = min(backoff * 2, MAX_RESTART_BACKOFF) if quick else RESTART_BACKOFF
+            logger.warning(
+                f"Worker {worker.index} exited with status {code}, restarting in {delay:.0f}s"
+            )
+            await asyncio.sleep(delay)
+
+    async def _launch(self, worker: _Worker, env: Dict[str, str]) -> Optional[asyncio.Task]:
+        """Start a worker process and connect to it once it is listening"""
+        try:
+            worker.process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-c",
+                WORKER_BOOTSTRAP,
+                "--transport",
+                "unix",
+                "--socket",
+                worker.socket_path,
+                env=env,
+                stdin=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            logger.error(f"Could not start worker {worker.index}: {e}")
+            worker.process = None
+            return None
+        deadline = time.monotonic() + WORKER_START_TIMEOUT
+        while worker.process.returncode is None:
+            try:
+                reader, worker.writer = await asyncio.open_unix_connection(
+                    worker.socket_path, limit=self.max_line_bytes
+                )
+            except (ConnectionError, FileNotFoundError):
+                if time.monotonic() > deadline:
+                    logger.error(f"Worker {worker.index} did not start listening")
+                    worker.process.kill()
+                    return None
+                await asyncio.sleep(0.05)
+                continue
+            worker.ready = True
+            logger.info(f"Worker {worker.index} ready (pid {worker.process.pid})")
+            return asyncio.create_task(self._read_responses(worker, reader))
+        return None
+
+    async def _stop(self, worker: _Worker):
+        process = worker.process
+        if process is None or process.returncode is not None:
+            return
+        worker.ready = False
+        process.send_signal(signal.SIGTERM)
+        try:
+            await asyncio.wait_for(process.wait(), WORKER_STOP_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    @staticmethod
+    def _worker_lost(worker: _Worker) -> Dict[str, Any]:
+        return {"error": f"Worker {worker.index} exited before responding", "code": -32603}
+
+    def _publish(self, worker: _Worker):
+        metrics.set_gauge("worker_outstanding", worker.outstanding, worker=str(worker.index))
+
+    async def _stats(self) -> Dict[str, Any]:
+        """Supervisor metrics and each worker's own stats"""
+
+        async def worker_stats(worker: _Worker) -> Dict[str, Any]:
+            summary = {
+                "index": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "ready": worker.ready,
+                "outstanding": worker.outstanding,
+                "restarts": worker.restarts,
+            }
+            if worker.ready:
+                response = await self._forward(worker, {"method": "stats"}, None)
+                summary["stats"] = response.get("result", response)
+            return summary
+
+        return {
+            "result": {
+                **metrics.snapshot(),
+                "workers": await asyncio.gather(*(worker_stats(w) for w in self.workers)),
+                "ready_workers": self.ready_workers,
+            }
+        }
@@ -7,18 +7,42 @@ from typing import Any, Dict
 
 from dotenv import load_dotenv
 
-load_dotenv()
-
 
 class Config:
     """Configuration class for the MCP server"""
 
     def __init__(self):
+        # Read .env when the server is configured rather than on import
+        load_dotenv()
+
         self.openai_config = {"api_key": os.getenv("OPENAI_API_KEY")}
 
         self.ollama_config = {
             "base_url": os.getenv("OLLAMA_BASE_URL", "http://localhost:11434"),
             "default_model": os.getenv("OLLAMA_MODEL", "llama3.2:latest"),
+            "max_connections": int(os.getenv("OLLAMA_MAX_CONNECTIONS", "16")),
+            # Largest context window; calls get the smallest power of two from
+            # OLLAMA_MIN_CTX up that fits their prompt
+            "num_ctx": int(os.getenv("OLLAMA_NUM_CTX", "2048")),
+            "min_ctx": int(os.getenv("OLLAMA_MIN_CTX", "2048")),
+            # How long Ollama keeps a model loaded after each call or ping
+            "keep_alive": os.getenv("OLLAMA_KEEP_ALIVE", "30m"),
+            # Models loaded at startup and pinged when idle this many seconds (0: never)
+            "warm_models": [
+                model.strip()
+                for model in os.getenv(
+                    "OLLAMA_WARM_MODELS", os.getenv("OLLAMA_MODEL", "llama3.2:latest")
+                ).split(",")
+                if model.strip()
+            ],
+            "keep_alive_interval": float(os.getenv("OLLAMA_KEEP_ALIVE_INTERVAL", "600")),
+        }
+
+        self.local_config = {
+            # In auto mode, try the rule-based extractor before any LLM
+            "auto_first": os.getenv("AUTO_LOCAL_FIRST", "false").lower() == "true",
+            # Minimum local confidence to skip the LLM in auto mode
+            "min_confidence": float(os.getenv("LOCAL_MIN_CONFIDENCE", "0.8")),
         }
 
         # Add more provider configs here
@@ -26,6 +50,168 @@ class Config:
 
         self.google_config = {"api_key": os.getenv("GOOGLE_API_KEY")}
 
+        self.hedging_config = {
+            # In auto mode, send a slow request to the next provider as well
+            "enabled": os.getenv("HEDGING_ENABLED", "false").lower() == "true",
+            # Hedge once the primary is slower than this share of its past calls
+            "percentile": float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+            # Delay used until the primary has enough latency samples
+            "default_delay": float(os.getenv("HEDGE_DEFAULT_DELAY", "2.0")),
+            "min_delay": float(os.getenv("HEDGE_MIN_DELAY", "0.25")),
+            "min_samples": int(os.getenv("HEDGE_MIN_SAMPLES", "20")),
+        }
+
+        self.breaker_config = {
+            # Open a provider's circuit once this share of recent calls failed
+            "failure_rate": float(os.getenv("BREAKER_FAILURE_RATE", "0.5")),
+            "min_calls": int(os.getenv("BREAKER_MIN_CALLS", "5")),
+            # Seconds of call outcomes the failure rate is computed over
+            "window": float(os.getenv("BREAKER_WINDOW", "60")),
+            # Seconds an open circuit rejects calls before a trial call
+            "open_seconds": float(os.getenv("BREAKER_OPEN_SECONDS", "30")),
+        }
+
+        self.timeout_config = {
+            # Provider call timeouts follow observed latency within these bounds
+            "min_timeout": float(os.getenv("PROVIDER_MIN_TIMEOUT", "5")),
+            "max_timeout": float(os.getenv("PROVIDER_MAX_TIMEOUT", "120")),
+            "min_samples": int(os.getenv("PROVIDER_TIMEOUT_MIN_SAMPLES", "5")),
+        }
+
+        # Outbound limits per provider, applied to each of its models separately.
+        # Providers not listed here (e.g. local) are not scheduled.
+        self.scheduler_config = {
+            "ollama": {
+                # Ollama runs a few generations per model at once; queue the rest here
+                "max_concurrency": int(os.getenv("OLLAMA_MAX_CONCURRENCY", "4")),
+                "rpm": float(os.getenv("OLLAMA_RPM", "0")),
+                "tpm": float(os.getenv("OLLAMA_TPM", "0")),
+            },
+            "openai": {
+                "max_concurrency": int(os.getenv("OPENAI_MAX_CONCURRENCY", "16")),
+                # Requests and estimated tokens per minute; 0 disables the limit
+                "rpm": float(os.getenv("OPENAI_RPM", "0")),
+                "tpm": float(os.getenv("OPENAI_TPM", "0")),
+            },
+        }
+
+        self.registry_config = {
+            # Seconds before a cached provider status is re-probed
+            "ttl": float(os.getenv("PROVIDER_STATUS_TTL", "30")),
+        }
+
+        self.cache_config = {
+            # Set RESULT_CACHE_MAX_ENTRIES=0 to disable the in-memory tier
+            "max_entries": int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "1024")),
+            "ttl": float(os.getenv("RESULT_CACHE_TTL", "86400")),
+            # SQLite file for the persistent tier, shared across processes
+            "path": os.getenv("RESULT_CACHE_PATH") or None,
+            "max_disk_entries": int(os.getenv("RESULT_CACHE_MAX_DISK_ENTRIES", "100000")),
+        }
+
+        self.near_duplicate_config = {
+            # Documents indexed for near-duplicate reuse; 0 disables the index
+            "max_entries": int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "10000")),
+            # Largest SimHash distance (of 64 bits) still counted as the same page
+            "max_distance": int(os.getenv("NEAR_DUPLICATE_MAX_DISTANCE", "6")),
+            # Shorter documents are too small for a stable fingerprint
+            "min_chars": int(os.getenv("NEAR_DUPLICATE_MIN_CHARS", "500")),
+        }
+
+        self.chunking_config = {
+            # Split long documents into chunks instead of truncating them
+            "enabled": os.getenv("CHUNKING_ENABLED", "true").lower() == "true",
+            # Upper bound on chunk size; smaller models get smaller chunks
+            "max_chunk_chars": int(os.getenv("CHUNK_MAX_CHARS", "8000")),
+            "overlap": int(os.getenv("CHUNK_OVERLAP", "300")),
+            # Number of chunks sent to the provider at once
+            "fan_out": int(os.getenv("CHUNK_FAN_OUT", "4")),
+            # Documents are still truncated to this many characters
+            "max_document_chars": int(os.getenv("CHUNK_MAX_DOCUMENT_CHARS", "100000")),
+        }
+
+        self.candidate_config = {
+            # Send only the text around likely address parts to LLM providers,
+            # and skip the call when a document has none
+            "enabled": os.getenv("CANDIDATE_WINDOWS_ENABLED", "true").lower() == "true",
+            # Characters kept on each side of a candidate marker
+            "context": int(os.getenv("CANDIDATE_CONTEXT_CHARS", "200")),
+            # Send the whole document when windows would cover this share of it
+            "max_coverage": float(os.getenv("CANDIDATE_MAX_COVERAGE", "0.8")),
+        }
+
+        self.batch_config = {
+            # Character budget of the documents packed into one prompt
+            "max_batch_chars": int(os.getenv("BATCH_MAX_CHARS", "6000")),
+            # Keep groups small enough for all answers to fit in one completion
+            "max_documents": int(os.getenv("BATCH_MAX_DOCUMENTS", "10")),
+            # Number of packed prompts sent to the provider at once
+            "fan_out": int(os.getenv("BATCH_FAN_OUT", "4")),
+            "max_inputs": int(os.getenv("BATCH_MAX_INPUTS", "1000")),
+        }
+
+        self.fetch_config = {
+            # Per-read socket timeout in seconds
+            "timeout": float(os.getenv("URL_FETCH_TIMEOUT", "15")),
+            # Total time allowed for downloading one URL
+            "deadline": float(os.getenv("URL_FETCH_DEADLINE", "20")),
+            "max_bytes": int(os.getenv("URL_MAX_BYTES", str(5 * 1024 * 1024))),
+        }
+
+        self.cleaning_config = {
+            # Worker processes for cleaning large HTML pages; 0 cleans in threads.
+            # One core is left to the event loop and provider calls.
+            "workers": int(
+                os.getenv("CLEANING_POOL_WORKERS", str(min(4, (os.cpu_count() or 1) - 1)))
+            ),
+            # Pages with less markup than this are cleaned inline, where they
+            # finish faster than the hand-off to another process
+            "min_chars": int(os.getenv("CLEANING_POOL_MIN_CHARS", "65536")),
+        }
+
+        self.crawl_config = {
+            # Upper bounds for a crawl; requests may ask for less
+            "max_pages": int(os.getenv("CRAWL_MAX_PAGES", "20")),
+            "max_depth": int(os.getenv("CRAWL_MAX_DEPTH", "2")),
+            # Concurrent requests to one host, and seconds between their starts
+            "connections": int(os.getenv("CRAWL_PER_HOST_CONNECTIONS", "4")),
+            "delay": float(os.getenv("CRAWL_DELAY", "0.25")),
+            # Characters of text kept from each page
+            "max_page_chars": int(os.getenv("CRAWL_MAX_PAGE_CHARS", "10000")),
+            "respect_robots": os.getenv("CRAWL_RESPECT_ROBOTS", "true").lower() == "true",
+        }
+
+        self.server_config = {
+            "max_concurrent_requests": int(
+                os.getenv("MCP_MAX_CONCURRENT_REQUESTS", "8")
+            ),
+            # stdio (one client), unix (MCP_SOCKET_PATH) or tcp (MCP_HOST:MCP_PORT)
+            "transport": os.getenv("MCP_TRANSPORT", "stdio"),
+            "socket_path": os.getenv("MCP_SOCKET_PATH", "/tmp/app-wizard.sock"),
+            "host": os.getenv("MCP_HOST", "127.0.0.1"),
+            "port": int(os.getenv("MCP_PORT", "8765")),
+            # Clients are unauthenticated, so TCP listens on loopback hosts only unless set
+            "allow_remote": os.getenv("MCP_ALLOW_REMOTE", "false").lower() == "true",
+            # Requests read ahead per client; reading pauses while this many are unanswered
+            "max_pending_requests": int(os.getenv("MCP_MAX_PENDING_REQUESTS", "64")),
+            # Worker processes behind the unix or tcp socket (0: serve in this process)
+            "workers": int(os.getenv("MCP_WORKERS", "0")),
+            # Longest request line accepted from a socket client
+            "max_line_bytes": int(os.getenv("MCP_MAX_LINE_BYTES", str(16 * 1024 * 1024))),
+        }
+
+        self.metrics_config = {
+            # Prometheus text file rewritten every interval, e.g. for node_exporter
+            "prometheus_file": os.getenv("METRICS_PROMETHEUS_FILE") or None,
+            # Serve Prometheus metrics over HTTP on 127.0.0.1 at this port
+            "prometheus_port": (
+                int(os.getenv("METRICS_PROMETHEUS_PORT"))
+                if os.getenv("METRICS_PROMETHEUS_PORT")
+                else None
+            ),
+            "interval": float(os.getenv("METRICS_FILE_INTERVAL", "15")),
+        }
+
     @property
     def has_openai(self) -> bool:
         return bool(self.openai_config["api_key"])
@@ -40,6 +226,7 @@ class Config:
         configs = {
             "openai": self.openai_config,
             "ollama": self.ollama_config,
+            "local": self.local_config,
             "anthropic": self.anthropic_config,
             "google": self.google_config,
         }
@@ -0,0 +1,211 @@
+"""
+Tests for the extraction result cache
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from src.cache.near_duplicate import NearDuplicateIndex, hamming_distance, simhash
+from src.cache.result_cache import ResultCache
+from src.providers.base_provider import PROMPT_VERSION
+from src.providers.provider_factory import ProviderFactory
+from src.utils.config import Config
+
+
+class TestResultCache(unittest.TestCase):
+    """Test cache tiers and keys"""
+
+    def test_key_depends_on_all_inputs(self):
+        key = ResultCache.make_key("text", "ollama", "llama2", PROMPT_VERSION)
+        self.assertEqual(
+            key, ResultCache.make_key("text", "ollama", "llama2", PROMPT_VERSION)
+        )
+        self.assertNotEqual(
+            key, ResultCache.make_key("text", "ollama", "mistral", PROMPT_VERSION)
+        )
+        self.assertNotEqual(
+            key, ResultCache.make_key("text", "openai", "llama2", PROMPT_VERSION)
+        )
+        self.assertNotEqual(key, ResultCache.make_key("text", "ollama", "llama2", "0"))
+
+    def test_memory_lru_eviction(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("a", ["1 A St"])
+        cache.set("b", ["2 B St"])
+        cache.get("a")
+        cache.set("c", ["3 C St"])
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), ["1 A St"])
+        self.assertEqual(cache.stats()["memory_evictions"], 1)
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl=-1)
+        cache.set("a", ["1 A St"])
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_survives_restart(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache.db")
+            cache = ResultCache(path=path)
+            cache.set("a", ["1 A St"])
+            cache.close()
+
+            restarted = ResultCache(path=path)
+            self.assertEqual(restarted.stats()["disk_entries"], 1)
+            self.assertEqual(restarted.get("a"), ["1 A St"])
+            self.assertEqual(restarted.stats()["disk_hits"], 1)
+            restarted.set("b", ["2 B St"])
+            self.assertEqual(restarted.stats()["disk_entries"], 2)
+            restarted.close()
+
+    def test_changing_a_hit_leaves_the_entry_intact(self):
+        cache = ResultCache()
+        addresses = ["2 B St", "1 A St"]
+        cache.set("a", addresses)
+        addresses.append("3 C St")
+        cache.get("a").sort()
+
+        self.assertEqual(cache.get("a"), ["2 B St", "1 A St"])
+
+
+TEMPLATE_WORDS = (
+    "store shop opening hours monday friday saturday parking delivery order online "
+    "contact phone email service returns gift card loyalty member offers news careers"
+).split()
+TEMPLATE = " ".join(random.Random(1).choice(TEMPLATE_WORDS) for _ in range(300))
+
+
+def store_page(banner: str, address: str) -> str:
+    return f"{TEMPLATE} {banner} Visit us at {address}. {TEMPLATE}"
+
+
+class TestNearDuplicateIndex(unittest.TestCase):
+    """Test near-duplicate reuse of extraction results"""
+
+    ADDRESS = "123 Main Street, Springfield, IL 62701"
+
+    def setUp(self):
+        self.index = NearDuplicateIndex(max_entries=10, min_chars=100)
+        self.index.add(
+            store_page("Sale on shoes, updated 10:32.", self.ADDRESS),
+            "auto/",
+            [self.ADDRESS],
+            "openai",
+        )
+
+    def test_similar_texts_have_close_fingerprints(self):
+        a = store_page("Sale on shoes.", self.ADDRESS)
+        b = store_page("Sofas half price.", self.ADDRESS)
+        self.assertLessEqual(hamming_distance(simhash(a), simhash(b)), 6)
+
+    def test_reuses_addresses_of_near_duplicate(self):
+        match = self.index.lookup(
+            store_page("Sofas half price, updated 11:05.", self.ADDRESS), "auto/"
+        )
+        self.assertEqual(match.addresses, [self.ADDRESS])
+        self.assertEqual(match.provider, "openai")
+
+    def test_same_template_with_another_address_is_rejected(self):
+        page = store_page("Sale on shoes, updated 10:32.", "987 Oak Avenue, Portland, OR 97201")
+        self.assertIsNone(self.index.lookup(page, "auto/"))
+        self.assertEqual(self.index.stats()["rejected"], 1)
+
+    def test_scopes_and_unrelated_documents_miss(self):
+        page = store_page("Sale on shoes, updated 10:32.", self.ADDRESS)
+        self.assertIsNone(self.index.lookup(page, "ollama/"))
+        self.assertIsNone(self.index.lookup("Completely different text. " * 20, "auto/"))
+        self.assertEqual(self.index.stats()["misses"], 2)
+
+    def test_split_repeats(self):
+        pages = [
+            store_page("Sale on shoes.", self.ADDRESS),
+            "Completely different text. " * 20,
+            store_page("Sofas half price.", self.ADDRESS),
+            "short",
+        ]
+        self.assertEqual(self.index.split_repeats(pages), ([0, 1, 3], [2]))
+
+    def test_evicts_least_recently_used(self):
+        for i in range(12):
+            self.index.add(f"Unrelated document number {i}. " * 10, "auto/", [], "openai")
+        self.assertEqual(len(self.index), 10)
+        self.assertEqual(self.index.stats()["evictions"], 3)
+
+
+class TestFactoryCaching(unittest.IsolatedAsyncioTestCase):
+    """Test cache modes on the extraction path"""
+
+    async def asyncSetUp(self):
+        config = Config()
+        # Placeholder inputs have no address markers
+        config.candidate_config = {**config.candidate_config, "enabled": False}
+        self.factory = ProviderFactory(config)
+        self.provider = self.factory.providers["ollama"]
+        self.calls = 0
+
+        async def fake_extract(text, model=None):
+            self.calls += 1
+            return ["123 Main St"]
+
+        async def available():
+            return True
+
+        async def models():
+            return []
+
+        patch.object(self.provider, "aextract_addresses", fake_extract).start()
+        patch.object(self.provider, "ais_available", available).start()
+        patch.object(self.provider, "aget_available_models", models).start()
+        self.addCleanup(patch.stopall)
+
+    async def test_cache_modes(self):
+        for mode in ["use", "use", "refresh", "bypass"]:
+            addresses, _ = await self.factory.aextract_addresses(
+                "text", "ollama", cache_mode=mode
+            )
+            self.assertEqual(addresses, ["123 Main St"])
+
+        self.assertEqual(self.calls, 3)
+        self.assertEqual(self.factory.result_cache.stats()["hits"], 1)
+
+    async def test_near_duplicate_reuses_result(self):
+        self.factory.result_cache.clear()
+        first = store_page("Sale on shoes, updated 10:32.", "123 Main St")
+        second = store_page("Sofas half price, updated 11:05.", "123 Main St")
+
+        await self.factory.aextract_addresses(first, "ollama")
+        addresses, provider = await self.factory.aextract_addresses(second, "ollama")
+
+        self.assertEqual((addresses, provider), (["123 Main St"], "ollama"))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.factory.near_duplicates.stats()["hits"], 1)
+
+    async def test_batch_extracts_one_of_each_near_duplicate_group(self):
+        self.factory.result_cache.clear()
+        self.factory.config.batch_config = {
+            **self.factory.config.batch_config,
+            "max_documents": 1,
+        }
+        pages = [
+            store_page(banner, "123 Main St")
+            for banner in ("Sale on shoes, updated 10:32.", "Sofas half price, updated 11:05.")
+        ]
+
+        results, provider = await self.factory.aextract_addresses_batch(pages, "ollama")
+        self.assertEqual((results, provider), ([["123 Main St"]] * 2, "ollama"))
+        self.assertEqual(self.calls, 1)
+
+        # Later batches reuse indexed results too
+        third = store_page("Free delivery this week.", "123 Main St")
+        results, _ = await self.factory.aextract_addresses_batch([third], "ollama")
+        self.assertEqual(results, [["123 Main St"]])
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.factory.near_duplicates.stats()["hits"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+"""
+Tests for pipeline metrics
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from src.utils.metrics import Histogram, MetricsExporter, MetricsRegistry
+
+
+class TestHistogram(unittest.TestCase):
+    """Test bucketed latency histograms"""
+
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+        for value in [0.5] * 50 + [3.0] * 50:
+            histogram.observe(value)
+
+        self.assertEqual(histogram.count, 100)
+        self.assertAlmostEqual(histogram.quantile(0.5), 1.0)
+        self.assertTrue(2.0 < histogram.quantile(0.95) <= 4.0)
+
+    def test_empty_histogram(self):
+        self.assertEqual(Histogram().quantile(0.99), 0.0)
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test counters, snapshots and Prometheus rendering"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counters_are_labelled(self):
+        self.registry.inc("calls_total", provider="ollama")
+        self.registry.inc("calls_total", 2, provider="ollama")
+        self.registry.inc("calls_total", provider="openai")
+
+        self.assertEqual(self.registry.counter_value("calls_total", provider="ollama"), 3)
+        self.assertEqual(self.registry.counter_value("calls_total", provider="openai"), 1)
+
+    def test_timer_observes_stage(self):
+        with self.registry.timer(stage="parse"):
+            pass
+        snapshot = self.registry.snapshot()
+        series = snapshot["histograms"]["stage_duration_seconds"]
+        self.assertEqual(series[0]["labels"], {"stage": "parse"})
+        self.assertEqual(series[0]["count"], 1)
+
+    def test_prometheus_text_format(self):
+        self.registry.inc("requests_total", method="ping", status="ok")
+        self.registry.observe("request_duration_seconds", 0.2, method="ping")
+        text = self.registry.render_prometheus({"in_flight_requests": 3})
+
+        self.assertIn('app_wizard_requests_total{method="ping",status="ok"} 1', text)
+        self.assertIn(
+            'app_wizard_request_duration_seconds_bucket{method="ping",le="+Inf"} 1', text
+        )
+        self.assertIn('app_wizard_request_duration_seconds_count{method="ping"} 1', text)
+        self.assertIn("# TYPE app_wizard_in_flight_requests gauge", text)
+
+
+class TestMetricsExporter(unittest.IsolatedAsyncioTestCase):
+    """Test the file and HTTP exports"""
+
+    async def test_writes_file_and_serves_port(self):
+        registry = MetricsRegistry()
+        registry.inc("requests_total", method="ping", status="ok")
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "metrics.prom")
+            exporter = MetricsExporter(registry, path=path, port=0, interval=60)
+            await exporter.start()
+            try:
+                port = exporter._server.sockets[0].getsockname()[1]
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+                await writer.drain()
+                response = (await reader.read()).decode("utf-8")
+                writer.close()
+            finally:
+                await exporter.stop()
+
+            with open(path, encoding="utf-8") as f:
+                written = f.read()
+
+        self.assertTrue(response.startswith("HTTP/1.1 200 OK"))
+        self.assertIn("app_wizard_requests_total", response)
+        self.assertIn("app_wizard_requests_total", written)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,10 +2,32 @@
 Tests for content processors
 """
 
+import asyncio
+import os
+import socket
+import tempfile
+import threading
+import time
 import unittest
+from unittest.mock import patch
 
+from src.processors.candidates import (
+    WINDOW_SEPARATOR,
+    find_candidate_windows,
+    select_candidate_text,
+)
+from src.processors.chunker import (
+    merge_addresses,
+    pack_documents,
+    split_into_chunks,
+)
+from src.processors.cleaning_pool import CleaningPool
 from src.processors.content_processor import ContentProcessor
+from src.processors.crawler import SiteCrawler, parse_sitemap
+from src.processors.file_reader import detect_encoding, iter_text_windows, read_text
+from src.processors.html_extractor import HTMLTextExtractor, extract_html_text
 from src.processors.input_handler import InputHandler
+from src.utils.metrics import metrics
 
 
 class TestContentProcessor(unittest.TestCase):
@@ -22,6 +44,261 @@ class TestContentProcessor(unittest.TestCase):
         result = ContentProcessor._truncate_content(long_text, 10000)
         self.assertTrue(len(result) <= 10000 + 50)  # Account for truncation message
 
+    def test_truncation_disabled(self):
+        long_text = "a" * 15000
+        self.assertEqual(ContentProcessor._truncate_content(long_text, None), long_text)
+
+    def test_clean_html_content(self):
+        html = (
+            "<html><head><title>Acme</title><style>p{color:red}</style></head>"
+            "<body><script>var x = '<p>hidden</p>';</script><noscript>Enable JS</noscript>"
+            "<address>123 Main St<br>Springfield, IL 62701</address></body></html>"
+        )
+        result = ContentProcessor.clean_html_content(html)
+        self.assertEqual(result, "Acme\n123 Main St\nSpringfield, IL 62701")
+
+
+class TestHTMLTextExtractor(unittest.TestCase):
+    """Test the streaming HTML text extractor"""
+
+    HTML = (
+        "<div>Visit us at\n   <b>HQ</b></div><script>alert('x')</script>"
+        "<p>Tel: 555 &amp; more</p><svg><text>ignored</text></svg>"
+    )
+
+    def test_stdlib_and_lxml_backends_agree(self):
+        expected = "Visit us at HQ\nTel: 555 & more"
+        self.assertEqual(extract_html_text(self.HTML, use_lxml=False), expected)
+        self.assertEqual(extract_html_text(self.HTML, use_lxml=True), expected)
+
+    def test_stops_at_budget(self):
+        extractor = HTMLTextExtractor(max_length=100)
+        fed = 0
+        for _ in range(1000):
+            fed += 1
+            if extractor.feed("<p>Some paragraph text</p>" * 10):
+                break
+        self.assertLess(fed, 5)
+        self.assertLessEqual(len(extractor.close()), 100 + 30)
+
+    def test_collects_links_past_budget(self):
+        html = "<p>text</p>" * 100 + "<a href='/contact'>Contact</a>"
+        for use_lxml in (False, True):
+            extractor = HTMLTextExtractor(max_length=50, use_lxml=use_lxml, collect_links=True)
+            self.assertFalse(extractor.feed(html))
+            self.assertNotIn("Contact", extractor.close())
+            self.assertEqual(extractor.links, ["/contact"])
+
+
+class TestChunker(unittest.TestCase):
+    """Test document chunking and result merging"""
+
+    def test_chunks_cover_text_with_overlap(self):
+        text = "\n\n".join(f"Paragraph {i} at {i} Main Street." for i in range(200))
+        chunks = split_into_chunks(text, 500, overlap=100)
+
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 500 for chunk in chunks))
+        self.assertTrue(chunks[0].endswith("\n\n"))
+        for i in range(200):
+            self.assertTrue(any(f"at {i} Main Street." in c for c in chunks))
+
+    def test_short_text_is_one_chunk(self):
+        self.assertEqual(split_into_chunks("short", 100, overlap=10), ["short"])
+
+    def test_merge_drops_duplicates_and_partials(self):
+        merged = merge_addresses(
+            [
+                ["123 Main St", "1 Elm St"],
+                ["123 main st.", "123 Main St, Springfield, IL 62701", "11 Elm St"],
+            ]
+        )
+        self.assertEqual(
+            merged, ["1 Elm St", "123 Main St, Springfield, IL 62701", "11 Elm St"]
+        )
+
+    def test_pack_documents(self):
+        groups = pack_documents([40, 40, 40, 500, 10], budget=100, max_documents=10)
+        self.assertEqual(groups, [[0, 1], [2], [3], [4]])
+
+        groups = pack_documents([1] * 5, budget=100, max_documents=2)
+        self.assertEqual(groups, [[0, 1], [2, 3], [4]])
+
+
+class TestCandidateWindows(unittest.TestCase):
+    """Test pre-selecting address regions"""
+
+    FILLER = "Our team loves building great products for customers. " * 40
+
+    def test_no_candidates(self):
+        self.assertEqual(find_candidate_windows(self.FILLER), [])
+        self.assertEqual(select_candidate_text(self.FILLER), "")
+
+    def test_keeps_context_around_markers(self):
+        text = self.FILLER + "Visit us at 123 Main Street, Springfield, IL 62701. " + self.FILLER
+        selected = select_candidate_text(text, context=100)
+
+        self.assertIn("123 Main Street, Springfield, IL 62701", selected)
+        self.assertLess(len(selected), len(text) // 4)
+
+    def test_nearby_markers_share_a_window(self):
+        text = self.FILLER + "10 Downing Street, London SW1A 2AA" + self.FILLER
+        self.assertEqual(len(find_candidate_windows(text, context=100)), 1)
+
+    def test_distant_markers_get_separate_windows(self):
+        text = "Hauptstraße 5, 10115 Berlin. " + self.FILLER + " 東京都千代田区丸の内1丁目"
+        selected = select_candidate_text(text, context=50)
+
+        self.assertEqual(selected.count(WINDOW_SEPARATOR), 1)
+        self.assertIn("Hauptstraße 5, 10115 Berlin", selected)
+        self.assertIn("丸の内1丁目", selected)
+
+    def test_dense_document_is_kept_whole(self):
+        text = "Ship to 1 Main St. Bill to 2 Oak Ave. Return to 3 Elm Rd."
+        self.assertEqual(select_candidate_text(text), text)
+
+
+SITE = {
+    "/": (
+        "<p>Welcome</p><a href='/news'>News</a><a href='/contact#map'>Contact</a>"
+        "<a href='https://other.example/'>Partner</a><a href='/private/x'>Staff</a>"
+        "<a href='/logo.png'>Logo</a>"
+    ),
+    "/news": "<p>News</p><a href='/team'>Team</a>",
+    "/team": "<p>Team</p><a href='/team/more'>More</a>",
+    "/team/more": "<p>Too deep</p>",
+    "/contact": "<p>Visit 1 Elm Street, Boston, MA 02110</p>",
+    "/locations": "<p>2 Oak Road, Salem, MA 01970</p>",
+    "/private/x": "<p>Secret</p>",
+}
+
+ROBOTS = "User-agent: *\nDisallow: /private\n"
+
+SITEMAP = (
+    '<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+    "<url><loc>https://www.shop.example/locations</loc></url></urlset>"
+)
+
+
+class TestSiteCrawler(unittest.IsolatedAsyncioTestCase):
+    """Test the same-site crawler against an in-memory site"""
+
+    def setUp(self):
+        import httpx
+
+        self.requested = []
+        self.redirects = {}
+        self.robots_padding = ""
+
+        def handler(request):
+            self.requested.append(str(request.url))
+            if request.url.host != "shop.example":
+                return httpx.Response(200, html="<p>elsewhere</p>")
+            path = request.url.path
+            if path == "/robots.txt":
+                return httpx.Response(200, text=ROBOTS + self.robots_padding)
+            if str(request.url) in self.redirects:
+                location = self.redirects[str(request.url)]
+                return httpx.Response(301, headers={"Location": location})
+            if path == "/sitemap.xml":
+                return httpx.Response(200, text=SITEMAP)
+            if path in SITE:
+                return httpx.Response(200, html=SITE[path])
+            return httpx.Response(404)
+
+        self.transport = httpx.MockTransport(handler)
+
+    def crawler(self, **kwargs):
+        return SiteCrawler(delay=0, transport=self.transport, **kwargs)
+
+    async def test_crawls_site_within_depth(self):
+        pages = await self.crawler(max_depth=2).crawl("https://shop.example/")
+        urls = {page.url for page in pages}
+        self.assertEqual(
+            urls,
+            {
+                "https://shop.example/",
+                "https://shop.example/news",
+                "https://shop.example/contact",
+                "https://www.shop.example/locations",
+                "https://shop.example/team",
+            },
+        )
+        self.assertFalse(any("other.example" in url for url in self.requested))
+        self.assertFalse(any("/private" in url or ".png" in url for url in self.requested))
+        contact = next(page for page in pages if page.url.endswith("/contact"))
+        self.assertEqual(contact.depth, 1)
+        self.assertIn("1 Elm Street", contact.content)
+
+    async def test_likely_address_pages_come_first(self):
+        pages = await self.crawler(max_pages=3).crawl("https://shop.example/")
+        self.assertEqual(
+            {page.url for page in pages},
+            {
+                "https://shop.example/",
+                "https://shop.example/contact",
+                "https://www.shop.example/locations",
+            },
+        )
+
+    async def test_ignores_robots_when_asked(self):
+        pages = await self.crawler(respect_robots=False).crawl("https://shop.example/")
+        self.assertIn("https://shop.example/private/x", {page.url for page in pages})
+
+    async def test_redirects_stay_on_site(self):
+        self.redirects = {
+            "https://shop.example/news": "https://shop.example/team",
+            "https://shop.example/contact": "https://other.example/contact",
+        }
+        pages = await self.crawler().crawl("https://shop.example/")
+        self.assertFalse(any("other.example" in url for url in self.requested))
+        urls = {page.url for page in pages}
+        self.assertIn("https://shop.example/team", urls)
+        self.assertNotIn("https://shop.example/contact", urls)
+
+    async def test_redirects_to_disallowed_pages_are_not_followed(self):
+        self.redirects = {"https://shop.example/news": "https://shop.example/private/x"}
+        await self.crawler().crawl("https://shop.example/")
+        self.assertFalse(any("/private" in url for url in self.requested))
+
+    async def test_robots_read_is_capped(self):
+        self.robots_padding = "#" * 5000 + "\nDisallow: /news\n"
+        pages = await self.crawler(max_bytes=2000).crawl("https://shop.example/")
+        # The rule past the cap is never read
+        self.assertIn("https://shop.example/news", {page.url for page in pages})
+        self.assertFalse(any("/private" in url for url in self.requested))
+
+    async def test_deadline_bounds_trickled_pages(self):
+        import httpx
+
+        async def trickle():
+            while True:
+                yield b"<p>still loading</p>"
+                await asyncio.sleep(0.05)
+
+        def handler(request):
+            if request.url.path == "/":
+                headers = {"content-type": "text/html"}
+                return httpx.Response(200, headers=headers, content=trickle())
+            return httpx.Response(404)
+
+        metrics.reset()
+        crawler = SiteCrawler(delay=0, deadline=0.3, transport=httpx.MockTransport(handler))
+        started = time.monotonic()
+        pages = await crawler.crawl("https://shop.example/")
+
+        self.assertEqual(pages, [])
+        self.assertLess(time.monotonic() - started, 3)
+        self.assertEqual(metrics.counter_value("crawl_pages_total", outcome="timeout"), 1)
+
+    def test_parse_sitemap_index(self):
+        index = (
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+            "<sitemap><loc>https://a.example/s1.xml</loc></sitemap></sitemapindex>"
+        )
+        self.assertEqual(parse_sitemap(index), ([], ["https://a.example/s1.xml"]))
+        self.assertEqual(parse_sitemap("not xml"), ([], []))
+
 
 class TestInputHandler(unittest.TestCase):
     """Test input handling"""
@@ -39,5 +316,221 @@ class TestInputHandler(unittest.TestCase):
         self.assertFalse(self.handler._is_valid_url("not-a-url"))
 
 
+class FakeStreamingResponse:
+    """Streamed response stub that records how much of the body was read"""
+
+    def __init__(
+        self, body: bytes, content_type: str, chunk_size: int = 1000, declare_length=True
+    ):
+        self.body = body
+        self.headers = {"content-type": content_type}
+        if declare_length:
+            self.headers["content-length"] = str(len(body))
+        self.encoding = "utf-8" if "charset" in content_type else None
+        self.chunk_size = chunk_size
+        self.bytes_read = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size=None):
+        for i in range(0, len(self.body), self.chunk_size):
+            chunk = self.body[i : i + self.chunk_size]
+            self.bytes_read += len(chunk)
+            yield chunk
+
+
+class TestStreamingFetch(unittest.TestCase):
+    """Test bounded URL ingestion"""
+
+    def setUp(self):
+        self.handler = InputHandler({"max_bytes": 50000})
+
+    def fetch(self, response, max_length=None):
+        with patch.object(self.handler.session, "get", return_value=response):
+            return self.handler._fetch_url("https://example.com/page", max_length)
+
+    def test_stops_reading_once_budget_is_reached(self):
+        response = FakeStreamingResponse(b"x" * 1000000, "text/plain", declare_length=False)
+        content = self.fetch(response, max_length=2000)
+
+        self.assertTrue(content.startswith("x" * 2000))
+        self.assertLessEqual(response.bytes_read, 3000)
+
+    def test_enforces_byte_cap(self):
+        response = FakeStreamingResponse(
+            b"<p>hi</p>" * 100000, "text/html", declare_length=False
+        )
+        self.fetch(response, max_length=100000)
+        self.assertLessEqual(response.bytes_read, 51000)
+
+    def test_rejects_declared_length_over_cap_without_reading(self):
+        response = FakeStreamingResponse(b"<p>hi</p>" * 100000, "text/html")
+        self.assertEqual(self.fetch(response, max_length=100000), "")
+        self.assertEqual(response.bytes_read, 0)
+
+    def test_deadline_covers_whole_read_of_trickled_body(self):
+        listener = socket.socket()
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        self.addCleanup(listener.close)
+
+        def trickle():
+            conn, _ = listener.accept()
+            with conn:
+                conn.recv(4096)
+                conn.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\n"
+                    b"Content-Length: 10000\r\n\r\n"
+                )
+                # Each byte arrives well within the socket timeout
+                for _ in range(100):
+                    try:
+                        conn.sendall(b"x")
+                    except OSError:
+                        return
+                    time.sleep(0.05)
+
+        threading.Thread(target=trickle, daemon=True).start()
+        handler = InputHandler({"timeout": 5, "deadline": 0.3})
+        stops = metrics.counter_value("fetch_early_stops_total", reason="deadline")
+
+        start = time.monotonic()
+        handler._fetch_url(f"http://127.0.0.1:{listener.getsockname()[1]}/")
+
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(
+            metrics.counter_value("fetch_early_stops_total", reason="deadline"), stops + 1
+        )
+
+    def test_decodes_multibyte_across_chunks(self):
+        body = ("Hauptstraße 456, Berlin " * 100).encode("utf-8")
+        response = FakeStreamingResponse(body, "text/plain; charset=utf-8", 7)
+        self.assertIn("Hauptstraße 456", self.fetch(response))
+
+    def test_rejects_unsupported_type_without_reading(self):
+        response = FakeStreamingResponse(b"\x00" * 1000, "application/pdf")
+        self.assertEqual(self.fetch(response), "")
+        self.assertEqual(response.bytes_read, 0)
+
+
+class TestCleaningPool(unittest.IsolatedAsyncioTestCase):
+    """Test size-based offloading of HTML cleaning"""
+
+    HTML = "<p>Visit 1 Elm Street, Boston</p><script>x()</script><a href='/c'>C</a>" * 200
+
+    def setUp(self):
+        metrics.reset()
+        self.pool = CleaningPool(workers=1, min_chars=5000)
+        self.addCleanup(self.pool.close)
+
+    def test_small_documents_stay_inline(self):
+        text, _ = self.pool.clean("<p>Short page</p>")
+        self.assertEqual(text, "Short page")
+        self.assertEqual(metrics.counter_value("cleaning_jobs_total", mode="inline"), 1)
+        self.assertFalse(self.pool.stats()["started"])
+
+    async def test_large_documents_go_to_pool(self):
+        expected = extract_html_text(self.HTML, 2000)
+        text, links = await self.pool.aclean(self.HTML, 2000, collect_links=True)
+        self.assertEqual(text, expected)
+        self.assertEqual(len(links), 200)
+        self.assertEqual(self.pool.clean(self.HTML.encode("utf-8"), 2000)[0], expected)
+
+        self.assertEqual(metrics.counter_value("cleaning_jobs_total", mode="pool"), 2)
+        self.assertEqual(metrics.gauge_value("cleaning_pool_pending"), 0)
+        self.assertEqual(metrics.histogram("cleaning_pool_wait_seconds").count, 2)
+
+    def test_fetch_hands_large_pages_to_pool(self):
+        handler = InputHandler(cleaning_pool=self.pool)
+        response = FakeStreamingResponse(self.HTML.encode("utf-8"), "text/html")
+        with patch.object(handler.session, "get", return_value=response):
+            content = handler._fetch_url("https://example.com/page", 100000)
+
+        self.assertEqual(content, extract_html_text(self.HTML))
+        self.assertEqual(metrics.counter_value("cleaning_jobs_total", mode="pool"), 1)
+
+    def test_large_html_files_go_to_pool(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "page.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.HTML)
+            expected = InputHandler()._read_file(path)
+            content = InputHandler(cleaning_pool=self.pool)._read_file(path)
+
+        self.assertEqual(content, expected)
+        self.assertIn("Visit 1 Elm Street", content)
+        self.assertEqual(metrics.counter_value("cleaning_jobs_total", mode="pool"), 1)
+
+    def test_falls_back_inline_without_processes(self):
+        with patch(
+            "concurrent.futures.ProcessPoolExecutor", side_effect=OSError("no semaphores")
+        ):
+            text, _ = self.pool.clean(self.HTML, 100)
+        self.assertTrue(text.startswith("Visit 1 Elm Street"))
+        self.assertEqual(metrics.counter_value("cleaning_jobs_total", mode="fallback"), 1)
+
+
+class TestFileReader(unittest.TestCase):
+    """Test bounded file ingestion"""
+
+    def setUp(self):
+        self.handler = InputHandler()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write(self, name: str, data: bytes) -> str:
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        return path
+
+    def test_detect_encoding(self):
+        self.assertEqual(detect_encoding(b"\xef\xbb\xbfHello"), "utf-8-sig")
+        self.assertEqual(detect_encoding("Straße".encode("utf-16")), "utf-16")
+        self.assertEqual(detect_encoding("Straße".encode("utf-8")), "utf-8")
+        # A prefix cut inside a multi-byte character is still UTF-8
+        self.assertEqual(detect_encoding("ß".encode("utf-8")[:1]), "utf-8")
+
+    def test_reads_legacy_encodings(self):
+        path = self.write("legacy.txt", "Hauptstraße 456, Köln".encode("cp1252"))
+        content, input_type = self.handler.process_input(path)
+        self.assertEqual(input_type, "file")
+        self.assertEqual(content, "Hauptstraße 456, Köln")
+
+    def test_stops_reading_at_budget(self):
+        path = self.write("big.txt", b"x" * 1000000)
+        bytes_read = []
+
+        def counting_read_text(*args, **kwargs):
+            bytes_read.append(read_text(*args, **kwargs))
+            return bytes_read[-1]
+
+        with patch("src.processors.input_handler.read_text", counting_read_text):
+            content = self.handler._read_file(path, max_length=100)
+        self.assertTrue(content.startswith("x" * 100))
+        self.assertTrue(content.endswith("[content truncated]"))
+        self.assertEqual(bytes_read, [65536])
+
+    def test_html_file_is_cleaned(self):
+        path = self.write("page.html", b"<p>10 Downing Street</p><script>x()</script>")
+        self.assertEqual(self.handler._read_file(path), "10 Downing Street")
+
+    def test_empty_file(self):
+        self.assertEqual(self.handler._read_file(self.write("empty.txt", b"")), "")
+
+    def test_overlapping_windows(self):
+        path = self.write("windows.txt", bytes(range(97, 123)) * 4)
+        windows = list(iter_text_windows(path, window_bytes=40, overlap_bytes=10))
+        self.assertEqual(windows[0][-10:], windows[1][:10])
+        self.assertEqual(windows[-1][-1], "z")
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -2,13 +2,26 @@
 Tests for provider implementations
 """
 
+import asyncio
+import contextlib
+import json
+import threading
 import unittest
 from unittest.mock import patch
 
+import httpx
+
+from src.providers.base_provider import ProviderError
+from src.providers.circuit_breaker import AdaptiveTimeout, CircuitBreaker
+from src.providers.local_provider import LocalProvider
+from src.providers.model_residency import ModelResidencyManager
 from src.providers.ollama_provider import OllamaProvider
 from src.providers.openai_provider import OpenAIProvider
 from src.providers.provider_factory import ProviderFactory
+from src.providers.provider_registry import ProviderRegistry
+from src.providers.scheduler import BATCH, INTERACTIVE, ProviderScheduler, TokenBucket
 from src.utils.config import Config
+from src.utils.metrics import STAGE_SECONDS, metrics
 
 
 class TestOpenAIProvider(unittest.TestCase):
@@ -17,12 +30,20 @@ class TestOpenAIProvider(unittest.TestCase):
     def setUp(self):
         self.config = {"api_key": "test-key"}
 
-    @patch("src.providers.openai_provider.OpenAI")
-    def test_provider_initialization(self, mock_openai):
+    def test_provider_initialization(self):
         provider = OpenAIProvider(self.config)
         self.assertTrue(provider.is_available())
         self.assertEqual(provider.provider_name, "openai")
 
+    @patch("openai.AsyncOpenAI")
+    def test_client_created_on_first_use(self, mock_async_openai):
+        provider = OpenAIProvider(self.config)
+        mock_async_openai.assert_not_called()
+
+        self.assertIs(provider.async_client, mock_async_openai.return_value)
+        self.assertIs(provider.async_client, mock_async_openai.return_value)
+        mock_async_openai.assert_called_once_with(api_key="test-key")
+
     def test_provider_without_key(self):
         config = {"api_key": None}
         provider = OpenAIProvider(config)
@@ -41,6 +62,212 @@ class TestOllamaProvider(unittest.TestCase):
         self.assertEqual(provider.base_url, "http://localhost:11434")
 
 
+class TestOllamaProviderAsync(unittest.IsolatedAsyncioTestCase):
+    """Test the async Ollama extraction path"""
+
+    async def asyncSetUp(self):
+        self.provider = OllamaProvider(
+            {"base_url": "http://ollama.test", "default_model": "llama2"}
+        )
+        self.requests = []
+
+        def handler(request):
+            self.requests.append(request.url.path)
+            if request.url.path == "/api/version":
+                return httpx.Response(200, json={"version": "0.1"})
+            if request.url.path == "/api/tags":
+                return httpx.Response(200, json={"models": [{"name": "llama2"}]})
+            if json.loads(request.content).get("stream"):
+                tokens = ["123 Main", " St, NYC\n456 Sun", "set Blvd, LA"]
+                body = "".join(
+                    json.dumps({"response": t, "done": False}) + "\n" for t in tokens
+                ) + json.dumps({"response": "", "done": True}) + "\n"
+                return httpx.Response(200, content=body.encode())
+            return httpx.Response(
+                200, json={"response": "123 Main St, NYC\n456 Sunset Blvd, LA"}
+            )
+
+        self.provider._client = httpx.AsyncClient(
+            base_url="http://ollama.test", transport=httpx.MockTransport(handler)
+        )
+
+    async def asyncTearDown(self):
+        await self.provider.aclose()
+
+    async def test_aextract_addresses(self):
+        addresses = await self.provider.aextract_addresses("some text")
+        self.assertEqual(addresses, ["123 Main St, NYC", "456 Sunset Blvd, LA"])
+        # The hot path makes no availability or model probes
+        self.assertEqual(self.requests, ["/api/generate"])
+
+    async def test_astream_addresses(self):
+        metrics.reset()
+        addresses = [a async for a in self.provider.astream_addresses("some text")]
+        self.assertEqual(addresses, ["123 Main St, NYC", "456 Sunset Blvd, LA"])
+        # One parse sample per response, not per token
+        self.assertEqual(metrics.histogram(STAGE_SECONDS, stage="parse").count, 1)
+
+    async def test_aget_available_models(self):
+        self.assertEqual(await self.provider.aget_available_models(), ["llama2"])
+
+
+class TestModelResidency(unittest.IsolatedAsyncioTestCase):
+    """Test Ollama warm-up, keep-alive and context sizing"""
+
+    def setUp(self):
+        metrics.reset()
+        self.manager = ModelResidencyManager(
+            ["llama2"], keep_alive="10m", ping_interval=0.05, min_ctx=2048, max_ctx=8192
+        )
+
+    async def asyncTearDown(self):
+        await self.manager.stop()
+
+    def test_context_sized_from_prompt(self):
+        small = self.manager.options("other", "x" * 400)
+        self.assertEqual((small["num_ctx"], small["num_predict"]), (2048, 128))
+
+        large = self.manager.options("other", "x" * 20000)
+        self.assertEqual((large["num_ctx"], large["num_predict"]), (8192, 500))
+        self.assertEqual(self.manager.options("other", "x" * 100000)["num_ctx"], 8192)
+
+    def test_context_never_shrinks_while_loaded(self):
+        self.manager.options("llama2", "x" * 20000)
+        self.manager.record("llama2", {"load_duration": 2_000_000_000})
+        # A smaller context would make Ollama reload the model
+        self.assertEqual(self.manager.options("llama2", "x" * 400)["num_ctx"], 8192)
+
+        self.manager.forget("llama2")
+        self.assertEqual(self.manager.options("llama2", "x" * 400)["num_ctx"], 2048)
+
+    def test_counts_cold_loads(self):
+        self.manager.record("llama2", {"load_duration": 10_000_000})
+        self.manager.record("llama2", {"load_duration": 3_000_000_000})
+        self.assertEqual(
+            metrics.counter_value("ollama_cold_loads_total", model="llama2", cause="request"),
+            1,
+        )
+        self.assertEqual(self.manager.stats()["llama2"]["last_load_seconds"], 3.0)
+
+    async def test_warms_up_and_pings_idle_models(self):
+        loads = []
+
+        async def load(model, options):
+            loads.append((model, options["num_ctx"]))
+            return {"load_duration": 4_000_000_000 if len(loads) == 1 else 1000}
+
+        self.manager.start(load)
+        await asyncio.sleep(0.15)
+        self.assertGreaterEqual(len(loads), 2)
+        self.assertEqual(loads[0], ("llama2", 2048))
+        self.assertEqual(
+            metrics.counter_value("ollama_cold_loads_total", model="llama2", cause="warmup"),
+            1,
+        )
+        self.assertTrue(self.manager.stats()["llama2"]["resident"])
+
+    async def test_provider_sends_keep_alive_and_records_loads(self):
+        payloads = []
+
+        def handler(request):
+            payloads.append(json.loads(request.content))
+            return httpx.Response(
+                200, json={"response": "1 Elm St", "load_duration": 2_500_000_000}
+            )
+
+        provider = OllamaProvider(
+            {"base_url": "http://ollama.test", "num_ctx": 4096, "keep_alive": "1h"}
+        )
+        provider._client = httpx.AsyncClient(
+            base_url="http://ollama.test", transport=httpx.MockTransport(handler)
+        )
+        self.addAsyncCleanup(provider.aclose)
+
+        await provider.acomplete("Find addresses in: 1 Elm St", "llama2")
+        self.assertEqual(payloads[0]["keep_alive"], "1h")
+        self.assertEqual(payloads[0]["options"]["num_ctx"], 2048)
+        self.assertEqual(provider.runtime_stats()["models"]["llama2"]["cold_loads"], 1)
+
+
+class TestParseAddresses(unittest.TestCase):
+    """Test model response parsing"""
+
+    def test_parse_batch_addresses(self):
+        response = (
+            "=== DOCUMENT 1 ===\n1 A St\n2 B Rd\n"
+            "=== DOCUMENT 2 ===\nNo addresses found\n"
+            "=== DOCUMENT 4 ===\n4 D Ave"
+        )
+        self.assertEqual(
+            OllamaProvider.parse_batch_addresses(response, 4),
+            [["1 A St", "2 B Rd"], [], None, ["4 D Ave"]],
+        )
+
+    def test_no_addresses_found(self):
+        self.assertEqual(OllamaProvider.parse_addresses("No addresses found"), [])
+
+    def test_strips_blank_lines(self):
+        self.assertEqual(
+            OllamaProvider.parse_addresses(" 1 A St \n\n 2 B Rd "), ["1 A St", "2 B Rd"]
+        )
+
+
+class TestLocalProvider(unittest.TestCase):
+    """Test the rule-based provider"""
+
+    def setUp(self):
+        self.provider = LocalProvider({})
+
+    def test_extracts_us_uk_and_eu_addresses(self):
+        text = (
+            "Visit 123 Main Street, New York, NY 10001 or 10 Downing Street, "
+            "London SW1A 2AA. Das Büro ist in der Hauptstraße 456, 10115 Berlin."
+        )
+        addresses, confidence = self.provider.extract_with_confidence(text)
+        self.assertEqual(
+            addresses,
+            [
+                "123 Main Street, New York, NY 10001",
+                "10 Downing Street, London SW1A 2AA",
+                "Hauptstraße 456, 10115 Berlin",
+            ],
+        )
+        self.assertEqual(confidence, 1.0)
+
+    def test_low_confidence_for_partial_or_unsupported(self):
+        _, confidence = self.provider.extract_with_confidence("Meet at 456 Sunset Blvd")
+        self.assertLess(confidence, 0.8)
+
+        _, confidence = self.provider.extract_with_confidence("東京都渋谷区神南1-2-3")
+        self.assertEqual(confidence, 0.0)
+
+    def test_no_addresses(self):
+        self.assertEqual(self.provider.extract_addresses("We sold 500 units in 2023"), [])
+
+
+class TestLocalProviderAsync(unittest.IsolatedAsyncioTestCase):
+    """Test that long texts are matched off the event loop"""
+
+    async def test_long_text_matched_in_a_worker_thread(self):
+        provider = LocalProvider({})
+        threads = []
+        extract = provider.extract_addresses
+
+        def recording_extract(text, model=None):
+            threads.append(threading.current_thread())
+            return extract(text, model)
+
+        provider.extract_addresses = recording_extract
+        await provider.aextract_addresses("Ship to 1 Elm Street, Boston, MA 02110")
+        addresses = await provider.aextract_addresses(
+            "filler text " * 1000 + "Ship to 1 Elm Street, Boston, MA 02110"
+        )
+
+        self.assertEqual(addresses, ["1 Elm Street, Boston, MA 02110"])
+        self.assertIs(threads[0], threading.main_thread())
+        self.assertIsNot(threads[1], threading.main_thread())
+
+
 class TestProviderFactory(unittest.TestCase):
     """Test provider factory"""
 
@@ -50,6 +277,480 @@ class TestProviderFactory(unittest.TestCase):
     def test_factory_initialization(self):
         factory = ProviderFactory(self.config)
         self.assertIsInstance(factory, ProviderFactory)
+        self.assertIn("local", factory.providers)
+
+    def test_initialization_does_not_probe(self):
+        with patch.object(OllamaProvider, "is_available") as probe:
+            factory = ProviderFactory(self.config)
+        probe.assert_not_called()
+        self.assertIn("ollama", factory.providers)
+
+
+class TestAutoLocalFirst(unittest.IsolatedAsyncioTestCase):
+    """Test local-first routing in auto mode"""
+
+    async def asyncSetUp(self):
+        config = Config()
+        config.local_config = {"auto_first": True, "min_confidence": 0.8}
+        self.factory = ProviderFactory(config)
+        self.llm_calls = 0
+
+        async def llm_extract(text, model=None):
+            self.llm_calls += 1
+            return ["from llm"]
+
+        for name in ["openai", "ollama"]:
+            if name in self.factory.providers:
+                patch.object(
+                    self.factory.providers[name], "aextract_addresses", llm_extract
+                ).start()
+        self.addCleanup(patch.stopall)
+
+    async def test_confident_local_result_skips_llm(self):
+        addresses, provider = await self.factory.aextract_addresses(
+            "Ship to 123 Main Street, New York, NY 10001"
+        )
+        self.assertEqual(provider, "local")
+        self.assertEqual(addresses, ["123 Main Street, New York, NY 10001"])
+        self.assertEqual(self.llm_calls, 0)
+
+
+class DelayedProvider(LocalProvider):
+    """Provider stub answering after a fixed delay"""
+
+    def __init__(self, name, delay, addresses, fail=False):
+        super().__init__({})
+        self.name = name
+        self.delay = delay
+        self.addresses = addresses
+        self.fail = fail
+        self.calls = 0
+        self.cancelled = 0
+
+    @property
+    def provider_name(self):
+        return self.name
+
+    async def aextract_addresses(self, text, model=None):
+        self.calls += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ProviderError(self.name, "connection refused")
+        return self.addresses
+
+
+class TestHedgedExtraction(unittest.IsolatedAsyncioTestCase):
+    """Test hedging slow auto-mode requests to the next provider"""
+
+    def make_factory(self, primary_delay, primary_fails=False):
+        config = Config()
+        config.hedging_config = {
+            "enabled": True,
+            "percentile": 0.95,
+            "default_delay": 0.05,
+            "min_delay": 0.01,
+            "min_samples": 20,
+        }
+        # Placeholder inputs have no address markers
+        config.candidate_config = {**config.candidate_config, "enabled": False}
+        factory = ProviderFactory(config)
+        self.primary = DelayedProvider(
+            "openai", primary_delay, ["from primary"], fail=primary_fails
+        )
+        self.backup = DelayedProvider("ollama", 0.01, ["from backup"])
+        factory.providers = {
+            "openai": self.primary,
+            "ollama": self.backup,
+            "local": factory.providers["local"],
+        }
+        factory.registry = ProviderRegistry(factory.providers, ttl=60)
+        return factory
+
+    async def test_slow_primary_is_hedged_and_cancelled(self):
+        factory = self.make_factory(primary_delay=5)
+        hedges = metrics.counter_value("hedges_total", primary="openai", backup="ollama")
+
+        addresses, provider = await factory.aextract_addresses(
+            "some text", cache_mode="bypass"
+        )
+
+        self.assertEqual((addresses, provider), (["from backup"], "ollama"))
+        self.assertEqual(self.primary.cancelled, 1)
+        self.assertEqual(
+            metrics.counter_value("hedges_total", primary="openai", backup="ollama"),
+            hedges + 1,
+        )
+
+    async def test_fast_primary_is_not_hedged(self):
+        factory = self.make_factory(primary_delay=0)
+
+        addresses, provider = await factory.aextract_addresses(
+            "some text", cache_mode="bypass"
+        )
+
+        self.assertEqual((addresses, provider), (["from primary"], "openai"))
+        self.assertEqual(self.backup.calls, 0)
+
+    async def test_fast_failing_primary_falls_back_to_backup(self):
+        factory = self.make_factory(primary_delay=0, primary_fails=True)
+
+        addresses, provider = await factory.aextract_addresses(
+            "some text", cache_mode="bypass"
+        )
+
+        self.assertEqual((addresses, provider), (["from backup"], "ollama"))
+        self.assertEqual(self.backup.calls, 1)
+
+
+class FailingProvider(DelayedProvider):
+    """Provider stub whose calls always fail"""
+
+    async def aextract_addresses(self, text, model=None):
+        self.calls += 1
+        raise ConnectionError("backend down")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test breaker state transitions"""
+
+    def test_opens_on_failure_rate_and_recovers(self):
+        breaker = CircuitBreaker("ollama", failure_rate=0.5, min_calls=4, open_seconds=60)
+        for ok in [True, False, True]:
+            breaker.record_success() if ok else breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+
+        breaker.open_seconds = 0
+        self.assertTrue(breaker.allow())
+        # Only one trial call at a time while half-open
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        breaker = CircuitBreaker("ollama", min_calls=1, open_seconds=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.open_seconds = 60
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+
+class TestAdaptiveTimeout(unittest.TestCase):
+    """Test latency-based timeouts"""
+
+    def test_follows_observed_latency_per_size_class(self):
+        timeouts = AdaptiveTimeout(min_timeout=1, max_timeout=120, min_samples=3)
+        self.assertEqual(timeouts.timeout("llama", 500), 120)
+
+        for _ in range(10):
+            timeouts.observe("llama", 500, 2.0)
+
+        self.assertLess(timeouts.timeout("llama", 500), 10)
+        self.assertGreaterEqual(timeouts.timeout("llama", 500), 2.0)
+        # A much larger input has no history yet
+        self.assertEqual(timeouts.timeout("llama", 50000), 120)
+
+
+class TestProviderErrors(unittest.IsolatedAsyncioTestCase):
+    """Test failures surfacing as ProviderError and opening circuits"""
+
+    async def asyncSetUp(self):
+        config = Config()
+        config.breaker_config = {
+            "failure_rate": 0.5,
+            "min_calls": 2,
+            "window": 60,
+            "open_seconds": 60,
+        }
+        # Placeholder inputs have no address markers
+        config.candidate_config = {**config.candidate_config, "enabled": False}
+        self.factory = ProviderFactory(config)
+        self.failing = FailingProvider("openai", 0, [])
+        self.healthy = DelayedProvider("ollama", 0, ["1 Elm Street"])
+        self.factory.providers = {
+            "openai": self.failing,
+            "ollama": self.healthy,
+            "local": self.factory.providers["local"],
+        }
+        self.factory.registry = ProviderRegistry(self.factory.providers, ttl=60)
+
+    async def test_failure_raises_and_opens_circuit(self):
+        for _ in range(2):
+            with self.assertRaises(ProviderError) as raised:
+                await self.factory.aextract_addresses("text", "openai", cache_mode="bypass")
+            self.assertEqual(raised.exception.reason, "error")
+
+        with self.assertRaises(ProviderError) as raised:
+            await self.factory.aextract_addresses("text", "openai", cache_mode="bypass")
+        self.assertEqual(raised.exception.reason, "circuit_open")
+        self.assertEqual(self.failing.calls, 2)
+
+    async def test_auto_falls_back_to_next_provider(self):
+        addresses, provider = await self.factory.aextract_addresses(
+            "text", cache_mode="bypass"
+        )
+        self.assertEqual((addresses, provider), (["1 Elm Street"], "ollama"))
+
+    async def test_timeout_raises(self):
+        self.healthy.delay = 1
+        self.factory.timeouts("ollama").max_timeout = 0.05
+
+        with self.assertRaises(ProviderError) as raised:
+            await self.factory.aextract_addresses("text", "ollama", cache_mode="bypass")
+        self.assertEqual(raised.exception.reason, "timeout")
+
+    async def test_timeout_waiting_for_slot_raises(self):
+        @contextlib.asynccontextmanager
+        async def expired_slot(*args):
+            raise asyncio.TimeoutError
+            yield
+
+        with patch.object(self.factory.scheduler, "slot", expired_slot):
+            with self.assertRaises(ProviderError) as raised:
+                await self.factory.aextract_addresses("text", "ollama", cache_mode="bypass")
+        self.assertEqual(raised.exception.reason, "timeout")
+        self.assertEqual(self.healthy.calls, 0)
+
+
+class TestProviderScheduler(unittest.IsolatedAsyncioTestCase):
+    """Test outbound concurrency caps, priorities and rate limits"""
+
+    async def test_caps_concurrency_and_serves_interactive_first(self):
+        scheduler = ProviderScheduler({"ollama": {"max_concurrency": 1}})
+        order = []
+        release = asyncio.Event()
+
+        async def call(name, priority):
+            async with scheduler.slot("ollama", "llama", 100, priority):
+                order.append(name)
+                if name == "first":
+                    await release.wait()
+
+        first = asyncio.create_task(call("first", INTERACTIVE))
+        await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(call("batch", BATCH)),
+            asyncio.create_task(call("interactive", INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+
+        self.assertEqual(scheduler.stats()["ollama/llama"]["queued"], 2)
+        self.assertEqual(
+            metrics.gauge_value("scheduler_queue_depth", provider="ollama", model="llama"), 2
+        )
+
+        release.set()
+        await asyncio.gather(first, *queued)
+        self.assertEqual(order, ["first", "interactive", "batch"])
+        self.assertEqual(scheduler.stats()["ollama/llama"]["active"], 0)
+
+    async def test_cancelled_waiter_does_not_hold_a_slot(self):
+        scheduler = ProviderScheduler({"ollama": {"max_concurrency": 1}})
+        async with scheduler.slot("ollama", "llama", 100):
+            waiter = asyncio.create_task(scheduler.slot("ollama", "llama", 100).__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            await asyncio.gather(waiter, return_exceptions=True)
+
+        async with scheduler.slot("ollama", "llama", 100):
+            self.assertEqual(scheduler.stats()["ollama/llama"]["active"], 1)
+
+    async def test_rate_limited_call_waits_without_a_slot(self):
+        scheduler = ProviderScheduler({"ollama": {"max_concurrency": 1, "rpm": 1}})
+        async with scheduler.slot("ollama", "llama", 100):
+            pass
+
+        paced = asyncio.create_task(scheduler.slot("ollama", "llama", 100).__aenter__())
+        await asyncio.sleep(0.01)
+        self.assertFalse(paced.done())
+        self.assertEqual(scheduler.stats()["ollama/llama"]["active"], 0)
+        paced.cancel()
+        await asyncio.gather(paced, return_exceptions=True)
+
+    async def test_unlisted_providers_are_not_scheduled(self):
+        scheduler = ProviderScheduler({})
+        async with scheduler.slot("local", "rules", 100):
+            pass
+        self.assertEqual(scheduler.stats(), {})
+
+    def test_token_bucket_waits_for_debt(self):
+        bucket = TokenBucket(rate=100, capacity=100)
+        self.assertEqual(bucket.reserve(100), 0.0)
+        self.assertAlmostEqual(bucket.reserve(50), 0.5, places=2)
+
+
+class TestChunkedExtraction(unittest.IsolatedAsyncioTestCase):
+    """Test map-reduce extraction over long documents"""
+
+    async def test_long_document_is_chunked_and_merged(self):
+        config = Config()
+        config.chunking_config = {
+            "enabled": True,
+            "max_chunk_chars": 1000,
+            "overlap": 100,
+            "fan_out": 2,
+            "max_document_chars": 100000,
+        }
+        factory = ProviderFactory(config)
+        provider = factory.providers["local"]
+        calls = []
+
+        async def extract(text, model=None):
+            calls.append(text)
+            return provider.extract_addresses(text)
+
+        text = " filler text." * 400 + " Office at 99 Late Street, Boston, MA 02110."
+        with patch.object(provider, "max_input_chars", return_value=1000), patch.object(
+            provider, "aextract_addresses", extract
+        ):
+            addresses, _ = await factory.aextract_addresses(text, "local")
+
+        self.assertGreater(len(calls), 1)
+        self.assertEqual(addresses, ["99 Late Street, Boston, MA 02110"])
+
+
+class TestCandidateSelection(unittest.IsolatedAsyncioTestCase):
+    """Test narrowing documents to candidate windows before LLM calls"""
+
+    async def asyncSetUp(self):
+        self.factory = ProviderFactory(Config())
+        self.provider = DelayedProvider("ollama", 0, ["from llm"])
+        self.factory.providers = {"ollama": self.provider}
+        self.factory.registry.providers = self.factory.providers
+        self.prompts = []
+
+        original = self.provider.aextract_addresses
+
+        async def extract(text, model=None):
+            self.prompts.append(text)
+            return await original(text, model)
+
+        patch.object(self.provider, "aextract_addresses", extract).start()
+        self.addCleanup(patch.stopall)
+
+    async def test_document_without_candidates_skips_the_llm(self):
+        text = "Nothing to see here, just a long paragraph of prose. " * 50
+        addresses, _ = await self.factory.aextract_addresses(
+            text, "ollama", cache_mode="bypass"
+        )
+        self.assertEqual(addresses, [])
+        self.assertEqual(self.prompts, [])
+
+    async def test_only_windows_are_sent(self):
+        filler = "Nothing to see here, just a long paragraph of prose. " * 50
+        text = filler + "Write to 742 Evergreen Terrace, Springfield. " + filler
+        addresses, _ = await self.factory.aextract_addresses(
+            text, "ollama", cache_mode="bypass"
+        )
+
+        self.assertEqual(addresses, ["from llm"])
+        self.assertEqual(len(self.prompts), 1)
+        self.assertIn("742 Evergreen Terrace, Springfield", self.prompts[0])
+        self.assertLess(len(self.prompts[0]), len(text) // 4)
+
+    async def test_batch_skips_documents_without_candidates(self):
+        results, _ = await self.factory.aextract_addresses_batch(
+            ["no markers at all", "Write to 742 Evergreen Terrace"],
+            "ollama",
+            cache_mode="bypass",
+        )
+        self.assertEqual(results[0], [])
+        self.assertEqual(self.prompts, ["Write to 742 Evergreen Terrace"])
+
+
+class TestBatchExtraction(unittest.IsolatedAsyncioTestCase):
+    """Test multi-document prompt packing"""
+
+    async def test_packs_documents_and_falls_back_for_missing(self):
+        config = Config()
+        # Placeholder inputs have no address markers
+        config.candidate_config = {**config.candidate_config, "enabled": False}
+        factory = ProviderFactory(config)
+        provider = factory.providers["ollama"]
+        prompts = []
+
+        async def complete(prompt, model=None):
+            prompts.append(prompt)
+            # Answer every document but the last one
+            return "\n".join(
+                f"=== DOCUMENT {i} ===\n{i} Packed St" for i in range(1, 3)
+            )
+
+        async def extract(text, model=None):
+            return [f"single: {text}"]
+
+        async def available():
+            return True
+
+        async def models():
+            return []
+
+        with patch.object(provider, "acomplete", complete), patch.object(
+            provider, "aextract_addresses", extract
+        ), patch.object(provider, "ais_available", available), patch.object(
+            provider, "aget_available_models", models
+        ):
+            results, used = await factory.aextract_addresses_batch(
+                ["doc a", "doc b", "doc c"], "ollama"
+            )
+
+        self.assertEqual(used, "ollama")
+        self.assertEqual(len(prompts), 1)
+        self.assertEqual(
+            results, [["1 Packed St"], ["2 Packed St"], ["single: doc c"]]
+        )
+
+
+class CountingProvider(OllamaProvider):
+    """Ollama provider stub that counts probes"""
+
+    def __init__(self, available=True):
+        super().__init__({"default_model": "llama2"})
+        self.available = available
+        self.probes = 0
+
+    async def ais_available(self):
+        self.probes += 1
+        return self.available
+
+    async def aget_available_models(self):
+        return ["llama2", "mistral"]
+
+
+class TestProviderRegistry(unittest.IsolatedAsyncioTestCase):
+    """Test cached provider status"""
+
+    async def test_probes_once_within_ttl(self):
+        provider = CountingProvider()
+        registry = ProviderRegistry({"ollama": provider}, ttl=60)
+
+        for _ in range(5):
+            await registry.ensure_fresh("ollama")
+
+        self.assertEqual(provider.probes, 1)
+        self.assertTrue(registry.is_available("ollama"))
+        self.assertEqual(registry.models("ollama"), ["llama2", "mistral"])
+
+    async def test_failure_triggers_refresh(self):
+        provider = CountingProvider()
+        registry = ProviderRegistry({"ollama": provider}, ttl=60)
+        await registry.ensure_fresh("ollama")
+
+        provider.available = False
+        registry.mark_failure("ollama", RuntimeError("boom"))
+        await registry.refresh("ollama")
+
+        self.assertEqual(provider.probes, 2)
+        self.assertFalse(registry.is_available("ollama"))
+        await registry.stop()
 
 
 if __name__ == "__main__":
@@ -2,10 +2,25 @@
 Tests for MCP server
 """
 
+import asyncio
+import io
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
 import unittest
+from unittest.mock import patch
 
+from src.providers.base_provider import ProviderError
 from src.server.mcp_server import MCPServer
+from src.server.socket_transport import SocketTransport, serve_socket
+from src.server.supervisor import Supervisor
 from src.utils.config import Config
+from src.utils.metrics import metrics
 
 
 class TestMCPServer(unittest.TestCase):
@@ -31,5 +46,469 @@ class TestMCPServer(unittest.TestCase):
         self.assertEqual(response["code"], -32601)
 
 
+class TestMCPServerDispatch(unittest.IsolatedAsyncioTestCase):
+    """Test concurrent request dispatch"""
+
+    def setUp(self):
+        self.server = MCPServer(Config())
+
+    async def test_slow_request_does_not_block_ping(self):
+        async def slow_extract(text, *args):
+            await asyncio.sleep(0.3)
+            return ["123 Main St"], "ollama"
+
+        requests = [
+            {"id": 1, "method": "identify_addresses", "params": {"input": "text"}},
+            {"id": 2, "method": "ping"},
+        ]
+        stdin = io.StringIO("".join(json.dumps(r) + "\n" for r in requests))
+        stdout = io.StringIO()
+
+        with patch.object(
+            self.server.provider_factory, "aextract_addresses", slow_extract
+        ), patch("sys.stdin", stdin), patch("sys.stdout", stdout):
+            await self.server.run()
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([r["id"] for r in responses], [2, 1])
+        self.assertEqual(responses[0]["result"], "pong")
+        self.assertEqual(responses[1]["result"]["addresses"], ["123 Main St"])
+
+    async def test_streaming_sends_addresses_before_result(self):
+        request = {
+            "id": 7,
+            "method": "identify_addresses",
+            "params": {
+                "input": "Ship to 1 Elm Street, Boston, MA 02110 or 2 Oak Road, Salem, MA 01970",
+                "provider": "local",
+                "stream": True,
+            },
+        }
+        stdin = io.StringIO(json.dumps(request) + "\n")
+        stdout = io.StringIO()
+
+        with patch("sys.stdin", stdin), patch("sys.stdout", stdout):
+            await self.server.run()
+
+        messages = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        notifications = [m for m in messages if m.get("method")]
+        self.assertEqual(
+            [n["params"]["address"] for n in notifications],
+            ["1 Elm Street, Boston, MA 02110", "2 Oak Road, Salem, MA 01970"],
+        )
+        self.assertTrue(all(n["params"]["id"] == 7 for n in notifications))
+        self.assertEqual(messages[-1]["id"], 7)
+        self.assertEqual(messages[-1]["result"]["count"], 2)
+
+    async def test_parse_error_response(self):
+        stdin = io.StringIO("not json\n")
+        stdout = io.StringIO()
+
+        with patch("sys.stdin", stdin), patch("sys.stdout", stdout):
+            await self.server.run()
+
+        self.assertEqual(json.loads(stdout.getvalue())["code"], -32700)
+
+    async def test_non_object_request_is_rejected(self):
+        stdin = io.StringIO("[1, 2]\n\"x\"\n")
+        stdout = io.StringIO()
+
+        with patch("sys.stdin", stdin), patch("sys.stdout", stdout):
+            await self.server.run()
+
+        responses = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual([r["code"] for r in responses], [-32600, -32600])
+
+    async def test_non_object_params_are_rejected(self):
+        request = {"id": 4, "method": "identify_addresses", "params": "1 Elm Street"}
+        stdin = io.StringIO(json.dumps(request) + "\n")
+        stdout = io.StringIO()
+
+        with patch("sys.stdin", stdin), patch("sys.stdout", stdout):
+            await self.server.run()
+
+        response = json.loads(stdout.getvalue())
+        self.assertEqual((response["id"], response["code"]), (4, -32602))
+
+    async def test_stats_reports_stages_and_requests(self):
+        metrics.reset()
+        await self.server.handle_request(
+            {
+                "method": "identify_addresses",
+                "params": {"input": "Ship to 1 Elm Street, Boston, MA 02110", "provider": "local"},
+            }
+        )
+        response = await self.server.handle_request({"method": "stats"})
+
+        stats = response["result"]
+        stages = {h["labels"]["stage"] for h in stats["histograms"]["stage_duration_seconds"]}
+        self.assertIn("classify", stages)
+        self.assertIn("provider_call", stages)
+        requests = {
+            c["labels"]["method"]: c["value"] for c in stats["counters"]["requests_total"]
+        }
+        self.assertEqual(requests, {"identify_addresses": 1})
+        self.assertIn("hit_rate", stats["cache"])
+
+    async def test_provider_failure_is_an_error_response(self):
+        async def failing_extract(*args):
+            raise ProviderError("ollama", "timed out after 5.0s", "timeout")
+
+        with patch.object(
+            self.server.provider_factory, "aextract_addresses", failing_extract
+        ):
+            response = await self.server.handle_request(
+                {"method": "identify_addresses", "params": {"input": "text"}}
+            )
+
+        self.assertEqual(response["code"], -32000)
+        self.assertEqual(response["data"], {"provider": "ollama", "reason": "timeout"})
+
+    async def test_unavailable_provider_is_an_error_response(self):
+        response = await self.server.handle_request(
+            {
+                "method": "identify_addresses",
+                "params": {"input": "Ship to 1 Elm Street", "provider": "anthropic"},
+            }
+        )
+        self.assertEqual(response["code"], -32000)
+        self.assertEqual(
+            response["data"], {"provider": "anthropic", "reason": "unavailable"}
+        )
+
+        response = await self.server.handle_request(
+            {
+                "method": "identify_addresses_batch",
+                "params": {"inputs": ["Ship to 1 Elm Street"], "provider": "anthropic"},
+            }
+        )
+        self.assertEqual(response["result"]["results"][0]["reason"], "unavailable")
+
+    async def test_batch_requires_inputs(self):
+        response = await self.server.handle_request(
+            {"method": "identify_addresses_batch", "params": {"inputs": []}}
+        )
+        self.assertEqual(response["code"], -32602)
+
+    async def test_batch_with_local_provider(self):
+        response = await self.server.handle_request(
+            {
+                "method": "identify_addresses_batch",
+                "params": {
+                    "inputs": ["Ship to 1 Elm Street, Boston, MA 02110", "no address"],
+                    "provider": "local",
+                },
+            }
+        )
+        results = response["result"]["results"]
+        self.assertEqual(results[0]["addresses"], ["1 Elm Street, Boston, MA 02110"])
+        self.assertEqual(results[1]["count"], 0)
+        self.assertEqual(response["result"]["total_count"], 1)
+
+    async def test_crawl_merges_addresses_across_pages(self):
+        from src.processors.crawler import CrawledPage
+
+        footer = "Visit 1 Elm Street, Boston, MA 02110"
+        pages = [
+            CrawledPage("https://shop.example/", 0, f"Welcome. {footer}"),
+            CrawledPage(
+                "https://shop.example/contact", 1, f"{footer} or 2 Oak Road, Salem, MA 01970"
+            ),
+        ]
+
+        async def crawl(crawler, seed):
+            self.assertEqual(crawler.max_pages, 5)
+            return pages
+
+        with patch("src.processors.crawler.SiteCrawler.crawl", crawl):
+            response = await self.server.handle_request(
+                {
+                    "method": "identify_addresses",
+                    "params": {
+                        "input": "https://shop.example/",
+                        "provider": "local",
+                        "crawl": {"max_pages": 5},
+                    },
+                }
+            )
+
+        result = response["result"]
+        self.assertEqual(result["input_type"], "crawl")
+        self.assertEqual(result["pages_crawled"], 2)
+        self.assertEqual(
+            result["sources"],
+            [
+                {
+                    "address": "1 Elm Street, Boston, MA 02110",
+                    "urls": ["https://shop.example/", "https://shop.example/contact"],
+                },
+                {
+                    "address": "2 Oak Road, Salem, MA 01970",
+                    "urls": ["https://shop.example/contact"],
+                },
+            ],
+        )
+        self.assertEqual(result["count"], 2)
+
+    async def test_crawl_needs_url(self):
+        response = await self.server.handle_request(
+            {"method": "identify_addresses", "params": {"input": "some text", "crawl": True}}
+        )
+        self.assertEqual(response["code"], -32602)
+
+    async def test_invalid_cache_mode(self):
+        response = await self.server.handle_request(
+            {
+                "method": "identify_addresses",
+                "params": {"input": "text", "cache": "sometimes"},
+            }
+        )
+        self.assertEqual(response["code"], -32602)
+
+
+class TestSocketTransport(unittest.IsolatedAsyncioTestCase):
+    """Test serving many clients from one server over a socket"""
+
+    async def asyncSetUp(self):
+        self.server = MCPServer(Config())
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    async def serve(self, **kwargs):
+        listening = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(
+            self.server.run_socket(ready=listening.set_result, **kwargs)
+        )
+
+        async def stop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        self.addAsyncCleanup(stop)
+        return await asyncio.wait_for(listening, 10)
+
+    @staticmethod
+    async def exchange(reader, writer, requests):
+        writer.write("".join(json.dumps(r) + "\n" for r in requests).encode())
+        await writer.drain()
+        writer.write_eof()
+        responses = [json.loads(line) for line in (await reader.read()).splitlines()]
+        writer.close()
+        return {r["id"]: r for r in responses}
+
+    async def test_tcp_clients_share_one_server(self):
+        transport = await self.serve(port=0)
+        host, port = transport.address.rsplit(":", 1)
+
+        async def client(n):
+            reader, writer = await asyncio.open_connection(host, int(port))
+            return await self.exchange(
+                reader,
+                writer,
+                [
+                    {"id": 1, "method": "ping"},
+                    {
+                        "id": 2,
+                        "method": "identify_addresses",
+                        "params": {
+                            "input": f"Ship to {n} Elm Street, Boston, MA 02110",
+                            "provider": "local",
+                        },
+                    },
+                ],
+            )
+
+        results = await asyncio.gather(*(client(n) for n in range(1, 6)))
+        for n, responses in enumerate(results, 1):
+            self.assertEqual(responses[1]["result"], "pong")
+            self.assertEqual(
+                responses[2]["result"]["addresses"], [f"{n} Elm Street, Boston, MA 02110"]
+            )
+        self.assertGreaterEqual(metrics.counter_value("connections_total", transport="tcp"), 5)
+
+    async def test_unix_socket_replaces_stale_file(self):
+        path = os.path.join(self.tmpdir.name, "server.sock")
+        stale = socket.socket(socket.AF_UNIX)
+        stale.bind(path)
+        stale.close()
+
+        await self.serve(path=path)
+        self.assertEqual(os.stat(path).st_mode & 0o777, 0o600)
+        reader, writer = await asyncio.open_unix_connection(path)
+        responses = await self.exchange(reader, writer, [{"id": 9, "method": "ping"}])
+        self.assertEqual(responses[9]["result"], "pong")
+
+    async def test_tcp_refuses_non_loopback_hosts(self):
+        with self.assertRaises(ValueError):
+            await SocketTransport(self.server, host="0.0.0.0").start()
+
+        for host, allow_remote in (("localhost", False), ("0.0.0.0", True)):
+            transport = SocketTransport(self.server, host=host, allow_remote=allow_remote)
+            await transport.start()
+            await transport.aclose()
+
+    async def test_reading_pauses_at_pending_limit(self):
+        release = asyncio.Event()
+        dispatched = []
+
+        class BlockingHandler:
+            async def dispatch_line(self, line, send):
+                request_id = json.loads(line)["id"]
+                dispatched.append(request_id)
+                await release.wait()
+                await send({"id": request_id, "result": "done"})
+
+        transport = SocketTransport(BlockingHandler(), port=0, max_pending=2)
+        await transport.start()
+        self.addAsyncCleanup(transport.aclose)
+        host, port = transport.address.rsplit(":", 1)
+        reader, writer = await asyncio.open_connection(host, int(port))
+        exchange = asyncio.create_task(
+            self.exchange(reader, writer, [{"id": n} for n in range(5)])
+        )
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(dispatched, [0, 1])
+        release.set()
+        responses = await asyncio.wait_for(exchange, 10)
+        self.assertEqual(sorted(responses), [0, 1, 2, 3, 4])
+
+
+class TestSupervisor(unittest.IsolatedAsyncioTestCase):
+    """Test spreading requests over worker processes"""
+
+    async def asyncSetUp(self):
+        # Workers resolve relative paths against the supervisor's directory
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmpdir.name)
+
+        config = Config()
+        config.cache_config["path"] = None
+        self.supervisor = Supervisor(config, workers=2)
+        listening = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(
+            serve_socket(self.supervisor, port=0, ready=listening.set_result)
+        )
+
+        async def stop():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+        self.addAsyncCleanup(stop)
+        transport = await asyncio.wait_for(listening, 30)
+        await self.wait_until_ready()
+        host, port = transport.address.rsplit(":", 1)
+        self.reader, self.writer = await asyncio.open_connection(host, int(port))
+        self.addCleanup(self.writer.close)
+
+    async def wait_until_ready(self, timeout=30):
+        deadline = time.monotonic() + timeout
+        while self.supervisor.ready_workers < len(self.supervisor.workers):
+            self.assertLess(time.monotonic(), deadline, "workers did not start")
+            await asyncio.sleep(0.05)
+
+    async def call(self, request):
+        self.writer.write((json.dumps(request) + "\n").encode())
+        await self.writer.drain()
+        return json.loads(await asyncio.wait_for(self.reader.readline(), 30))
+
+    def test_workers_share_a_result_cache(self):
+        env = self.supervisor.worker_env()
+        self.assertEqual(
+            env["RESULT_CACHE_PATH"], os.path.join(self.supervisor.run_dir, "results.sqlite")
+        )
+        self.assertEqual(env["MCP_WORKERS"], "0")
+        self.assertNotIn("METRICS_PROMETHEUS_PORT", env)
+
+    async def test_requests_spread_over_workers(self):
+        request = {
+            "method": "identify_addresses",
+            "params": {"input": "Ship to 5 Elm Street, Boston, MA 02110", "provider": "local"},
+        }
+        for n in range(4):
+            response = await self.call({**request, "id": f"req-{n}"})
+            self.assertEqual(response["id"], f"req-{n}")
+            self.assertEqual(response["result"]["addresses"], ["5 Elm Street, Boston, MA 02110"])
+
+        stats = (await self.call({"id": 1, "method": "stats"}))["result"]
+        self.assertEqual(stats["ready_workers"], 2)
+        self.assertEqual(len({worker["pid"] for worker in stats["workers"]}), 2)
+        # Idle workers take turns
+        for worker in stats["workers"]:
+            served = worker["stats"]["counters"]["requests_total"]
+            self.assertEqual(
+                sum(s["value"] for s in served if s["labels"]["method"] == "identify_addresses"),
+                2,
+            )
+
+    async def test_relative_paths_resolve_in_supervisor_directory(self):
+        with open("order.txt", "w") as f:
+            f.write("Ship to 5 Elm Street, Boston, MA 02110")
+        request = {
+            "id": 3,
+            "method": "identify_addresses",
+            "params": {"input": "order.txt", "provider": "local"},
+        }
+        response = await self.call(request)
+        self.assertEqual(response["result"]["input_type"], "file")
+        self.assertEqual(response["result"]["addresses"], ["5 Elm Street, Boston, MA 02110"])
+
+    async def test_busiest_worker_is_avoided(self):
+        busy, idle = self.supervisor.workers
+        busy.pending[0] = busy.pending[-1] = None
+        try:
+            self.assertEqual({self.supervisor._pick().index for _ in range(4)}, {idle.index})
+            idle.pending[-1] = None
+            self.assertEqual({self.supervisor._pick().index for _ in range(4)}, {idle.index})
+        finally:
+            busy.pending.clear()
+            idle.pending.clear()
+
+    async def test_crashed_worker_is_restarted(self):
+        worker = self.supervisor.workers[0]
+        old_pid = worker.process.pid
+        os.kill(old_pid, signal.SIGKILL)
+
+        for _ in range(200):
+            if worker.ready and worker.process.pid != old_pid:
+                break
+            # The other worker serves requests meanwhile
+            response = await self.call({"id": 2, "method": "list_providers"})
+            self.assertIn("result", response)
+            await asyncio.sleep(0.05)
+        self.assertTrue(worker.ready)
+        self.assertEqual(worker.restarts, 1)
+        self.assertEqual(
+            metrics.counter_value("worker_restarts_total", worker="0"), 1
+        )
+
+
+class TestSupervisorStart(unittest.IsolatedAsyncioTestCase):
+    """Test a supervisor whose workers cannot start"""
+
+    async def test_start_fails_when_no_worker_listens(self):
+        supervisor = Supervisor(Config(), workers=2)
+        with patch("src.server.supervisor.sys.executable", "/bin/false"):
+            with self.assertRaises(RuntimeError):
+                await supervisor.start()
+        self.assertFalse(os.path.exists(supervisor.run_dir))
+
+
+class TestColdStart(unittest.TestCase):
+    """Test that starting the server stays cheap"""
+
+    def test_client_libraries_not_imported_at_startup(self):
+        code = (
+            "import sys, src.main; "
+            "print(sorted(m for m in ('openai', 'requests', 'httpx') if m in sys.modules))"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout
+        self.assertEqual(output.strip().splitlines()[-1], "[]")
+
+
 if __name__ == "__main__":
     unittest.main()